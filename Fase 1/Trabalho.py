@@ -1,53 +1,119 @@
-import re
-from collections import deque
-import math
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Os algoritmos compartilhados entre as fases ficam na pasta da Fase 2
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Fase_2"))
+
+from caminhos_minimos import (
+    OraculoDistancias,
+    adjacencia_minima,
+    infinito,
+    para_listas,
+)
+from componentes import ConjuntosDisjuntos, componentes_fortemente_conexos
+from csr import DIRIGIDA, REQUERIDA, ListaAdjacenciaCSR
+from intermediacao import intermediacao_brandes, intermediacao_caminho_unico
+from instrumentacao import cronometrado
+from leitura import carregar_instancia
 
 
 class Grafo:
-    def __init__(self, num_vertices):
+    def __init__(self, num_vertices, processos=None):
         self.num_vertices = num_vertices
-        # Lista de adjacência: para cada vértice, guarda uma lista de dicionários
-        # representando as arestas/arcos que saem do vértice.
-        self.lista_adj = [[] for _ in range(num_vertices + 1)]
+        # Lista de adjacência compacta (CSR): cada aresta/arco é guardado uma única vez
+        # em vetores tipados. A visão lista_adj continua dando, para cada vértice, os
+        # dicionários das arestas/arcos que saem dele.
+        self.adjacencia = ListaAdjacenciaCSR(num_vertices + 1)
         # Vértices requeridos
         self.vr = set()
         # Arestas (edges) requeridos (não direcionadas)
         self.er = set()
         # Arcos requeridos (direcionados)
         self.ar = set()
+        # Cache das matrizes de caminhos mínimos, invalidado quando o grafo muda.
+        # Com processos > 1 o cálculo das matrizes é dividido entre processos
+        self.oraculo = OraculoDistancias(self.conexoes, processos=processos)
+        # Componentes conectados (ignorando a direção), atualizados a cada conexão
+        self.conjuntos = ConjuntosDisjuntos(num_vertices)
 
     def adicionar_aresta(
         self, u, v, custo=1, demanda=0, requerida=False, dirigido=False
     ):
         # Adiciona aresta/arco de u para v
-        self.lista_adj[u].append(
-            {
-                "dest": v,
-                "custo": custo,
-                "demanda": demanda,
-                "requerida": requerida,
-                "dirigido": dirigido,
-            }
-        )
+        self._registrar_aresta(u, v, custo, demanda, requerida, dirigido)
+        # Se a matriz de caminhos mínimos já foi calculada, ela é atualizada em O(n²)
+        # em vez de ser descartada
+        self.oraculo.inserir(u, v, custo, dirigida=dirigido)
+
+    def adicionar_arestas(self, arestas):
+        """
+        Adiciona várias arestas/arcos de uma vez. Cada item é uma tupla com os
+        argumentos de adicionar_aresta (u, v, custo, demanda, requerida, dirigido),
+        e a matriz de caminhos mínimos é atualizada uma única vez, no final.
+        """
+        origens, destinos, custos = [], [], []
+        for aresta in arestas:
+            u, v, custo, dirigido = self._registrar_aresta(*aresta)
+            origens.append(u)
+            destinos.append(v)
+            custos.append(custo)
+            if not dirigido:
+                origens.append(v)
+                destinos.append(u)
+                custos.append(custo)
+        self.oraculo.inserir_lote(origens, destinos, custos)
+
+    def alterar_custo(self, u, v, custo):
+        """
+        Altera o custo da aresta/arco de u para v (a primeira inserida, se houver
+        conexões paralelas). Uma redução atualiza a matriz de caminhos mínimos em
+        O(n²); um aumento a invalida.
+        """
+        indices = self.adjacencia.encontrar(u, v)
+        if len(indices) == 0:
+            raise KeyError(f"não há aresta ou arco de {u} para {v}")
+        anterior = self.adjacencia.alterar_custo(int(indices[0]), custo)
+        if custo < anterior:
+            dirigido = bool(self.adjacencia.conexao_original(int(indices[0]))[4] & DIRIGIDA)
+            self.oraculo.inserir(u, v, custo, dirigida=dirigido)
+        elif custo > anterior:
+            self.oraculo.invalidar()
+
+    def _registrar_aresta(
+        self, u, v, custo=1, demanda=0, requerida=False, dirigido=False
+    ):
+        self.conjuntos.unir(u, v)
+        flags = (REQUERIDA if requerida else 0) | (DIRIGIDA if dirigido else 0)
+        # Arestas não dirigidas são guardadas uma vez e aparecem nas duas pontas
+        self.adjacencia.adicionar(u, v, custo, demanda, flags)
         if not dirigido:
-            # Se não for dirigido, adiciona aresta "espelhada" de v para u
-            self.lista_adj[v].append(
-                {
-                    "dest": u,
-                    "custo": custo,
-                    "demanda": demanda,
-                    "requerida": requerida,
-                    "dirigido": dirigido,
-                }
-            )
             if requerida:
                 # Evita duplicidade
                 self.er.add(tuple(sorted((u, v))))
         else:
             if requerida:
                 self.ar.add((u, v))
+        return u, v, custo, dirigido
+
+    @property
+    def lista_adj(self):
+        return self.adjacencia.visao(self._montar_aresta)
+
+    @staticmethod
+    def _montar_aresta(u, v, custo, demanda, flags):
+        return {
+            "dest": v,
+            "custo": custo,
+            "demanda": demanda,
+            "requerida": bool(flags & REQUERIDA),
+            "dirigido": bool(flags & DIRIGIDA),
+        }
 
     def adicionar_vertice_requerido(self, v):
+        # Vértices requeridos não mudam as distâncias, então o oráculo continua válido
         self.vr.add(v)
 
     # Método usado na depuração do código
@@ -68,26 +134,16 @@ class Grafo:
 
     # 2. Quantidade de arestas (edges não direcionadas)
     def contar_edges(self):
-        num_edges = 0
-        contadas = set()
-        for u in range(self.num_vertices):
-            for aresta in self.lista_adj[u]:
-                if not aresta["dirigido"]:
-                    v = aresta["dest"]
-                    chave = tuple(sorted((u, v)))
-                    if chave not in contadas:
-                        num_edges += 1
-                        contadas.add(chave)
-        return num_edges
+        origem, destino, _, _, flags = self.adjacencia.conexoes_originais()
+        nao_dirigidas = (flags & DIRIGIDA) == 0
+        # Arestas paralelas entre o mesmo par contam uma vez só
+        pares = np.sort(np.stack((origem[nao_dirigidas], destino[nao_dirigidas]), axis=1), axis=1)
+        return len(np.unique(pares, axis=0))
 
     # 3. Quantidade de arcos (direcionados)
     def contar_arcos(self):
-        num_arcos = 0
-        for u in range(self.num_vertices):
-            for aresta in self.lista_adj[u]:
-                if aresta["dirigido"]:
-                    num_arcos += 1
-        return num_arcos
+        _, _, _, _, flags = self.adjacencia.conexoes_originais()
+        return int(np.count_nonzero(flags & DIRIGIDA))
 
     # 4. Quantidade de vértices requeridos
     def qtd_vertices_req(self):
@@ -114,131 +170,90 @@ class Grafo:
         densidade = total_conexoes / (max_ed + max_arc)
         return round(densidade, 2)
 
-    # 8. Contar componentes conectados (ignorando a direção) utilizando BFS
+    # 8. Contar componentes conectados (ignorando a direção)
     def contar_componentes_conectados(self):
-        visitado = [False] * self.num_vertices
-        componentes = 0
+        # O union-find é atualizado em adicionar_aresta, então a contagem já está pronta
+        return self.conjuntos.quantidade
 
-        # Função para obter vizinhos ignorando a direção
-        def obter_vizinhos(u):
-            vizinhos = set()
-            # Vizinhos dos quais u é a origem
-            for aresta in self.lista_adj[u]:
-                vizinhos.add(aresta["dest"])
-            # Vizinhos onde u é o destino (percorre todos os vértices)
-            for v in range(self.num_vertices):
-                for aresta in self.lista_adj[v]:
-                    if aresta["dest"] == u:
-                        vizinhos.add(v)
-            return vizinhos
-
-        for v in range(self.num_vertices):
-            if not visitado[v]:
-                componentes += 1
-                fila = deque([v])
-                visitado[v] = True
-
-                while fila:
-                    u = fila.popleft()
-                    for w in obter_vizinhos(u):
-                        if not visitado[w]:
-                            visitado[w] = True
-                            fila.append(w)
-        return componentes
+    # Componentes fortemente conectados (respeitando a direção dos arcos)
+    def componentes_fortemente_conectados(self):
+        def sucessores(u):
+            return self.adjacencia.vizinhos(u).tolist()
+
+        return componentes_fortemente_conexos(self.num_vertices, sucessores)
+
+    def contar_componentes_fortemente_conectados(self):
+        return len(self.componentes_fortemente_conectados())
+
+    def _graus(self):
+        # Graus dos vértices 1 .. n-1 (o vértice 0 não entra, como na versão original)
+        return self.adjacencia.graus()[1 : max(self.num_vertices, 2)]
 
     # 9. Grau mínimo dos vértices
     def grau_minimo(self):
-        min_grau = len(self.lista_adj[1])
-        for i in range(1, self.num_vertices):
-            graus = len(self.lista_adj[i])
-            if min_grau > graus:
-                min_grau = graus
-        return min_grau
+        return int(self._graus().min())
 
     # 10. Grau maxímo
     def grau_maximo(self):
-        max_grau = len(self.lista_adj[1])
-        for i in range(1, self.num_vertices):
-            graus = len(self.lista_adj[i])
-            if max_grau < graus:
-                max_grau = graus
-        return max_grau
+        return int(self._graus().max())
+
+    def conexoes(self):
+        """
+        Retorna (n, origens, destinos, custos), com uma entrada nos vetores
+        paralelos para cada aresta/arco da lista de adjacência.
+        """
+        return (
+            self.num_vertices,
+            self.adjacencia.origens(),
+            self.adjacencia.dest,
+            self.adjacencia.custo,
+        )
 
     def calcular_matriz_caminhos_minimos(self):
         """
         Calcula a matriz de distâncias e a matriz de predecessores usando o algoritmo de Floyd Warshall.
         Para cada par (i, j), usamos o custo mínimo dentre todas as arestas que saem de i para j,
         se houver múltiplas.
+        As matrizes vêm do oráculo do grafo (calculadas uma única vez com NumPy) e são
+        devolvidas no formato de listas: dist[i][j] = math.inf quando não há caminho e
+        pred[i][j] = None quando não há predecessor.
         """
-        n = self.num_vertices
-
-        # Inicializa a matriz de distâncias e predecessores
-        # dist[i][j] = custo mínimo conhecido de i para j.
-        # pred[i][j] = predecessor de j no caminho mais curto partindo de i.
-        dist = [[math.inf] * n for _ in range(n)]
-        pred = [[None] * n for _ in range(n)]
-
-        # Inicializa: custo zero para i==j
-        for i in range(n):
-            dist[i][i] = 0
-            pred[i][i] = i
-
-        # Para cada aresta (ou arco) em cada lista de adjacência,
-        # seleciona o menor custo (se houver mais de uma conexão).
-        for u in range(n):
-            for aresta in self.lista_adj[u]:
-                v = aresta["dest"]
-                custo = aresta["custo"]
-                # Se já houver outra aresta entre u e v, usa o menor custo
-                if custo < dist[u][v]:
-                    dist[u][v] = custo
-                    pred[u][v] = u
-
-        # Aplica o algoritmo de Floyd-Warshall
-        for k in range(n):
-            for i in range(n):
-                for j in range(n):
-                    if dist[i][k] + dist[k][j] < dist[i][j]:
-                        dist[i][j] = dist[i][k] + dist[k][j]
-                        pred[i][j] = pred[k][j]
-
-        return dist, pred
+        return para_listas(*self.oraculo.matrizes())
 
     def reconstruir_caminho(self, s, t, pred):
         """
         Reconstrói o caminho de s até t utilizando a matriz de predecessores.
         Retorna uma lista de vértices representando o caminho.
         Se não houver caminho, retorna lista vazia.
+        Aceita tanto a matriz em listas (None) quanto a do oráculo (SEM_PREDECESSOR).
         """
-        if pred[s][t] is None:
+        if pred[s][t] is None or pred[s][t] < 0:
             return []
         caminho = [t]
         while t != s:
-            t = pred[s][t]
+            t = int(pred[s][t])
             caminho.append(t)
         caminho.reverse()
         return caminho
 
     # 11 Intermediação
-    def calcular_intermediacao(self):
+    def calcular_intermediacao(self, caminho_unico=True, processos=None):
         """
         Calcula a intermediação (betweenness) de cada vértice.
-        Para cada par de vértices (s, t), conta quantas vezes um vértice aparece
-        como intermediário no caminho mais curto entre s e t.
+        Com caminho_unico=True (padrão), para cada par de vértices (s, t), conta quantas
+        vezes um vértice aparece como intermediário no caminho mais curto entre s e t
+        reconstruído pela matriz de predecessores, mantendo os relatórios comparáveis.
+        Com caminho_unico=False usa o algoritmo de Brandes, que divide cada par entre
+        todos os caminhos mínimos empatados; processos > 1 distribui as fontes
+        entre processos.
         """
-        dist, pred = self.calcular_matriz_caminhos_minimos()
-        intermed = [0] * self.num_vertices
-
-        # Para cada par (s, t) s ≠ t
-        for s in range(self.num_vertices):
-            for t in range(self.num_vertices):
-                if s != t and dist[s][t] < math.inf:
-                    caminho = self.reconstruir_caminho(s, t, pred)
-                    # Se existir caminho, incrementa para os vértices intermediários (excluindo s e t)
-                    if len(caminho) > 2:
-                        for v in caminho[1:-1]:
-                            intermed[v] += 1
-        return intermed
+        if caminho_unico:
+            _, pred = self.oraculo.matrizes()
+            return intermediacao_caminho_unico(pred)
+
+        n, origens, destinos, custos = self.conexoes()
+        adjacencia = adjacencia_minima(n, origens, destinos, custos)
+        return intermediacao_brandes(n, adjacencia, processos)
 
     # 12 Caminho médio
     def calcular_caminho_medio(self):
@@ -247,16 +262,11 @@ class Grafo:
         somente os pares (i, j) conectados (ou seja, com distância < inf).
         """
 
-        dist, _ = self.calcular_matriz_caminhos_minimos()
-        soma = 0.0
-        contador = 0
-        n = self.num_vertices
-        for i in range(n):
-            for j in range(n):
-                # Considera apenas caminhos entre vértices diferentes que sejam alcançáveis
-                if i != j and dist[i][j] < math.inf:
-                    soma += dist[i][j]
-                    contador += 1
+        dist, _ = self.oraculo.matrizes()
+        # Considera apenas caminhos entre vértices diferentes que sejam alcançáveis
+        alcancaveis = self._pares_alcancaveis(dist)
+        soma = dist[alcancaveis].sum().item()
+        contador = int(alcancaveis.sum())
 
         return round(soma / contador, 2)
 
@@ -268,151 +278,125 @@ class Grafo:
         """
 
         # Obtém a matriz de distâncias, ignorando a matriz de predecessores aqui.
-        dist, _ = self.calcular_matriz_caminhos_minimos()
-        diametro = 0
-        n = self.num_vertices
-        for i in range(n):
-            for j in range(n):
-                # Considera apenas pares diferentes e conexos
-                if i != j and dist[i][j] < math.inf:
-                    diametro = max(diametro, dist[i][j])
-        return diametro
-
-
-def ler_arq(arq):
-    with open(arq, "r") as f:
-        linhas = f.readlines()
-
-    num_vertices = None
-    grafo = None
-    secao = None
-
-    for linha in linhas:
-        linha = linha.strip()
-        if not linha:
-            continue
-
-        # Cabeçalho
-        if linha.startswith("#Nodes:"):
-            num_vertices = int(linha.split(":")[1])
-            grafo = Grafo(num_vertices)
-            continue
-
-        if re.match(r"ReN\.", linha):
-            secao = "ReN"
-            continue
-        if re.match(r"ReE\.", linha):
-            secao = "ReE"
-            continue
-        if re.match(r"EDGE", linha):
-            secao = "EDGE"
-            continue
-        if re.match(r"ReA\.", linha):
-            secao = "ReA"
-            continue
-        if re.match(r"ARC", linha):
-            secao = "ARC"
-            continue
-
-        if secao == "ReN":
-            if m := re.match(r"N(\d+)", linha):
-                v = int(m.group(1)) - 1
-                grafo.adicionar_vertice_requerido(v)
-
-        elif secao == "ReE":
-            partes = linha.split()
-            if len(partes) >= 6:
-                _, u, v, custo, demanda, _ = partes
-                grafo.adicionar_aresta(
-                    int(u) - 1,
-                    int(v) - 1,
-                    int(custo),
-                    int(demanda),
-                    requerida=True,
-                    dirigido=False,
-                )
+        dist, _ = self.oraculo.matrizes()
+        # Considera apenas pares diferentes e conexos
+        alcancaveis = self._pares_alcancaveis(dist)
+        if not alcancaveis.any():
+            return 0
+        return max(0, dist[alcancaveis].max().item())
+
+    def _pares_alcancaveis(self, dist):
+        """
+        Máscara dos pares (i, j), i ≠ j, com caminho de i até j.
+        """
+        alcancaveis = dist < infinito(dist)
+        np.fill_diagonal(alcancaveis, False)
+        return alcancaveis
 
-        elif secao == "EDGE":
-            partes = linha.split()
-            if (
-                len(partes) >= 4
-                and partes[-3].isdigit()
-                and partes[-2].isdigit()
-                and partes[-1].isdigit()
-            ):
-                u = int(partes[-3]) - 1
-                v = int(partes[-2]) - 1
-                custo = int(partes[-1])
-                grafo.adicionar_aresta(u, v, custo, 0, requerida=False, dirigido=False)
-
-        elif secao == "ReA":
-            partes = linha.split()
-            if len(partes) >= 6:
-                _, u, v, custo, demanda, _ = partes
-                grafo.adicionar_aresta(
-                    int(u) - 1,
-                    int(v) - 1,
-                    int(custo),
-                    int(demanda),
-                    requerida=True,
-                    dirigido=True,
-                )
 
-        elif secao == "ARC":
-            partes = linha.split()
-            if (
-                len(partes) >= 4
-                and partes[-3].isdigit()
-                and partes[-2].isdigit()
-                and partes[-1].isdigit()
-            ):
-                u = int(partes[-3]) - 1
-                v = int(partes[-2]) - 1
-                custo = int(partes[-1])
-                grafo.adicionar_aresta(u, v, custo, 0, requerida=False, dirigido=True)
+@cronometrado("leitura")
+def ler_arq(arq, usar_cache=True, processos=None):
+    # A interpretação do arquivo (e o cache binário) fica no leitor compartilhado
+    instancia = carregar_instancia(arq, usar_cache)
+    grafo = Grafo(instancia.num_nos, processos)
+
+    # Os vértices do arquivo começam em 1; aqui começam em 0
+    for v, _, _ in instancia.nos_requeridos.tolist():
+        grafo.adicionar_vertice_requerido(v - 1)
+
+    for u, v, custo, demanda, _ in instancia.arestas_requeridas.tolist():
+        grafo.adicionar_aresta(u - 1, v - 1, custo, demanda, requerida=True, dirigido=False)
+
+    for u, v, custo in instancia.arestas.tolist():
+        grafo.adicionar_aresta(u - 1, v - 1, custo, 0, requerida=False, dirigido=False)
+
+    for u, v, custo, demanda, _ in instancia.arcos_requeridos.tolist():
+        grafo.adicionar_aresta(u - 1, v - 1, custo, demanda, requerida=True, dirigido=True)
+
+    for u, v, custo in instancia.arcos.tolist():
+        grafo.adicionar_aresta(u - 1, v - 1, custo, 0, requerida=False, dirigido=True)
 
     return grafo
 
 
-grafo = ler_arq("Testes\BHW1.dat")
+# As 13 estatísticas do relatório, na ordem em que são apresentadas
+ESTATISTICAS = (
+    ("vertices", Grafo.contar_vertices),
+    ("arestas", Grafo.contar_edges),
+    ("arcos", Grafo.contar_arcos),
+    ("vertices_requeridos", Grafo.qtd_vertices_req),
+    ("arestas_requeridas", Grafo.qtd_edges_req),
+    ("arcos_requeridos", Grafo.qtd_arcos_req),
+    ("densidade", Grafo.calc_densidade),
+    ("componentes_conectados", Grafo.contar_componentes_conectados),
+    ("grau_minimo", Grafo.grau_minimo),
+    ("grau_maximo", Grafo.grau_maximo),
+    ("intermediacao", Grafo.calcular_intermediacao),
+    ("caminho_medio", Grafo.calcular_caminho_medio),
+    ("diametro", Grafo.calcular_diametro),
+)
+
+
+def calcular_estatisticas(grafo):
+    """
+    Calcula as 13 estatísticas do grafo e retorna um dicionário na ordem do relatório.
+    """
+    return {nome: estatistica(grafo) for nome, estatistica in ESTATISTICAS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula as estatísticas de uma instância.")
+    parser.add_argument(
+        "instancia",
+        nargs="?",
+        default=str(Path(__file__).resolve().parent.parent / "Testes" / "BHW1.dat"),
+        help="Arquivo .dat da instância (padrão: Testes/BHW1.dat)",
+    )
+    parser.add_argument("-p", "--processos", type=int, default=None, help="Processos para os caminhos mínimos e a intermediação (padrão: um só)")
+    args = parser.parse_args(argv)
 
+    grafo = ler_arq(args.instancia, processos=args.processos)
 
-grafo.imprimir_lista_adj()
+    grafo.imprimir_lista_adj()
 
-##### Estatísticas do grafo #####
-print(f"1. Número de vértices: {grafo.contar_vertices()}")
+    ##### Estatísticas do grafo #####
+    print(f"1. Número de vértices: {grafo.contar_vertices()}")
 
-print(f"2. Número de arestas: {grafo.contar_edges()}")
+    print(f"2. Número de arestas: {grafo.contar_edges()}")
 
-print(f"3. Númeor de arcos: {grafo.contar_arcos()}")
+    print(f"3. Númeor de arcos: {grafo.contar_arcos()}")
 
-print(f"4. Número de vértices requeridos: {grafo.qtd_vertices_req()}")
+    print(f"4. Número de vértices requeridos: {grafo.qtd_vertices_req()}")
 
-print(f"5. Número de arestas requeridas: {grafo.qtd_edges_req()}")
+    print(f"5. Número de arestas requeridas: {grafo.qtd_edges_req()}")
 
-print(f"6. Número de arcos requeridos: {grafo.qtd_arcos_req()}")
+    print(f"6. Número de arcos requeridos: {grafo.qtd_arcos_req()}")
 
-print(f"7. Densidade do grafo: {grafo.calc_densidade()}")
+    print(f"7. Densidade do grafo: {grafo.calc_densidade()}")
 
-print(f"8. Componentes conectados: {grafo.contar_componentes_conectados()}")
+    print(f"8. Componentes conectados: {grafo.contar_componentes_conectados()}")
 
-print(f"9. Grau mínimo: {grafo.grau_minimo()}")
+    print(f"9. Grau mínimo: {grafo.grau_minimo()}")
 
-print(f"10. Grau maxímo: {grafo.grau_maximo()}")
+    print(f"10. Grau maxímo: {grafo.grau_maximo()}")
 
-print()
+    print()
 
-intermediacao = grafo.calcular_intermediacao()
+    intermediacao = grafo.calcular_intermediacao(processos=args.processos)
 
-print("11. Intermediação: ")
+    print("11. Intermediação: ")
 
-for v in range(grafo.num_vertices):
-    print(
-        f"  Vértice {v} aparece {intermediacao[v]} vezes como intermediário nos caminhos mais curtos."
-    )
+    for v in range(grafo.num_vertices):
+        print(
+            f"  Vértice {v} aparece {intermediacao[v]} vezes como intermediário nos caminhos mais curtos."
+        )
+
+    print()
+
+    print(f"12. Caminho médio: {grafo.calcular_caminho_medio()}")
 
-print()
+    print(f"13. Diâmetro: {grafo.calcular_diametro()}")
 
-print(f"12. Caminho médio: {grafo.calcular_caminho_medio()}")
 
-print(f"13. Diâmetro: {grafo.calcular_diametro()}")
+if __name__ == "__main__":
+    main()
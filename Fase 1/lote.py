@@ -0,0 +1,137 @@
+"""
+Calcula as 13 estatísticas da Fase 1 para várias instâncias em paralelo.
+
+Exemplo:
+    python "Fase 1/lote.py" Testes -s relatorio.csv
+    python "Fase 1/lote.py" "Testes/DI-NEARP-*.dat" -p 4 -s relatorio.jsonl
+
+Os resultados são gravados à medida que cada instância termina, em CSV ou
+JSON lines (decidido pela extensão do arquivo de saída; sem -s, JSON lines na
+saída padrão).
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Trabalho import calcular_estatisticas, ler_arq
+from leitura import numero_de_nos
+
+COLUNAS = [
+    "instancia",
+    "vertices",
+    "arestas",
+    "arcos",
+    "vertices_requeridos",
+    "arestas_requeridas",
+    "arcos_requeridos",
+    "densidade",
+    "componentes_conectados",
+    "grau_minimo",
+    "grau_maximo",
+    "intermediacao",
+    "caminho_medio",
+    "diametro",
+    "tempo",
+    "erro",
+]
+
+
+def listar_instancias(entradas):
+    """
+    Expande pastas (todos os .dat dentro delas), padrões glob e arquivos soltos.
+    """
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(glob.glob(os.path.join(entrada, "*.dat")))
+        elif glob.has_magic(entrada):
+            arquivos.extend(glob.glob(entrada))
+        else:
+            arquivos.append(entrada)
+    # Remove repetições mantendo a ordem
+    return list(dict.fromkeys(os.path.normpath(a) for a in arquivos))
+
+
+def processar(arq):
+    inicio = time.perf_counter()
+    resultado = {"instancia": os.path.splitext(os.path.basename(arq))[0]}
+    try:
+        resultado.update(calcular_estatisticas(ler_arq(arq)))
+    except Exception as erro:
+        resultado["erro"] = f"{type(erro).__name__}: {erro}"
+    resultado["tempo"] = round(time.perf_counter() - inicio, 4)
+    return resultado
+
+
+class Relatorio:
+    """
+    Grava uma linha por instância assim que ela fica pronta.
+    """
+
+    def __init__(self, saida):
+        self.arquivo = open(saida, "w", newline="") if saida else sys.stdout
+        self.csv = None
+        if saida and saida.lower().endswith(".csv"):
+            self.csv = csv.DictWriter(self.arquivo, fieldnames=COLUNAS)
+            self.csv.writeheader()
+
+    def escrever(self, resultado):
+        if self.csv is not None:
+            linha = dict(resultado)
+            if "intermediacao" in linha:
+                linha["intermediacao"] = json.dumps(linha["intermediacao"])
+            self.csv.writerow(linha)
+        else:
+            self.arquivo.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        self.arquivo.flush()
+
+    def fechar(self):
+        if self.arquivo is not sys.stdout:
+            self.arquivo.close()
+
+
+def executar(arquivos, processos=None, saida=None):
+    """
+    Distribui as instâncias entre processos, começando pelas maiores (o custo é
+    dominado pelo Floyd-Warshall, O(n³)), para que os processos terminem juntos.
+    Retorna o número de instâncias que falharam.
+    """
+    arquivos = sorted(arquivos, key=numero_de_nos, reverse=True)
+    relatorio = Relatorio(saida)
+    falhas = 0
+    try:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [executor.submit(processar, arq) for arq in arquivos]
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                falhas += "erro" in resultado
+                relatorio.escrever(resultado)
+    finally:
+        relatorio.fechar()
+    return falhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entradas", nargs="+", help="Pastas, arquivos .dat ou padrões glob")
+    parser.add_argument("-p", "--processos", type=int, default=None, help="Número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("-s", "--saida", default=None, help="Arquivo .csv ou .jsonl (padrão: JSON lines na saída padrão)")
+    args = parser.parse_args(argv)
+
+    arquivos = listar_instancias(args.entradas)
+    if not arquivos:
+        parser.error("nenhuma instância encontrada")
+    falhas = executar(arquivos, args.processos, args.saida)
+    if falhas:
+        print(f"{falhas} de {len(arquivos)} instâncias falharam", file=sys.stderr)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,18 @@
-import re
-import networkx as nx
-import matplotlib.pyplot as plt
+import argparse
+import os
+
+from caminhos_minimos import OraculoDistancias, OraculoSobDemanda
+from csr import DIRIGIDA, REQUERIDA, ListaAdjacenciaCSR
+from instrumentacao import cronometrado
+from leitura import carregar_instancia
+from servicos import Servico
 
 class Grafo:
-    def __init__(self, numero_de_nos, capacidade, deposito):
+    def __init__(self, numero_de_nos, capacidade, deposito, processos=None):
         self.numero_de_nos = numero_de_nos
-        # Inicializa a lista de adjacência para a representação do grafo
-        self.lista_adj = [[] for _ in range(numero_de_nos + 1)]
+        # Inicializa a lista de adjacência compacta (CSR) para a representação do grafo.
+        # Cada aresta é guardada uma única vez; a visão lista_adj monta os dicionários sob demanda
+        self.adjacencia = ListaAdjacenciaCSR(numero_de_nos + 1)
         # Inicializa um set para os nós requeridos
         self.nos_requeridos = set()
         # Inicializa um set para as arestas requeridas
@@ -17,11 +23,48 @@ class Grafo:
         self.capacidade = capacidade
         # Armazena o valor do nó de deposito
         self.deposito = deposito
+        # Serviços (nós, arestas e arcos requeridos) na ordem em que foram adicionados.
+        # O id de cada serviço é a sua posição + 1, como nos arquivos de solução
+        self.servicos = []
+        # Cache das matrizes de caminhos mínimos, invalidado quando o grafo muda.
+        # Com processos > 1 o cálculo das matrizes é dividido entre processos
+        self.oraculo = OraculoDistancias(self.conexoes, processos=processos)
+        # Distâncias por linha (Dijkstra sob demanda, com cache LRU), para grafos em
+        # que a matriz completa não cabe na memória
+        self.oraculo_sob_demanda = OraculoSobDemanda(self.conexoes)
+        # Hash do arquivo de onde o grafo foi lido, enquanto ele não for alterado
+        # (chave da tabela de serviços em disco)
+        self.hash_instancia = None
 
     def addNohRequerido(self, noh, demanda, custo):
         self.nos_requeridos.add((noh, demanda, custo))
+        self.hash_instancia = None
+        # Atender um nó não percorre nenhuma ligação, então o custo na rota é zero
+        self.servicos.append(Servico(len(self.servicos) + 1, "N", noh, noh, demanda, 0, custo))
 
-    def auxAddConexao(self, saida: int, destino: int, custo: float, demanda: int = 0):
+    def conexoes(self):
+        """
+        _Retorna (n, origens, destinos, custos) para o cálculo de caminhos mínimos._
+        Os nós começam em 1, então as matrizes têm numero_de_nos + 1 linhas e a linha 0 fica sem uso.
+        """
+        return (
+            self.numero_de_nos + 1,
+            self.adjacencia.origens(),
+            self.adjacencia.dest,
+            self.adjacencia.custo,
+        )
+
+    @property
+    def lista_adj(self):
+        return self.adjacencia.visao(self._montarConexao)
+
+    @staticmethod
+    def _montarConexao(saida, destino, custo, demanda, flags):
+        return {"saida": saida, "destino": destino, "custo": custo, "demanda": demanda}
+
+    def auxAddConexao(
+        self, saida: int, destino: int, custo: float, demanda: int = 0, flags: int = DIRIGIDA
+    ):
         """
         _Função auxíliar usada para acrescentar uma aresta ou arco no grafo._
         Args:
@@ -29,13 +72,52 @@ class Grafo:
             destino (int): Vértice destino
             custo (float): Custo para percorrer o caminho
             demanda (int, optional): Demanda usada se a conexão é requerida. Defaults to 0.
+            flags (int, optional): Bits REQUERIDA/DIRIGIDA da conexão. Sem DIRIGIDA, a conexão
+                aparece também a partir do destino. Defaults to DIRIGIDA.
         """
-        self.lista_adj[saida].append(
-            {"saida": saida, "destino": destino, "custo": custo, "demanda": demanda}
-        )
+        self.adjacencia.adicionar(saida, destino, custo, demanda, flags)
+        self.oraculo_sob_demanda.invalidar()
+        self.hash_instancia = None
+        # Com as matrizes de caminhos mínimos já calculadas, atualiza em O(n²) em vez de descartá-las
+        self.oraculo.inserir(saida, destino, custo, dirigida=bool(flags & DIRIGIDA))
+
+    def alterarCusto(self, saida: int, destino: int, custo: float):
+        """
+        _Altera o custo de percorrer a aresta ou arco de saida para destino._
+        _Se houver conexões paralelas, altera a primeira que foi inserida. Uma redução
+        atualiza as matrizes de caminhos mínimos em O(n²); um aumento as invalida._
+        Args:
+            saida (int): Vértice de saída
+            destino (int): Vértice destino
+            custo (float): Novo custo
+        """
+        indices = self.adjacencia.encontrar(saida, destino)
+        if len(indices) == 0:
+            raise KeyError(f"não há aresta ou arco de {saida} para {destino}")
+        origem, fim, anterior, _, flags = self.adjacencia.conexao_original(int(indices[0]))
+        self.adjacencia.alterar_custo(int(indices[0]), custo)
+        self.oraculo_sob_demanda.invalidar()
+        self.hash_instancia = None
+
+        # O custo de atender um serviço é o de percorrer a ligação
+        for i, servico in enumerate(self.servicos):
+            if servico.tipo != "N" and (servico.origem, servico.destino) == (origem, fim):
+                self.servicos[i] = servico._replace(custo=custo)
+                break
+
+        if custo < anterior:
+            self.oraculo.inserir(saida, destino, custo, dirigida=bool(flags & DIRIGIDA))
+        elif custo > anterior:
+            self.oraculo.invalidar()
 
     def addArco(
-        self, saida: int, destino: int, requerido: bool, custo: float, demanda: int = 0
+        self,
+        saida: int,
+        destino: int,
+        requerido: bool,
+        custo: float,
+        demanda: int = 0,
+        custo_servico: float = 0,
     ):
         """
         _Adiciona uma aresta direcionada ao grafo._
@@ -45,14 +127,27 @@ class Grafo:
             destino (int): Vértice onde o arco chega.
             requerido (bool): Se o vértice é requerido.
             custo (float): Custo para percorrer o arco.
+            demanda (int): Demanda usada se o arco é requerido. Defaults to 0.
+            custo_servico (float): Custo de serviço informado no arquivo. Defaults to 0.
         """
-        self.auxAddConexao(saida, destino, custo, demanda)
+        self.auxAddConexao(
+            saida, destino, custo, demanda, DIRIGIDA | (REQUERIDA if requerido else 0)
+        )
         if requerido:
             # Adiciona o arco ao set de arcos requeridos
             self.arcos_requeridos.add((saida, destino))
+            self.servicos.append(
+                Servico(len(self.servicos) + 1, "A", saida, destino, demanda, custo, custo_servico)
+            )
 
     def addAresta(
-        self, saida: int, destino: int, requerido: bool, custo: float, demanda: int = 0
+        self,
+        saida: int,
+        destino: int,
+        requerido: bool,
+        custo: float,
+        demanda: int = 0,
+        custo_servico: float = 0,
     ):
         """
         _Adiciona uma aresta não direcionada no grafo._
@@ -63,14 +158,16 @@ class Grafo:
             requerido (bool): Se a aresta é requerida ou não.
             custo (float): Custo para percorrer a aresta.
             demanda (int): Demanda usada se a aresta é requerida. Defaults to 0.
+            custo_servico (float): Custo de serviço informado no arquivo. Defaults to 0.
         """
-        # Adiciona conexão de um vértice x -> y
-        self.auxAddConexao(saida, destino, custo, demanda)
-        # Adiciona conexão de um vértice y -> x
-        self.auxAddConexao(destino, saida, custo, demanda)
+        # Adiciona conexão de um vértice x -> y, que também vale como y -> x
+        self.auxAddConexao(saida, destino, custo, demanda, REQUERIDA if requerido else 0)
         if requerido:
             # Adiciona a aresta ao set de arestas requeridas. Ordena a tupla antes de adicionar para evitar repetição
             self.arestas_requeridas.add(tuple(sorted((saida, destino))))
+            self.servicos.append(
+                Servico(len(self.servicos) + 1, "E", saida, destino, demanda, custo, custo_servico)
+            )
 
     def imprimirGrafo(self):
         """
@@ -79,12 +176,21 @@ class Grafo:
         for i in range(1, self.numero_de_nos + 1):
             print(f"Vértice {i}: ")
             for j in self.lista_adj[i]:
-                print(f"-> {j["destino"]}")
+                print(f"-> {j['destino']}")
 
     def visualizarGrafo(self):
+        """
+        _Desenha o grafo em uma janela do matplotlib._
+        _networkx e matplotlib só são importados aqui, para que importar o módulo
+        (nos processos de um pool, por exemplo) não pague o custo dessas bibliotecas._
+        """
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
         G = nx.MultiDiGraph()
+        G.add_nodes_from(range(1, self.numero_de_nos + 1))
 
-        for i in range(1, self.numero_de_nos):
+        for i in range(1, self.numero_de_nos + 1):
             for j in self.lista_adj[i]:
                 G.add_edge(j["saida"], j["destino"])
 
@@ -96,163 +202,86 @@ class Grafo:
             font_size=12,
         )
 
-        plt.show()        
-        
+        plt.show()
 
-def ler_arquivo(arq: str):
+    def exportar(self, arq, formato=None, solucao=None):
+        """
+        _Grava o grafo em dot, graphml, geojson ou csv (ver exportacao.py)._
+        Args:
+            arq (str): Arquivo de saída; o formato vem da extensão se não for dado.
+            solucao (str, optional): Arquivo sol-*.dat cujas rotas são sobrepostas.
+        """
+        from exportacao import exportar
+
+        exportar(self, arq, formato, solucao)
+
+
+@cronometrado("leitura")
+def ler_arquivo(arq: str, usar_cache: bool = True, processos: int = None):
     """
     _Faz a leitura de um arquivo de teste e retorna o grafo resultante_
     Args:
         arq (str): caminho do arquivo de teste
+        usar_cache (bool, optional): Se o cache binário ao lado do arquivo deve ser usado. Defaults to True.
+        processos (int, optional): Processos usados no cálculo dos caminhos mínimos. Defaults to None.
     """
 
-    # Abre o arquivo
-    arquivo = open(arq, "r")
+    # Interpreta o arquivo em uma passada (ou abre o cache binário)
+    return grafo_da_instancia(carregar_instancia(arq, usar_cache), processos)
 
-    capacidade = 0
-    num_nos = 0
-    deposito = 0
 
-    # Faz a leitura do cabeçalho
-    num_nos, capacidade, deposito = ler_cabecalho(arquivo)
+def grafo_da_instancia(instancia, processos=None):
+    """
+    _Monta o grafo a partir de uma instância já interpretada (leitura.Instancia)._
+    Args:
+        instancia (Instancia): Retorno de carregar_instancia ou interpretar.
+        processos (int, optional): Processos usados no cálculo dos caminhos mínimos. Defaults to None.
+    """
 
     # Inicializa o grafo com o númeor de nós informado no cabeçalho
-    grafo = Grafo(num_nos, capacidade, deposito)
+    grafo = Grafo(instancia.num_nos, instancia.capacidade, instancia.deposito, processos)
 
-    # Faz a leirtura dos nós requeridos
-    ler_nos_requeridos(arquivo, grafo)
+    # Adiciona os nós requeridos
+    for noh, demanda, custo in instancia.nos_requeridos.tolist():
+        grafo.addNohRequerido(noh, demanda, custo)
 
-    # Faz a leitura das arestas requeridas
-    ler_arestas(arquivo, grafo, True)
+    # Adiciona as arestas requeridas. Percorrer a aresta custa o T. COST; o S. COST
+    # fica guardado no serviço
+    for inicio, destino, t_custo, demanda, s_custo in instancia.arestas_requeridas.tolist():
+        grafo.addAresta(inicio, destino, True, t_custo, demanda, s_custo)
 
-    # Lê as arestas não requeridas
-    ler_arestas(arquivo, grafo)
+    # Adiciona as arestas não requeridas
+    for inicio, destino, t_custo in instancia.arestas.tolist():
+        grafo.addAresta(inicio, destino, False, t_custo)
 
-    # Faz a leitura dos arcos requeridos
-    ler_arcos(arquivo, grafo, True)
+    # Adiciona os arcos requeridos
+    for inicio, destino, t_custo, demanda, s_custo in instancia.arcos_requeridos.tolist():
+        grafo.addArco(inicio, destino, True, t_custo, demanda, s_custo)
 
-    # Lê os arcos não requeridos
-    ler_arcos(arquivo, grafo)
-
-    # Fecha o arquivo
-    arquivo.close()
+    # Adiciona os arcos não requeridos
+    for inicio, destino, t_custo in instancia.arcos.tolist():
+        grafo.addArco(inicio, destino, False, t_custo)
 
+    grafo.hash_instancia = instancia.hash
     return grafo
 
 
-def ler_cabecalho(arquivo):
-    capacidade = 0
-    num_nos = 0
-    deposito = 0
-
-    linha = arquivo.readline()
-
-    # Faz a leitura do cabeçalho do arquivo e obtém o número de nós
-    while linha != "\n":
-        # Retira os espaços em branco da linha
-        linha = linha.strip()
-        if linha.startswith("#Nodes"):
-            # Pera o valor após o ':'(número de nós)
-            num_nos = int(linha.split(":")[1])
-        if linha.startswith("Capacity"):
-            # Pera o valor após o ':'(capacidade)
-            capacidade = int(linha.split(":")[1])
-        if linha.startswith("Depot"):
-            # Pera o valor após o ':'(número de nós)
-            deposito = int(linha.split(":")[1])
-        # Passa para a proxíma linha do arquivo
-        linha = arquivo.readline()
-
-    return num_nos, capacidade, deposito
-
-
-def ler_nos_requeridos(arquivo, grafo: Grafo):
-    # Lê os metadados
-    linha = arquivo.readline()
-    # Lê a primeira linha
-    linha = arquivo.readline()
-    # Faz a leitura dos nós requeridos
-    while linha != "\n":
-        linha = linha.strip()
-        # Usa uma expressão regex para separar e retornar o nó, demanda e custo de serviço
-        match = re.match(r"N(\d+)\t(\d+)\t(\d+)", linha)
-
-        noh_requerido = int(match.group(1))
-        demanda = int(match.group(2))
-        custo = int(match.group(3))
-
-        # Adciona o nó requerido
-        grafo.addNohRequerido(noh_requerido, demanda, custo)
-        linha = arquivo.readline()
-
-
-def ler_arestas(arquivo, grafo: Grafo, requerido: bool = False):
-    # Pega os metadados
-    linha = arquivo.readline().strip()
-
-    # Pega a primeira linha de arestas
-    linha = arquivo.readline()
-    while linha.startswith("E") or linha.startswith("N"):
-        linha = linha.strip()
-        partes = linha.split()
-
-        demanda = 0
-        s_custo = 0
-
-        if requerido:
-            _, inicio, destino, t_custo, demanda, s_custo = partes
-        else:
-            (
-                _,
-                inicio,
-                destino,
-                t_custo,
-            ) = partes
-
-        grafo.addAresta(
-            int(inicio),
-            int(destino),
-            requerido,
-            int(t_custo) + int(s_custo),
-            int(demanda),
-        )
-        linha = arquivo.readline()
-
-
-def ler_arcos(arquivo, grafo: Grafo, requerido: bool = False):
-    # Pega os metadados
-    linha = arquivo.readline().strip()
-
-    # Pega a primeira linha de arestas
-    linha = arquivo.readline()
-    while linha.startswith("A") or linha.startswith("N"):
-        linha = linha.strip()
-        partes = linha.split()
-
-        demanda = 0
-        s_custo = 0
-
-        if requerido:
-            _, inicio, destino, t_custo, demanda, s_custo = partes
-        else:
-            (
-                _,
-                inicio,
-                destino,
-                t_custo,
-            ) = partes
-
-        grafo.addArco(
-            int(inicio),
-            int(destino),
-            requerido,
-            int(t_custo) + int(s_custo),
-            int(demanda),
-        )
-
-        linha = arquivo.readline()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lê uma instância e imprime o grafo.")
+    parser.add_argument(
+        "instancia",
+        nargs="?",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Testes", "BHW1.dat"),
+        help="Arquivo .dat da instância (padrão: Testes/BHW1.dat)",
+    )
+    parser.add_argument("--visualizar", action="store_true", help="Desenha o grafo (requer networkx e matplotlib)")
+    args = parser.parse_args(argv)
 
+    grafo = ler_arquivo(args.instancia)
+    grafo.imprimirGrafo()
+    if args.visualizar:
+        grafo.visualizarGrafo()
 
-grafo = ler_arquivo(r"Trabalho\Grafos-\Testes\BHW1.dat")
-grafo.imprimirGrafo()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Ponto de entrada único da Fase 2:
+
+    python Fase_2 <comando> [argumentos]
+
+Comandos:
+    grafo        imprime (ou desenha) o grafo de uma instância
+    resolver     construção + busca local, grava um sol-*.dat
+    multistart   multi-start com limite de tempo em vários processos
+    validar      confere arquivos sol-*.dat contra as instâncias
+    limites      limites inferiores das instâncias
+    gerar        gera instâncias sintéticas (malhas viárias) de qualquer tamanho
+    split        compara o split linear com o quadrático
+    exportar     grava o grafo em dot, graphml, geojson ou csv
+    servidor     serviço local que resolve pedidos JSON com cache de instâncias
+
+Cada módulo só é importado quando o seu comando é usado.
+"""
+
+import importlib
+import sys
+
+COMANDOS = {
+    "grafo": "Grafo",
+    "resolver": "construtivo",
+    "multistart": "multistart",
+    "validar": "validador",
+    "limites": "limites",
+    "gerar": "gerador",
+    "split": "split",
+    "exportar": "exportacao",
+    "servidor": "servidor",
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMANDOS:
+        print(__doc__.strip(), file=sys.stderr)
+        return 0 if argv and argv[0] in ("-h", "--help") else 2
+    modulo = importlib.import_module(COMANDOS[argv[0]])
+    return modulo.main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Cache de avaliação de rotas: custo, carga e viabilidade de cada sequência de
+tarefas já avaliada, para que as mesmas rotas, que reaparecem entre partidas do
+multi-start e entre soluções vizinhas, não sejam somadas de novo.
+
+A chave é um hash de 64 bits no estilo Zobrist: cada tarefa (serviço em uma
+orientação, então o sentido de atendimento faz parte da chave) recebe um número
+aleatório, e a rota é combinada como um polinômio nesses números, para que a
+ordem importe. O hash é calculado a cada consulta, em O(tamanho da rota) como a
+própria avaliação, então o cache poupa as somas de custo e carga e serve para
+reconhecer partidas repetidas, não para avaliar vizinhos em O(1). Colisões têm
+probabilidade da ordem de 2^-64 por par de rotas e não são verificadas.
+"""
+
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+MASCARA = (1 << 64) - 1
+# Multiplicador ímpar (parte fracionária da razão áurea em 64 bits)
+MULTIPLICADOR = 0x9E3779B97F4A7C15
+# Memória aproximada de uma entrada do cache (chave, tupla e nó do OrderedDict)
+BYTES_POR_ENTRADA = 280
+# Rotas até este tamanho têm o hash calculado em Python; as maiores, com NumPy
+# (a aritmética de uint64 já é módulo 2^64)
+ROTA_CURTA = 16
+
+
+class Avaliacao(NamedTuple):
+    custo: int
+    carga: int
+    viavel: bool
+
+
+def estender(h, chave_tarefa):
+    """
+    Hash da rota com mais uma tarefa no fim.
+    """
+    return (h * MULTIPLICADOR + chave_tarefa) & MASCARA
+
+
+class CacheRotas:
+    """
+    Avaliações de rotas de uma TabelaServicos, com descarte LRU.
+    """
+
+    def __init__(self, tabela, capacidade, max_bytes=32 * 2**20, semente=0):
+        """
+        Args:
+            tabela (TabelaServicos): Tarefas e distâncias.
+            capacidade (int): Capacidade do veículo (decide a viabilidade).
+            max_bytes (int, optional): Memória aproximada máxima do cache.
+            semente (int, optional): Semente dos números de cada tarefa.
+        """
+        self.tabela = tabela
+        self.capacidade = capacidade
+        rng = np.random.default_rng(semente)
+        self._chaves = rng.integers(0, 1 << 64, size=len(tabela), dtype=np.uint64)
+        self.chaves = self._chaves.tolist()
+        # potencias[i] = MULTIPLICADOR^i mod 2^64, estendida sob demanda
+        self._potencias = np.ones(1, dtype=np.uint64)
+        self.max_entradas = max(1, max_bytes // BYTES_POR_ENTRADA)
+        self._entradas = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def hash_rota(self, rota):
+        if len(rota) <= ROTA_CURTA:
+            chaves = self.chaves
+            h = 0
+            for t in rota:
+                h = (h * MULTIPLICADOR + chaves[t]) & MASCARA
+            return h
+        # Soma de chave[t_i] · MULTIPLICADOR^(n-1-i), o mesmo polinômio do laço acima
+        if len(rota) > len(self._potencias):
+            self._estender_potencias(2 * len(rota))
+        return int(np.dot(self._chaves[rota], self._potencias[len(rota) - 1 :: -1]))
+
+    def _estender_potencias(self, tamanho):
+        potencias = [1] * tamanho
+        for i in range(1, tamanho):
+            potencias[i] = (potencias[i - 1] * MULTIPLICADOR) & MASCARA
+        self._potencias = np.array(potencias, dtype=np.uint64)
+
+    def avaliar(self, rota):
+        """
+        _Custo, carga e viabilidade de uma rota (lista de tarefas sem o depósito)._
+        Returns:
+            Avaliacao: Do cache, ou calculada e guardada.
+        """
+        h = self.hash_rota(rota)
+        entradas = self._entradas
+        avaliacao = entradas.get(h)
+        if avaliacao is not None:
+            entradas.move_to_end(h)
+            self.acertos += 1
+            return avaliacao
+
+        self.falhas += 1
+        carga = self.tabela.calcular_carga(rota)
+        avaliacao = Avaliacao(self.tabela.calcular_custo(rota), carga, carga <= self.capacidade)
+        entradas[h] = avaliacao
+        if len(entradas) > self.max_entradas:
+            entradas.popitem(last=False)
+            self.descartes += 1
+        return avaliacao
+
+    def hash_solucao(self, rotas):
+        """
+        Hash de um conjunto de rotas, sem depender da ordem delas.
+        """
+        h = 0
+        for rota in rotas:
+            h ^= estender(self.hash_rota(rota), len(rota))
+        return h
+
+    def limpar(self):
+        self._entradas.clear()
+
+    @property
+    def taxa_acertos(self):
+        consultas = self.acertos + self.falhas
+        return self.acertos / consultas if consultas else 0.0
+
+    def estatisticas(self):
+        return {
+            "entradas": len(self._entradas),
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "descartes": self.descartes,
+            "taxa_acertos": self.taxa_acertos,
+        }
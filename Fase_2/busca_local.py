@@ -0,0 +1,333 @@
+"""
+Busca local para melhorar soluções: relocate, swap, 2-opt* e inversão do
+sentido de atendimento de arestas requeridas.
+
+Cada movimento é avaliado em O(1) pela diferença de custo, usando a tabela de
+distâncias entre tarefas e, para o 2-opt*, os custos e cargas acumulados do
+início e do fim de cada rota. Só são testados pares de tarefas em que uma está
+entre as k mais próximas da outra (listas granulares), então uma passada
+completa custa O(k · tarefas) avaliações.
+"""
+
+import numpy as np
+
+from instrumentacao import cronometrado, instrumentacao
+from servicos import TabelaServicos
+from solucao import Solucao
+
+DEPOSITO = TabelaServicos.DEPOSITO
+
+
+class BuscaLocal:
+    def __init__(self, tabela, capacidade, k=10):
+        """
+        Args:
+            tabela (TabelaServicos): Tarefas e distâncias.
+            capacidade (int): Capacidade do veículo.
+            k (int, optional): Tamanho das listas granulares. Defaults to 10.
+        """
+        self.tabela = tabela
+        self.capacidade = capacidade
+        # Listas do Python são bem mais rápidas que NumPy para acessos individuais
+        self.D = tabela.distancias.tolist()
+        self.custo = tabela.custo.tolist()
+        self.demanda = tabela.demanda.tolist()
+        self.servico = tabela.servico.tolist()
+        self.inverso = tabela.inverso.tolist()
+        self.vizinhos = self._listas_granulares(k)
+        # Movimentos aplicados, por tipo
+        self.movimentos = {"relocate": 0, "swap": 0, "2-opt*": 0, "inversao": 0}
+
+    def _listas_granulares(self, k):
+        """
+        Para cada tarefa t, as k tarefas (de outros serviços) com menor
+        distância saindo de t.
+        """
+        distancias = self.tabela.distancias.astype(np.float64)
+        servico = self.tabela.servico
+        distancias[:, DEPOSITO] = np.inf
+        distancias[servico[:, None] == servico[None, :]] = np.inf
+
+        n = len(servico)
+        k = min(k, max(n - 2, 0))
+        vizinhos = [[] for _ in range(n)]
+        if k == 0:
+            return vizinhos
+        mais_proximos = np.argpartition(distancias[1:], k - 1, axis=1)[:, :k]
+        for t in range(1, n):
+            candidatos = mais_proximos[t - 1]
+            candidatos = candidatos[np.argsort(distancias[t, candidatos], kind="stable")]
+            vizinhos[t] = [int(u) for u in candidatos if distancias[t, u] < np.inf]
+        return vizinhos
+
+    # ----------------------------------------------------------------------
+    # Estado da solução
+    # ----------------------------------------------------------------------
+
+    def carregar(self, solucao):
+        self.rotas = [list(rota) for rota in solucao.rotas]
+        self.carga = [0] * len(self.rotas)
+        self.custo_rota = [0] * len(self.rotas)
+        self.prefixo_custo = [None] * len(self.rotas)
+        self.sufixo_custo = [None] * len(self.rotas)
+        self.prefixo_carga = [None] * len(self.rotas)
+        # Para cada serviço: tarefa usada, rota e posição
+        self.tarefa_atual = {}
+        self.local = {}
+        for r in range(len(self.rotas)):
+            self._atualizar_rota(r)
+
+    def _atualizar_rota(self, r):
+        """
+        Recalcula os acumulados e as posições da rota r (O(tamanho da rota)).
+        prefixo_custo[i]: custo do depósito até o fim da tarefa i (inclusive)
+        sufixo_custo[i]: custo do início da tarefa i até voltar ao depósito
+        """
+        D, custo, demanda = self.D, self.custo, self.demanda
+        rota = self.rotas[r]
+
+        prefixo_custo = []
+        prefixo_carga = []
+        acumulado = 0
+        carga = 0
+        anterior = DEPOSITO
+        for i, t in enumerate(rota):
+            acumulado += D[anterior][t] + custo[t]
+            carga += demanda[t]
+            prefixo_custo.append(acumulado)
+            prefixo_carga.append(carga)
+            anterior = t
+            s = self.servico[t]
+            self.tarefa_atual[s] = t
+            self.local[s] = (r, i)
+
+        sufixo_custo = [0] * len(rota)
+        proximo = DEPOSITO
+        acumulado = 0
+        for i in range(len(rota) - 1, -1, -1):
+            t = rota[i]
+            acumulado += custo[t] + D[t][proximo]
+            sufixo_custo[i] = acumulado
+            proximo = t
+
+        self.prefixo_custo[r] = prefixo_custo
+        self.sufixo_custo[r] = sufixo_custo
+        self.prefixo_carga[r] = prefixo_carga
+        self.carga[r] = carga
+        self.custo_rota[r] = prefixo_custo[-1] + D[rota[-1]][DEPOSITO] if rota else 0
+
+    def _vizinhos_na_rota(self, r, i):
+        rota = self.rotas[r]
+        anterior = rota[i - 1] if i > 0 else DEPOSITO
+        proximo = rota[i + 1] if i + 1 < len(rota) else DEPOSITO
+        return anterior, proximo
+
+    def _orientacoes(self, t):
+        inverso = self.inverso[t]
+        return (t,) if inverso == t else (t, inverso)
+
+    @property
+    def custo_total(self):
+        return sum(self.custo_rota)
+
+    def solucao(self):
+        return Solucao(self.tabela, [rota for rota in self.rotas if rota])
+
+    # ----------------------------------------------------------------------
+    # Movimentos: cada um retorna True se aplicou uma melhora
+    # ----------------------------------------------------------------------
+
+    def _relocate(self, s, y, p, q, rb):
+        """
+        Move o serviço s para a rota rb, entre as tarefas p e q (ou o depósito),
+        atendendo-o como a tarefa y.
+        """
+        D, custo = self.D, self.custo
+        x = self.tarefa_atual[s]
+        ra, i = self.local[s]
+        pa, na = self._vizinhos_na_rota(ra, i)
+
+        if ra != rb and self.carga[rb] + self.demanda[x] > self.capacidade:
+            return False
+
+        # Na rota sem s, os vizinhos de s passam a ser adjacentes
+        if q == x:
+            q = na
+        if p == x:
+            p = pa
+        if p == pa and q == na and ra == rb:
+            if y == x:
+                return False
+
+        ganho_remocao = D[pa][x] + custo[x] + D[x][na] - D[pa][na]
+        custo_insercao = D[p][y] + custo[y] + D[y][q] - D[p][q]
+        if custo_insercao - ganho_remocao >= 0:
+            return False
+
+        # Posição de p pelo mapa de locais, descontando a remoção de s da mesma rota
+        if p == DEPOSITO:
+            posicao = 0
+        else:
+            posicao = self.local[self.servico[p]][1] + 1
+            if ra == rb and posicao > i:
+                posicao -= 1
+        del self.rotas[ra][i]
+        self.rotas[rb].insert(posicao, y)
+        self._atualizar_rota(ra)
+        if rb != ra:
+            self._atualizar_rota(rb)
+        self.movimentos["relocate"] += 1
+        return True
+
+    def _swap(self, s1, y1, s2, y2):
+        """
+        Troca os serviços s1 e s2 de lugar, s1 atendido como y1 e s2 como y2.
+        """
+        D, custo, demanda = self.D, self.custo, self.demanda
+        x1, x2 = self.tarefa_atual[s1], self.tarefa_atual[s2]
+        r1, i1 = self.local[s1]
+        r2, i2 = self.local[s2]
+        if r1 == r2 and abs(i1 - i2) <= 1:
+            # Vizinhos na mesma rota: equivale a um relocate
+            return False
+        if r1 != r2:
+            diferenca = demanda[x2] - demanda[x1]
+            if self.carga[r1] + diferenca > self.capacidade or self.carga[r2] - diferenca > self.capacidade:
+                return False
+
+        p1, n1 = self._vizinhos_na_rota(r1, i1)
+        p2, n2 = self._vizinhos_na_rota(r2, i2)
+        delta = (
+            D[p1][y2] + custo[y2] + D[y2][n1] - D[p1][x1] - custo[x1] - D[x1][n1]
+            + D[p2][y1] + custo[y1] + D[y1][n2] - D[p2][x2] - custo[x2] - D[x2][n2]
+        )
+        if delta >= 0:
+            return False
+
+        self.rotas[r1][i1] = y2
+        self.rotas[r2][i2] = y1
+        self._atualizar_rota(r1)
+        if r2 != r1:
+            self._atualizar_rota(r2)
+        self.movimentos["swap"] += 1
+        return True
+
+    def _dois_opt_estrela(self, ra, i, rb, j):
+        """
+        Liga o trecho inicial de ra (até a posição i) ao trecho final de rb (a
+        partir da posição j), e o início de rb (antes de j) ao restante de ra.
+        """
+        D = self.D
+        rota_a, rota_b = self.rotas[ra], self.rotas[rb]
+        x = rota_a[i]
+        inicio_b = self.prefixo_custo[rb][j - 1] if j > 0 else 0
+        ultimo_b = rota_b[j - 1] if j > 0 else DEPOSITO
+        carga_inicio_b = self.prefixo_carga[rb][j - 1] if j > 0 else 0
+
+        carga_nova_a = self.prefixo_carga[ra][i] + self.carga[rb] - carga_inicio_b
+        carga_nova_b = carga_inicio_b + self.carga[ra] - self.prefixo_carga[ra][i]
+        if carga_nova_a > self.capacidade or carga_nova_b > self.capacidade:
+            return False
+
+        nova_a = self.prefixo_custo[ra][i] + (
+            D[x][rota_b[j]] + self.sufixo_custo[rb][j] if j < len(rota_b) else D[x][DEPOSITO]
+        )
+        if i + 1 < len(rota_a):
+            nova_b = inicio_b + D[ultimo_b][rota_a[i + 1]] + self.sufixo_custo[ra][i + 1]
+        else:
+            nova_b = inicio_b + D[ultimo_b][DEPOSITO] if j > 0 else 0
+
+        if nova_a + nova_b - self.custo_rota[ra] - self.custo_rota[rb] >= 0:
+            return False
+
+        self.rotas[ra], self.rotas[rb] = rota_a[: i + 1] + rota_b[j:], rota_b[:j] + rota_a[i + 1 :]
+        self._atualizar_rota(ra)
+        self._atualizar_rota(rb)
+        self.movimentos["2-opt*"] += 1
+        return True
+
+    def _inverter(self, s):
+        """
+        Inverte o sentido de atendimento de uma aresta requerida.
+        """
+        D = self.D
+        x = self.tarefa_atual[s]
+        y = self.inverso[x]
+        if y == x:
+            return False
+        r, i = self.local[s]
+        p, n = self._vizinhos_na_rota(r, i)
+        if D[p][y] + D[y][n] - D[p][x] - D[x][n] >= 0:
+            return False
+        self.rotas[r][i] = y
+        self._atualizar_rota(r)
+        self.movimentos["inversao"] += 1
+        return True
+
+    def _testar_par(self, t, u):
+        """
+        Testa os movimentos que deixam a tarefa u logo depois da tarefa t.
+        """
+        st, su = self.servico[t], self.servico[u]
+        xt, xu = self.tarefa_atual[st], self.tarefa_atual[su]
+        rt, it = self.local[st]
+        ru, iu = self.local[su]
+
+        if xt == t:
+            # Relocate de su para logo depois de t
+            _, depois_t = self._vizinhos_na_rota(rt, it)
+            if self._relocate(su, u, t, depois_t, rt):
+                return True
+            # Swap: su ocupa o lugar do sucessor de t
+            if depois_t != DEPOSITO and depois_t != xu:
+                s_depois = self.servico[depois_t]
+                for y in self._orientacoes(depois_t):
+                    if self._swap(s_depois, y, su, u):
+                        return True
+            # 2-opt*: t seguido por u, trocando as caudas das duas rotas
+            if xu == u and ru != rt and self._dois_opt_estrela(rt, it, ru, iu):
+                return True
+
+        if xu == u:
+            # Relocate de st para logo antes de u
+            antes_u, _ = self._vizinhos_na_rota(ru, iu)
+            if self._relocate(st, t, antes_u, u, ru):
+                return True
+
+        return False
+
+    # ----------------------------------------------------------------------
+
+    @cronometrado("busca_local")
+    def otimizar(self, solucao, max_passadas=None, rng=None):
+        """
+        _Aplica movimentos de melhora até não haver mais nenhum na vizinhança granular._
+        Args:
+            solucao (Solucao): Solução inicial (não é alterada).
+            max_passadas (int, optional): Limite de passadas pela vizinhança.
+            rng (np.random.Generator, optional): Se informado, embaralha a ordem das tarefas.
+        Returns:
+            Solucao: Solução melhorada.
+        """
+        self.carregar(solucao)
+        aplicados = dict(self.movimentos)
+        tarefas = list(range(1, len(self.tabela)))
+        passadas = 0
+        melhorou = True
+        while melhorou and (max_passadas is None or passadas < max_passadas):
+            melhorou = False
+            passadas += 1
+            if rng is not None:
+                rng.shuffle(tarefas)
+            for t in tarefas:
+                for u in self.vizinhos[t]:
+                    if self._testar_par(t, u):
+                        melhorou = True
+            for s in list(self.tarefa_atual):
+                if self._inverter(s):
+                    melhorou = True
+
+        instrumentacao.contar("passadas", passadas)
+        for tipo, quantidade in self.movimentos.items():
+            instrumentacao.contar(tipo, quantidade - aplicados[tipo])
+        return self.solucao()
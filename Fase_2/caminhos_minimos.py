@@ -0,0 +1,670 @@
+import heapq
+import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from instrumentacao import instrumentacao
+
+# Valor usado como "infinito" nas matrizes inteiras. É metade do maior valor
+# representável para que a soma de dois infinitos não estoure o tipo.
+INF_INT32 = np.iinfo(np.int32).max // 2
+INF_INT64 = np.iinfo(np.int64).max // 2
+
+# Marca de "sem predecessor" na matriz de predecessores (equivale ao None).
+SEM_PREDECESSOR = -1
+
+# Custo aproximado, em ns, de cada passo das duas implementações (medido nas
+# instâncias de Testes): o Floyd-Warshall com NumPy faz n³ passos e os Dijkstras
+# em Python fazem n · (E + n) · log2(n).
+NS_FLOYD_WARSHALL = 1.5
+NS_DIJKSTRA = 25.0
+# Lado dos blocos do Floyd-Warshall em blocos: as cópias e a matriz temporária
+# de um bloco (int32) ficam em ~64 KiB cada, dentro do cache L2. Com 64 e 256
+# os blocos ficaram mais lentos (n = 1000)
+TAMANHO_BLOCO = 128
+
+
+def infinito(dist):
+    """
+    Retorna o valor que representa distância infinita para o tipo da matriz.
+    """
+    if dist.dtype == np.int32:
+        return INF_INT32
+    if dist.dtype == np.int64:
+        return INF_INT64
+    return np.inf
+
+
+def escolher_tipo(custos):
+    """
+    Escolhe o menor tipo numérico capaz de guardar qualquer caminho do grafo.
+    Custos inteiros usam int32 quando a soma de todos eles (limite superior de
+    qualquer caminho simples) cabe abaixo do infinito de int32, senão int64.
+    Custos fracionários usam float64 com np.inf.
+    """
+    custos = np.asarray(custos)
+    if custos.size == 0:
+        return np.int32
+    if not np.issubdtype(custos.dtype, np.integer):
+        if not np.all(np.floor(custos) == custos):
+            return np.float64
+    total = int(np.abs(custos).astype(np.float64).sum())
+    if total < INF_INT32:
+        return np.int32
+    return np.int64
+
+
+def matrizes_iniciais(n, origens, destinos, custos):
+    """
+    Monta as matrizes iniciais de distâncias e predecessores.
+    Entre conexões paralelas (arestas e arcos ligando o mesmo par) fica a de
+    menor custo, como na versão com listas.
+    """
+    origens = np.asarray(origens, dtype=np.intp)
+    destinos = np.asarray(destinos, dtype=np.intp)
+    tipo = escolher_tipo(custos)
+
+    dist = np.full((n, n), infinito(np.empty(0, dtype=tipo)), dtype=tipo)
+    pred = np.full((n, n), SEM_PREDECESSOR, dtype=np.int32)
+
+    # Custo zero para i == j
+    diagonal = np.arange(n)
+    dist[diagonal, diagonal] = 0
+
+    # Custo mínimo entre conexões paralelas. Como a diagonal já vale zero,
+    # laços (u, u) nunca a alteram, igual à comparação estrita original.
+    np.minimum.at(dist, (origens, destinos), np.asarray(custos, dtype=tipo))
+    pred[origens, destinos] = origens
+    pred[diagonal, diagonal] = diagonal
+
+    return dist, pred
+
+
+def floyd_warshall(n, origens, destinos, custos):
+    """
+    Calcula as matrizes de distâncias e predecessores com o algoritmo de
+    Floyd-Warshall, relaxando uma linha inteira por vez com NumPy:
+    dist = minimum(dist, dist[:, k, None] + dist[k, None, :]).
+
+    Retorna (dist, pred), onde dist é int32/int64 (ou float64 para custos
+    fracionários) e pred é int32 com SEM_PREDECESSOR onde não há caminho.
+    """
+    dist, pred = matrizes_iniciais(n, origens, destinos, custos)
+    via = np.empty_like(dist)
+    melhora = np.empty((n, n), dtype=bool)
+
+    for k in range(n):
+        # A linha e a coluna k não mudam na iteração k (dist[k][k] == 0),
+        # então podem ser usadas diretamente como no laço triplo.
+        np.add(dist[:, k, None], dist[None, k, :], out=via)
+        np.less(via, dist, out=melhora)
+        np.copyto(dist, via, where=melhora)
+        np.copyto(pred, pred[k, None, :], where=melhora)
+
+    return dist, pred
+
+
+def converter(dist, tipo):
+    """
+    Converte a matriz de distâncias para outro tipo, mantendo o "infinito" de
+    cada tipo onde não há caminho.
+    """
+    novo = dist.astype(tipo)
+    novo[dist >= infinito(dist)] = infinito(novo)
+    return novo
+
+
+def inserir_conexao(dist, pred, u, v, custo):
+    """
+    _Atualiza as matrizes depois de inserir a conexão u -> v (ou de baixar o
+    custo dela) em O(n²), sem refazer o Floyd-Warshall._
+    O único caminho novo entre i e j é i ~> u -> v ~> j, então basta
+    dist[i][j] = min(dist[i][j], dist[i][u] + custo + dist[v][j]), feito de uma
+    vez para todas as linhas que alcançam u e colunas alcançadas por v. A linha
+    v e a coluna u não mudam (custos não negativos), então podem ser lidas
+    enquanto as matrizes são alteradas. Empates mantêm o predecessor antigo.
+    Args:
+        dist (np.ndarray): Matriz de distâncias válida, alterada no lugar.
+        pred (np.ndarray): Matriz de predecessores correspondente, alterada no lugar.
+        u (int): Origem da conexão.
+        v (int): Destino da conexão.
+        custo (int | float): Custo da conexão.
+    Returns:
+        tuple[np.ndarray, np.ndarray, bool]: (dist, pred, mudou). dist só é uma
+        nova matriz se precisar de um tipo maior (custo fracionário ou caminhos
+        que não cabem mais em int32).
+    """
+    if custo >= dist[u, v]:
+        # Qualquer caminho pela conexão custaria pelo menos dist[i][u] + dist[u][v] + dist[v][j]
+        return dist, pred, False
+
+    inteiro = np.issubdtype(dist.dtype, np.integer)
+    if inteiro and not float(custo).is_integer():
+        dist = converter(dist, np.float64)
+        inteiro = False
+
+    inf = infinito(dist)
+    linhas = np.flatnonzero(dist[:, u] < inf)
+    colunas = np.flatnonzero(dist[v, :] < inf)
+    # Soma em 64 bits para não estourar int32 antes da comparação
+    largo = np.int64 if inteiro else np.float64
+    via = dist[linhas, u].astype(largo)[:, None] + (dist[v, colunas].astype(largo) + custo)[None, :]
+    if inteiro and via.max() >= inf:
+        dist = converter(dist, np.int64)
+
+    bloco = np.ix_(linhas, colunas)
+    atual = dist[bloco]
+    melhora = via < atual
+    # Predecessor de j no caminho novo: o mesmo do caminho v ~> j, ou u quando j == v
+    novo_pred = pred[v, colunas].copy()
+    novo_pred[colunas == v] = u
+
+    dist[bloco] = np.where(melhora, via, atual)
+    pred[bloco] = np.where(melhora, novo_pred[None, :], pred[bloco])
+    return dist, pred, True
+
+
+def inserir_conexoes(dist, pred, origens, destinos, custos):
+    """
+    _Aplica várias inserções (ou reduções de custo) em uma passada._
+    Conexões repetidas ficam só com o menor custo e as que não encurtam nenhum
+    caminho no momento em que são aplicadas custam apenas uma comparação.
+    Returns:
+        tuple[np.ndarray, np.ndarray, int]: (dist, pred, conexões que mudaram algo).
+    """
+    menores = {}
+    for u, v, custo in zip(np.asarray(origens).tolist(), np.asarray(destinos).tolist(), np.asarray(custos).tolist()):
+        if (u, v) not in menores or custo < menores[u, v]:
+            menores[u, v] = custo
+
+    mudaram = 0
+    for (u, v), custo in menores.items():
+        dist, pred, mudou = inserir_conexao(dist, pred, u, v, custo)
+        mudaram += mudou
+    return dist, pred, mudaram
+
+
+def adjacencia_minima(n, origens, destinos, custos):
+    """
+    Monta uma lista de adjacência [(vizinho, custo), ...] por vértice, mantendo
+    apenas a conexão de menor custo entre conexões paralelas. Assim duas arestas
+    paralelas de mesmo custo não contam como dois caminhos mínimos diferentes.
+    """
+    menores = [dict() for _ in range(n)]
+    origens, destinos, custos = (np.asarray(x).tolist() for x in (origens, destinos, custos))
+    for u, v, c in zip(origens, destinos, custos):
+        if u == v:
+            continue
+        if v not in menores[u] or c < menores[u][v]:
+            menores[u][v] = c
+    return [list(vizinhos.items()) for vizinhos in menores]
+
+
+def _dijkstra(n, adjacencia, s, inf):
+    """
+    Dijkstra com heap a partir de s. Além das distâncias, calcula para cada v
+    o menor "maior vértice intermediário" entre todos os caminhos mínimos de s
+    a v (-1 quando a conexão direta já é mínima), que é o que decide qual
+    caminho o Floyd-Warshall escolhe em caso de empate (ver dijkstra_todos).
+    Supõe custos positivos, para que toda conexão justa (dist[u] + c == dist[v])
+    saia de um vértice finalizado antes de v. Vértices não alcançados ficam com inf.
+    """
+    dist = [inf] * n
+    maior = [-1] * n
+    finalizado = [False] * n
+    dist[s] = 0
+    heap = [(0, s)]
+    extrair, inserir = heapq.heappop, heapq.heappush
+
+    while heap:
+        d, u = extrair(heap)
+        if finalizado[u]:
+            continue
+        finalizado[u] = True
+        via = -1 if u == s else (maior[u] if maior[u] > u else u)
+        for v, c in adjacencia[u]:
+            nova = d + c
+            atual = dist[v]
+            if nova < atual:
+                dist[v] = nova
+                maior[v] = via
+                inserir(heap, (nova, v))
+            elif nova == atual and via < maior[v]:
+                maior[v] = via
+    return dist, maior
+
+
+def _dijkstra_lote(argumentos):
+    n, adjacencia, fontes, inf = argumentos
+    return [(s, *_dijkstra(n, adjacencia, s, inf)) for s in fontes]
+
+
+def dijkstra_todos(n, origens, destinos, custos, processos=None):
+    """
+    _Caminhos mínimos entre todos os pares com um Dijkstra (heap) por origem,
+    em O(V · (E + V) log V): bem mais barato que o Floyd-Warshall em grafos esparsos._
+    Retorna as mesmas matrizes (dist, pred) do floyd_warshall, inclusive nos
+    empates. O Floyd-Warshall só troca um caminho por um estritamente menor,
+    então para o par (i, j) ele fica com o caminho mínimo cujo maior vértice
+    intermediário k é o menor possível, e pred[i][j] = pred[k][j] (ou i, se a
+    conexão direta for mínima). O Dijkstra calcula esse k para cada par e os
+    predecessores são resolvidos seguindo essa cadeia no final.
+    Args:
+        processos (int, optional): Se maior que 1, as origens são divididas entre
+            processos de um ProcessPoolExecutor.
+    """
+    adjacencia = adjacencia_minima(n, origens, destinos, custos)
+    tipo = escolher_tipo(custos)
+    inf = infinito(np.empty(0, dtype=tipo))
+    inf = float(inf) if np.issubdtype(tipo, np.floating) else int(inf)
+    dist = np.empty((n, n), dtype=tipo)
+    maior = np.empty((n, n), dtype=np.int32)
+
+    if not processos or processos <= 1 or n < 2:
+        linhas = _dijkstra_lote((n, adjacencia, range(n), inf))
+    else:
+        # Origens intercaladas para equilibrar o trabalho entre os processos
+        lotes = [(n, adjacencia, range(i, n, processos), inf) for i in range(processos)]
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            linhas = [linha for lote in executor.map(_dijkstra_lote, lotes) for linha in lote]
+
+    for s, distancias, maiores in linhas:
+        dist[s] = distancias
+        maior[s] = maiores
+    return dist, predecessores(dist, maior)
+
+
+def predecessores(dist, maior):
+    """
+    Monta a matriz pred a partir de maior[i][j], o maior vértice intermediário
+    do caminho mínimo de i a j escolhido pelo Floyd-Warshall (-1 se a conexão
+    direta é mínima).
+    """
+    n = len(dist)
+    alcancado = dist < infinito(dist)
+
+    # pred[i][j] = i onde a conexão direta é mínima; nos demais pares segue
+    # i -> maior[i][j] -> maior[maior[i][j]][j] ... até chegar nesse caso
+    pred = np.where(alcancado, np.arange(n, dtype=np.int32)[:, None], SEM_PREDECESSOR).astype(np.int32)
+    linhas_pendentes, colunas = np.nonzero(alcancado & (maior >= 0))
+    vertice = maior[linhas_pendentes, colunas]
+    while len(vertice):
+        proximo = maior[vertice, colunas]
+        fim = proximo < 0
+        pred[linhas_pendentes[fim], colunas[fim]] = vertice[fim]
+        linhas_pendentes, colunas, vertice = linhas_pendentes[~fim], colunas[~fim], proximo[~fim]
+    return pred
+
+
+def _relaxar_bloco(dist, maior, I, J, K):
+    """
+    Relaxa o bloco (I, J) pelos vértices de K, um por vez. Cada candidato é o
+    par (distância, maior intermediário) e só substitui o atual se for
+    lexicograficamente menor, então o resultado não depende da ordem dos blocos.
+    """
+    d = dist[I, J]
+    m = maior[I, J]
+    for k in range(K.start, K.stop):
+        via = dist[I, k, None] + dist[None, k, J]
+        maior_via = np.maximum(np.maximum(maior[I, k, None], maior[None, k, J]), k)
+        melhora = (via < d) | ((via == d) & (maior_via < m))
+        np.copyto(d, via, where=melhora)
+        np.copyto(m, maior_via, where=melhora)
+
+
+def _relaxar_bloco_fechado(dist, maior, I, J, K):
+    """
+    Relaxa o bloco (I, J), fora da linha e da coluna de K, pelos vértices de K
+    de uma vez, como um produto min-plus. Os blocos (I, K) e (K, J) já foram
+    fechados por K, então os trechos de cada lado de todo caminho novo já
+    estão em dist[I, K] e dist[K, J].
+    Os blocos diagonais são processados em ordem crescente, então o maior
+    intermediário atual de cada par é menor que K.start e nenhum empate por K
+    o melhora: basta o min-plus em dist, e maior só é calculado nos pares que
+    melhoram, com o menor maior intermediário entre os k que atingem o mínimo.
+    """
+    d = dist[I, J]
+    # Cópias contíguas: as fatias de dist pulam n elementos a cada linha, o que
+    # deixa o laço abaixo mais de duas vezes mais lento
+    ate_k = np.ascontiguousarray(dist[I, K].T)
+    desde_k = np.ascontiguousarray(dist[K, J])
+    minimo = ate_k[0, :, None] + desde_k[None, 0, :]
+    via = np.empty_like(minimo)
+    for x in range(1, K.stop - K.start):
+        np.add(ate_k[x, :, None], desde_k[None, x, :], out=via)
+        np.minimum(minimo, via, out=minimo)
+
+    linhas, colunas = np.nonzero(minimo < d)
+    if not len(linhas):
+        return
+    novo = minimo[linhas, colunas]
+    # Os k de K que atingem o mínimo de cada par que melhora (x, par)
+    x, par = np.nonzero(ate_k[:, linhas] + desde_k[:, colunas] == novo)
+    maior_via = np.maximum(np.maximum(maior[I, K][linhas[par], x], maior[K, J][x, colunas[par]]), x + K.start)
+    menor = np.full(len(linhas), np.iinfo(np.int32).max, dtype=np.int32)
+    np.minimum.at(menor, par, maior_via)
+    d[linhas, colunas] = novo
+    maior[I, J][linhas, colunas] = menor
+
+
+# Matrizes em memória compartilhada vistas por cada processo do Floyd-Warshall em blocos
+_compartilhadas = {}
+
+
+def _anexar_matrizes(nome_dist, nome_maior, n, tipo):
+    for chave, nome, dtype in (("dist", nome_dist, tipo), ("maior", nome_maior, np.int32)):
+        memoria = shared_memory.SharedMemory(name=nome)
+        _compartilhadas[chave + "_memoria"] = memoria
+        _compartilhadas[chave] = np.ndarray((n, n), dtype=dtype, buffer=memoria.buf)
+
+
+def _relaxar_blocos(dist, maior, blocos, K):
+    """
+    Relaxa uma lista de blocos ((i0, i1), (j0, j1)) pelos vértices K = (k0, k1).
+    """
+    for I, J in blocos:
+        relaxar = _relaxar_bloco if K in (I, J) else _relaxar_bloco_fechado
+        relaxar(dist, maior, slice(*I), slice(*J), slice(*K))
+
+
+def _tarefa_blocos(argumentos):
+    _relaxar_blocos(_compartilhadas["dist"], _compartilhadas["maior"], *argumentos)
+
+
+def floyd_warshall_blocado(n, origens, destinos, custos, processos=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    _Floyd-Warshall em blocos (tiled), com os blocos independentes de cada fase
+    divididos entre processos._
+    Para cada bloco diagonal K: primeiro o próprio bloco (K, K), depois os
+    blocos da linha e da coluna de K (que só dependem dele) e por fim todos os
+    demais (que só dependem da linha e da coluna). As matrizes ficam em
+    multiprocessing.shared_memory, e os processos recebem só os índices dos blocos.
+    Como cada bloco carrega o maior vértice intermediário de cada caminho e
+    desempata por ele, dist e pred são idênticas às do floyd_warshall. Na fase
+    3, que concentra o trabalho, cada bloco é um produto min-plus só em dist
+    (ver _relaxar_bloco_fechado); ainda assim, em um processo só os blocos
+    custam cerca de 15% a mais que o floyd_warshall, que é usado no lugar.
+    Args:
+        processos (int, optional): Se maior que 1, as fases 2 e 3 de cada bloco
+            diagonal são divididas entre processos de um ProcessPoolExecutor.
+            Com um processo só, usa o floyd_warshall.
+        tamanho_bloco (int, optional): Lado dos blocos. Defaults to TAMANHO_BLOCO.
+    """
+    tipo = escolher_tipo(custos)
+    limites = [(i, min(i + tamanho_bloco, n)) for i in range(0, n, tamanho_bloco)]
+    # Com somas fracionárias a ordem das somas muda os arredondamentos, e sem
+    # processos para dividir os blocos o floyd_warshall é mais rápido
+    if np.issubdtype(tipo, np.floating) or not processos or processos <= 1 or len(limites) < 2:
+        return floyd_warshall(n, origens, destinos, custos)
+    inicial, _ = matrizes_iniciais(n, origens, destinos, custos)
+
+    def fases(K):
+        linha_coluna = [(K, J) for J in limites if J != K] + [(I, K) for I in limites if I != K]
+        # Na fase 3 cada tarefa é uma linha de blocos
+        restantes = [[(I, J) for J in limites if J != K] for I in limites if I != K]
+        return [[K, K]], [[bloco] for bloco in linha_coluna], restantes
+
+    memorias = [shared_memory.SharedMemory(create=True, size=max(1, n * n * np.dtype(t).itemsize)) for t in (tipo, np.int32)]
+    try:
+        dist = np.ndarray((n, n), dtype=tipo, buffer=memorias[0].buf)
+        maior = np.ndarray((n, n), dtype=np.int32, buffer=memorias[1].buf)
+        dist[...] = inicial
+        maior[...] = -1
+        del inicial
+        with ProcessPoolExecutor(
+            max_workers=processos,
+            initializer=_anexar_matrizes,
+            initargs=(memorias[0].name, memorias[1].name, n, tipo),
+        ) as executor:
+            for K in limites:
+                diagonal, linha_coluna, restantes = fases(K)
+                # O bloco diagonal é pequeno: feito aqui mesmo, sem ida e volta
+                _relaxar_blocos(dist, maior, diagonal, K)
+                list(executor.map(_tarefa_blocos, [(tarefa, K) for tarefa in linha_coluna]))
+                list(executor.map(_tarefa_blocos, [(tarefa, K) for tarefa in restantes]))
+        resultado = dist.copy(), predecessores(dist, maior)
+        del dist, maior
+        return resultado
+    finally:
+        for memoria in memorias:
+            memoria.close()
+            memoria.unlink()
+
+
+def escolher_metodo(n, num_conexoes, custos, processos=None):
+    """
+    Escolhe entre "dijkstra" e "floyd_warshall" pelo custo estimado de cada um
+    (ver NS_FLOYD_WARSHALL e NS_DIJKSTRA). Com algum custo zero ou negativo usa
+    sempre o Floyd-Warshall, já que o Dijkstra supõe custos positivos.
+    O "floyd_warshall_blocado" só é usado quando pedido explicitamente.
+    """
+    custos = np.asarray(custos)
+    if n < 2 or (custos.size and custos.min() <= 0):
+        return "floyd_warshall"
+    floyd = NS_FLOYD_WARSHALL * float(n) ** 3
+    dijkstra = NS_DIJKSTRA * n * (num_conexoes + n) * math.log2(n) / max(processos or 1, 1)
+    return "dijkstra" if dijkstra < floyd else "floyd_warshall"
+
+
+def calcular_caminhos_minimos(n, origens, destinos, custos, metodo="auto", processos=None):
+    """
+    _Matrizes (dist, pred) de caminhos mínimos entre todos os pares._
+    Args:
+        metodo (str, optional): "floyd_warshall", "floyd_warshall_blocado",
+            "dijkstra" ou "auto" (escolhe entre "dijkstra" e "floyd_warshall"
+            pela densidade e pelo tamanho do grafo). Defaults to "auto".
+        processos (int, optional): Processos usados pelos Dijkstras ou pelos
+            blocos do Floyd-Warshall.
+    """
+    if metodo == "auto":
+        metodo = escolher_metodo(n, len(origens), custos, processos)
+    if metodo == "dijkstra":
+        return dijkstra_todos(n, origens, destinos, custos, processos)
+    if metodo == "floyd_warshall":
+        return floyd_warshall(n, origens, destinos, custos)
+    if metodo == "floyd_warshall_blocado":
+        return floyd_warshall_blocado(n, origens, destinos, custos, processos)
+    raise ValueError(f"método de caminhos mínimos desconhecido: {metodo}")
+
+
+def para_listas(dist, pred):
+    """
+    Converte as matrizes NumPy para o formato de listas usado originalmente:
+    math.inf onde não há caminho e None onde não há predecessor.
+    """
+    inf = infinito(dist)
+    dist_lista = [
+        [math.inf if d >= inf else d for d in linha] for linha in dist.tolist()
+    ]
+    pred_lista = [
+        [None if p == SEM_PREDECESSOR else p for p in linha] for linha in pred.tolist()
+    ]
+    return dist_lista, pred_lista
+
+
+class OraculoDistancias:
+    """
+    Guarda as matrizes de caminhos mínimos de um grafo para que todas as
+    métricas (e roteadores) leiam do mesmo cálculo.
+    A matriz só é recalculada depois de invalidar() ser chamado. Quando o grafo
+    ganha uma conexão (ou uma conexão fica mais barata), inserir() atualiza as
+    matrizes já calculadas em O(n²); outras alterações as invalidam.
+    """
+
+    def __init__(self, conexoes, metodo="auto", processos=None):
+        """
+        Args:
+            conexoes (callable): Função sem argumentos que retorna
+                (n, origens, destinos, custos) do grafo atual.
+            metodo (str, optional): Algoritmo usado (ver calcular_caminhos_minimos).
+            processos (int, optional): Processos usados pelos Dijkstras.
+        """
+        self.conexoes = conexoes
+        self.metodo = metodo
+        self.processos = processos
+        self.dist = None
+        self.pred = None
+        # Quantas vezes a matriz foi de fato calculada e quantas foi atualizada
+        # incrementalmente (útil para depuração)
+        self.calculos = 0
+        self.atualizacoes = 0
+
+    @property
+    def valido(self):
+        return self.dist is not None
+
+    def invalidar(self):
+        self.dist = None
+        self.pred = None
+
+    def inserir(self, u, v, custo, dirigida=True):
+        """
+        _Atualiza as matrizes depois de o grafo ganhar a conexão u -> v (ou de o
+        custo dela baixar)._
+        Se as matrizes ainda não foram calculadas não há nada a fazer; senão
+        elas são atualizadas em O(n²) em vez de descartadas.
+        Args:
+            dirigida (bool, optional): Se False, também atualiza v -> u. Defaults to True.
+        """
+        if self.dist is None:
+            return
+        self.dist, self.pred, _ = inserir_conexao(self.dist, self.pred, u, v, custo)
+        if not dirigida:
+            self.dist, self.pred, _ = inserir_conexao(self.dist, self.pred, v, u, custo)
+        self.atualizacoes += 1
+
+    def inserir_lote(self, origens, destinos, custos):
+        """
+        _Como inserir(), para várias conexões dirigidas (arestas entram nos dois sentidos)._
+        Cada inserção custa O(n²) e um Floyd-Warshall completo O(n³), então a
+        partir de n / 2 conexões é mais barato descartar as matrizes e
+        recalculá-las quando forem pedidas.
+        """
+        if self.dist is None:
+            return
+        if len(origens) >= len(self.dist) // 2:
+            self.invalidar()
+            return
+        self.dist, self.pred, _ = inserir_conexoes(self.dist, self.pred, origens, destinos, custos)
+        self.atualizacoes += 1
+
+    def matrizes(self):
+        """
+        Retorna (dist, pred) calculando-as apenas se o cache estiver inválido.
+        """
+        if self.dist is None:
+            with instrumentacao.fase("caminhos_minimos"):
+                self.dist, self.pred = calcular_caminhos_minimos(
+                    *self.conexoes(), metodo=self.metodo, processos=self.processos
+                )
+            self.calculos += 1
+        return self.dist, self.pred
+
+    def distancia(self, u, v):
+        dist, _ = self.matrizes()
+        return dist[u, v]
+
+
+class OraculoSobDemanda:
+    """
+    Distâncias calculadas só quando pedidas: cada consulta dist(u, v) precisa da
+    linha de u, obtida com um Dijkstra a partir de u e guardada em um cache LRU
+    limitado em número de linhas ou em bytes. Serve para grafos grandes demais
+    para a matriz n × n, quando as consultas se concentram em poucos nós
+    (pontas dos serviços e depósito).
+    Assim como o OraculoDistancias, deve ser invalidado quando o grafo muda.
+    """
+
+    def __init__(self, conexoes, max_linhas=None, max_bytes=64 * 2**20):
+        """
+        Args:
+            conexoes (callable): Função sem argumentos que retorna
+                (n, origens, destinos, custos) do grafo atual.
+            max_linhas (int, optional): Máximo de linhas guardadas.
+            max_bytes (int, optional): Máximo de bytes ocupados pelas linhas
+                guardadas. Defaults to 64 MiB. Valem os dois limites.
+        """
+        self.conexoes = conexoes
+        self.max_linhas = max_linhas
+        self.max_bytes = max_bytes
+        self.linhas = OrderedDict()
+        self.adjacencia = None
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def invalidar(self):
+        self.linhas.clear()
+        self.adjacencia = None
+
+    def _preparar(self):
+        n, origens, destinos, custos = self.conexoes()
+        self.n = n
+        self.adjacencia = adjacencia_minima(n, origens, destinos, custos)
+        self.tipo = escolher_tipo(custos)
+        inf = infinito(np.empty(0, dtype=self.tipo))
+        self.inf = float(inf) if np.issubdtype(self.tipo, np.floating) else int(inf)
+
+    @property
+    def capacidade(self):
+        """
+        Quantas linhas cabem nos limites configurados (pelo menos uma).
+        """
+        if self.adjacencia is None:
+            self._preparar()
+        limite = self.max_linhas if self.max_linhas is not None else self.n
+        if self.max_bytes is not None:
+            limite = min(limite, self.max_bytes // (self.n * np.dtype(self.tipo).itemsize))
+        return max(int(limite), 1)
+
+    def linha(self, u):
+        """
+        _Distâncias de u para todos os nós (np.ndarray, com o infinito do tipo onde não há caminho)._
+        """
+        if self.adjacencia is None:
+            self._preparar()
+        linha = self.linhas.get(u)
+        if linha is not None:
+            self.acertos += 1
+            self.linhas.move_to_end(u)
+            return linha
+
+        self.falhas += 1
+        distancias, _ = _dijkstra(self.n, self.adjacencia, u, self.inf)
+        linha = np.array(distancias, dtype=self.tipo)
+        capacidade = self.capacidade
+        while len(self.linhas) >= capacidade:
+            self.linhas.popitem(last=False)
+            self.descartes += 1
+        self.linhas[u] = linha
+        return linha
+
+    def distancia(self, u, v):
+        return self.linha(u)[v]
+
+    def submatriz(self, origens, destinos):
+        """
+        _Matriz dist[origens][destinos], calculando uma linha por origem distinta._
+        """
+        origens = np.asarray(origens)
+        destinos = np.asarray(destinos)
+        if self.adjacencia is None:
+            self._preparar()
+        resultado = np.empty((len(origens), len(destinos)), dtype=self.tipo)
+        for u in np.unique(origens).tolist():
+            resultado[origens == u] = self.linha(u)[destinos]
+        return resultado
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "descartes": self.descartes,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "linhas": len(self.linhas),
+            "bytes": sum(linha.nbytes for linha in self.linhas.values()),
+        }
@@ -0,0 +1,104 @@
+class ConjuntosDisjuntos:
+    """
+    Estrutura union-find com compressão de caminho e união por posto.
+    Mantém o número de componentes atualizado a cada união, então a contagem
+    fica disponível em O(1) e cada operação custa O(α(n)) amortizado.
+    """
+
+    def __init__(self, n):
+        self.pai = list(range(n))
+        self.posto = [0] * n
+        self.quantidade = n
+
+    def encontrar(self, x):
+        raiz = x
+        while self.pai[raiz] != raiz:
+            raiz = self.pai[raiz]
+        # Compressão de caminho: aponta todos os nós visitados para a raiz
+        while self.pai[x] != raiz:
+            self.pai[x], x = raiz, self.pai[x]
+        return raiz
+
+    def unir(self, x, y):
+        """
+        Une os conjuntos de x e y. Retorna True se eles eram diferentes.
+        """
+        rx = self.encontrar(x)
+        ry = self.encontrar(y)
+        if rx == ry:
+            return False
+        if self.posto[rx] < self.posto[ry]:
+            rx, ry = ry, rx
+        self.pai[ry] = rx
+        if self.posto[rx] == self.posto[ry]:
+            self.posto[rx] += 1
+        self.quantidade -= 1
+        return True
+
+    def conectados(self, x, y):
+        return self.encontrar(x) == self.encontrar(y)
+
+
+def componentes_fortemente_conexos(n, sucessores):
+    """
+    Algoritmo de Tarjan em versão iterativa (sem recursão, então funciona em
+    grafos com milhares de vértices sem estourar a pilha do Python).
+
+    Args:
+        n (int): Número de vértices (0 .. n-1).
+        sucessores (callable): Função que recebe u e retorna os vizinhos de saída de u.
+    Returns:
+        list[list[int]]: Componentes em ordem topológica reversa.
+    """
+    indice = [-1] * n
+    menor = [0] * n
+    na_pilha = [False] * n
+    pilha = []
+    componentes = []
+    contador = 0
+
+    for raiz in range(n):
+        if indice[raiz] != -1:
+            continue
+
+        # Cada quadro guarda o vértice e o iterador dos seus vizinhos
+        indice[raiz] = menor[raiz] = contador
+        contador += 1
+        pilha.append(raiz)
+        na_pilha[raiz] = True
+        chamadas = [(raiz, iter(sucessores(raiz)))]
+
+        while chamadas:
+            u, vizinhos = chamadas[-1]
+            avancou = False
+            for v in vizinhos:
+                if indice[v] == -1:
+                    indice[v] = menor[v] = contador
+                    contador += 1
+                    pilha.append(v)
+                    na_pilha[v] = True
+                    chamadas.append((v, iter(sucessores(v))))
+                    avancou = True
+                    break
+                if na_pilha[v] and indice[v] < menor[u]:
+                    menor[u] = indice[v]
+            if avancou:
+                continue
+
+            # Todos os vizinhos de u foram visitados
+            chamadas.pop()
+            if chamadas:
+                pai = chamadas[-1][0]
+                if menor[u] < menor[pai]:
+                    menor[pai] = menor[u]
+            if menor[u] == indice[u]:
+                componente = []
+                while True:
+                    w = pilha.pop()
+                    na_pilha[w] = False
+                    componente.append(w)
+                    if w == u:
+                        break
+                componentes.append(componente)
+
+    return componentes
@@ -0,0 +1,199 @@
+import argparse
+import sys
+
+import numpy as np
+
+from busca_local import BuscaLocal
+from Grafo import ler_arquivo
+from instrumentacao import cronometrado, instrumentacao
+from servicos import TabelaServicos
+from solucao import Solucao, escrever_solucao, formatar_solucao
+
+# Regras de desempate do path-scanning (Golden, DeArmon e Baker, 1983)
+REGRAS = (
+    "distancia_max",  # maximiza a distância do fim da tarefa até o depósito
+    "distancia_min",  # minimiza a distância do fim da tarefa até o depósito
+    "razao_max",  # maximiza demanda / custo
+    "razao_min",  # minimiza demanda / custo
+    "meia_capacidade",  # distancia_max até metade da capacidade, depois distancia_min
+)
+
+
+def desempatar(tabela, empatadas, regra, carga, capacidade, rng=None):
+    """
+    Escolhe uma tarefa entre as que estão à mesma (menor) distância da posição atual.
+    """
+    if len(empatadas) == 1:
+        return int(empatadas[0])
+    if rng is not None:
+        return int(rng.choice(empatadas))
+
+    if regra == "meia_capacidade":
+        regra = "distancia_max" if carga < capacidade / 2 else "distancia_min"
+
+    if regra.startswith("distancia"):
+        criterio = tabela.distancias[empatadas, TabelaServicos.DEPOSITO]
+    else:
+        criterio = tabela.demanda[empatadas] / np.maximum(tabela.custo[empatadas], 1)
+
+    if regra.endswith("_max"):
+        return int(empatadas[np.argmax(criterio)])
+    return int(empatadas[np.argmin(criterio)])
+
+
+def path_scanning(tabela, capacidade, regra="distancia_max", rng=None):
+    """
+    _Constrói rotas estendendo sempre a rota atual com a tarefa pendente mais
+    próxima que ainda cabe no veículo._
+    Args:
+        tabela (TabelaServicos): Tarefas e distâncias pré-calculadas.
+        capacidade (int): Capacidade do veículo.
+        regra (str, optional): Regra de desempate (ver REGRAS). Defaults to "distancia_max".
+        rng (np.random.Generator, optional): Se informado, os empates são sorteados.
+    """
+    distancias = tabela.distancias
+    demanda = tabela.demanda
+    pendentes = np.ones(len(tabela), dtype=bool)
+    pendentes[TabelaServicos.DEPOSITO] = False
+
+    if demanda.max(initial=0) > capacidade:
+        raise ValueError("há serviço com demanda maior que a capacidade do veículo")
+
+    rotas = []
+    while pendentes.any():
+        rota = []
+        carga = 0
+        atual = TabelaServicos.DEPOSITO
+        while True:
+            candidatas = np.flatnonzero(pendentes & (demanda <= capacidade - carga))
+            if len(candidatas) == 0:
+                break
+            d = distancias[atual, candidatas]
+            empatadas = candidatas[d == d.min()]
+            tarefa = desempatar(tabela, empatadas, regra, carga, capacidade, rng)
+
+            rota.append(tarefa)
+            carga += int(demanda[tarefa])
+            atual = tarefa
+            # Atender uma orientação da aresta atende o serviço
+            pendentes[tarefa] = False
+            pendentes[tabela.inverso[tarefa]] = False
+        rotas.append(rota)
+
+    return Solucao(tabela, rotas)
+
+
+def insercao_mais_barata(tabela, capacidade):
+    """
+    _Insere os serviços, do mais distante ao mais próximo do depósito, na posição
+    (e orientação) de menor acréscimo de custo entre as rotas que ainda têm
+    capacidade, abrindo uma nova rota quando nenhuma comporta o serviço._
+    """
+    distancias = tabela.distancias
+    deposito = TabelaServicos.DEPOSITO
+
+    tarefas_por_servico = {}
+    for tarefa in range(1, len(tabela)):
+        tarefas_por_servico.setdefault(int(tabela.servico[tarefa]), []).append(tarefa)
+
+    def distancia_deposito(tarefas):
+        return min(distancias[deposito, t] for t in tarefas)
+
+    ordem = sorted(tarefas_por_servico.values(), key=distancia_deposito, reverse=True)
+
+    rotas = []
+    cargas = []
+    for tarefas in ordem:
+        demanda = int(tabela.demanda[tarefas[0]])
+        tarefas = np.array(tarefas)
+
+        # Abrir uma nova rota só com o serviço
+        custos_novos = distancias[deposito, tarefas] + tabela.custo[tarefas] + distancias[tarefas, deposito]
+        k = int(np.argmin(custos_novos))
+        melhor = (custos_novos[k], None, 0, int(tarefas[k]))
+
+        for r, rota in enumerate(rotas):
+            if cargas[r] + demanda > capacidade:
+                continue
+            anteriores = np.array([deposito, *rota])
+            proximos = np.array([*rota, deposito])
+            base = distancias[anteriores, proximos]
+            for tarefa in tarefas:
+                acrescimo = (
+                    distancias[anteriores, tarefa]
+                    + tabela.custo[tarefa]
+                    + distancias[tarefa, proximos]
+                    - base
+                )
+                posicao = int(np.argmin(acrescimo))
+                if acrescimo[posicao] < melhor[0]:
+                    melhor = (acrescimo[posicao], r, posicao, int(tarefa))
+
+        _, r, posicao, tarefa = melhor
+        if r is None:
+            rotas.append([tarefa])
+            cargas.append(demanda)
+        else:
+            rotas[r].insert(posicao, tarefa)
+            cargas[r] += demanda
+
+    return Solucao(tabela, rotas)
+
+
+@cronometrado("construcao")
+def construir(tabela, capacidade):
+    """
+    Executa o path-scanning com todas as regras de desempate e a inserção mais
+    barata, retornando a melhor solução encontrada.
+    """
+    candidatas = [path_scanning(tabela, capacidade, regra) for regra in REGRAS]
+    candidatas.append(insercao_mais_barata(tabela, capacidade))
+    return min(candidatas, key=lambda solucao: solucao.custo)
+
+
+def resolver(grafo, melhorar=True):
+    """
+    Monta a tabela de distâncias entre serviços do grafo e constrói uma solução,
+    aplicando a busca local em seguida se melhorar=True.
+    """
+    return resolver_tabela(TabelaServicos.do_grafo(grafo), grafo.capacidade, melhorar)
+
+
+def resolver_tabela(tabela, capacidade, melhorar=True):
+    """
+    Como resolver, mas a partir de uma tabela de serviços já montada.
+    """
+    solucao = construir(tabela, capacidade)
+    instrumentacao.registrar_custo(solucao.custo)
+    if melhorar:
+        solucao = BuscaLocal(tabela, capacidade).otimizar(solucao)
+        instrumentacao.registrar_custo(solucao.custo)
+    return solucao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constrói uma solução para uma instância.")
+    parser.add_argument("instancia", help="Arquivo .dat da instância")
+    parser.add_argument("-s", "--saida", default=None, help="Arquivo sol-*.dat (padrão: saída padrão)")
+    parser.add_argument("--sem-busca-local", action="store_true", help="Só a fase construtiva")
+    parser.add_argument("-p", "--processos", type=int, default=None, help="Processos para os caminhos mínimos (padrão: um só)")
+    parser.add_argument("--perfil", nargs="?", const="-", default=None, help="Mostra o tempo de cada fase (na saída de erro, ou no arquivo JSON informado)")
+    args = parser.parse_args(argv)
+
+    instrumentacao.ligar()
+    solucao = resolver(ler_arquivo(args.instancia, processos=args.processos), melhorar=not args.sem_busca_local)
+    clocks = instrumentacao.clocks()
+
+    if args.saida:
+        escrever_solucao(args.saida, solucao, clocks, instrumentacao.clocks_melhor)
+    else:
+        print(formatar_solucao(solucao, clocks, instrumentacao.clocks_melhor), end="")
+
+    if args.perfil == "-":
+        print(instrumentacao.formatar_perfil(), file=sys.stderr)
+    elif args.perfil:
+        instrumentacao.salvar_perfil(args.perfil)
+
+
+if __name__ == "__main__":
+    main()
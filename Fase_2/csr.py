@@ -0,0 +1,244 @@
+from array import array
+
+import numpy as np
+
+# Bits do vetor de flags de cada conexão
+REQUERIDA = 1
+DIRIGIDA = 2
+
+
+class ListaAdjacenciaCSR:
+    """
+    Lista de adjacência compacta no formato CSR (compressed sparse row).
+
+    As conexões são guardadas uma única vez, na ordem de inserção, em vetores
+    tipados (array). Na primeira leitura depois de uma alteração, os vetores são
+    compactados em CSR com NumPy: as saídas do vértice u ficam em
+    dest[indptr[u]:indptr[u + 1]], assim como custo, demanda e flags.
+    Arestas não dirigidas (sem o bit DIRIGIDA) aparecem nas linhas das duas
+    pontas, logo depois da posição em que apareceriam se fossem inseridas duas vezes.
+    """
+
+    def __init__(self, num_linhas):
+        self.num_linhas = num_linhas
+        # Conexões na ordem de inserção
+        self._origem = array("i")
+        self._destino = array("i")
+        self._custo = array("q")
+        self._demanda = array("q")
+        self._flags = array("B")
+        # Vetores CSR, montados sob demanda
+        self._csr = None
+
+    def __len__(self):
+        return self.num_linhas
+
+    @property
+    def num_conexoes(self):
+        return len(self._origem)
+
+    def adicionar(self, u, v, custo, demanda=0, flags=0):
+        """
+        Adiciona a conexão u -> v (ou u - v, se flags não tiver DIRIGIDA).
+        Custos fracionários promovem o vetor de custos para float.
+        Returns:
+            int: Índice da conexão na ordem de inserção.
+        """
+        if self._custo.typecode == "q":
+            if isinstance(custo, float) and not custo.is_integer():
+                self._custo = array("d", self._custo)
+            else:
+                custo = int(custo)
+        self._origem.append(u)
+        self._destino.append(v)
+        self._custo.append(custo)
+        self._demanda.append(demanda)
+        self._flags.append(flags)
+        self._csr = None
+        return len(self._origem) - 1
+
+    def encontrar(self, u, v):
+        """
+        Índices (ordem de inserção) das conexões que levam de u a v: arcos u -> v
+        e arestas u - v guardadas em qualquer um dos sentidos.
+        """
+        origem = np.frombuffer(self._origem, dtype=np.int32)
+        destino = np.frombuffer(self._destino, dtype=np.int32)
+        nao_dirigida = (np.frombuffer(self._flags, dtype=np.uint8) & DIRIGIDA) == 0
+        direta = (origem == u) & (destino == v)
+        inversa = nao_dirigida & (origem == v) & (destino == u)
+        return np.flatnonzero(direta | inversa)
+
+    def conexao_original(self, indice):
+        """
+        (origem, destino, custo, demanda, flags) da conexão de índice indice.
+        """
+        return (
+            self._origem[indice],
+            self._destino[indice],
+            self._custo[indice],
+            self._demanda[indice],
+            self._flags[indice],
+        )
+
+    def alterar_custo(self, indice, custo):
+        """
+        Troca o custo da conexão de índice indice (ordem de inserção).
+        Returns:
+            int | float: O custo anterior.
+        """
+        if self._custo.typecode == "q":
+            if isinstance(custo, float) and not custo.is_integer():
+                self._custo = array("d", self._custo)
+            else:
+                custo = int(custo)
+        anterior = self._custo[indice]
+        self._custo[indice] = custo
+        self._csr = None
+        return anterior
+
+    def conexoes_originais(self):
+        """
+        Retorna (origem, destino, custo, demanda, flags) na ordem de inserção,
+        com cada aresta não dirigida aparecendo uma só vez.
+        """
+        return (
+            np.array(self._origem, dtype=np.int32),
+            np.array(self._destino, dtype=np.int32),
+            np.array(self._custo),
+            np.array(self._demanda, dtype=np.int64),
+            np.array(self._flags, dtype=np.uint8),
+        )
+
+    def _compactar(self):
+        origem, destino, custo, demanda, flags = self.conexoes_originais()
+        m = len(origem)
+
+        # Espelha as arestas não dirigidas
+        espelhadas = np.flatnonzero((flags & DIRIGIDA) == 0)
+        saidas = np.concatenate((origem, destino[espelhadas]))
+        chegadas = np.concatenate((destino, origem[espelhadas]))
+        conexao = np.concatenate((np.arange(m), espelhadas))
+        # A cópia espelhada vem logo após a original, como se fosse inserida em seguida
+        ordem_insercao = np.concatenate((2 * np.arange(m), 2 * espelhadas + 1))
+
+        permutacao = np.lexsort((ordem_insercao, saidas))
+        conexao = conexao[permutacao]
+
+        indptr = np.zeros(self.num_linhas + 1, dtype=np.int64)
+        np.cumsum(np.bincount(saidas, minlength=self.num_linhas), out=indptr[1:])
+
+        self._csr = {
+            "indptr": indptr,
+            "dest": chegadas[permutacao],
+            "custo": custo[conexao],
+            "demanda": demanda[conexao],
+            "flags": flags[conexao],
+            "conexao": conexao,
+        }
+
+    def _vetor(self, nome):
+        if self._csr is None:
+            self._compactar()
+        return self._csr[nome]
+
+    @property
+    def indptr(self):
+        return self._vetor("indptr")
+
+    @property
+    def dest(self):
+        return self._vetor("dest")
+
+    @property
+    def custo(self):
+        return self._vetor("custo")
+
+    @property
+    def demanda(self):
+        return self._vetor("demanda")
+
+    @property
+    def flags(self):
+        return self._vetor("flags")
+
+    @property
+    def conexao(self):
+        """
+        Para cada posição do CSR, o índice da conexão original (ordem de inserção).
+        """
+        return self._vetor("conexao")
+
+    def origens(self):
+        """
+        Vértice de saída de cada posição do CSR.
+        """
+        indptr = self.indptr
+        return np.repeat(np.arange(self.num_linhas, dtype=np.int32), np.diff(indptr))
+
+    def graus(self):
+        return np.diff(self.indptr)
+
+    def vizinhos(self, u):
+        indptr = self.indptr
+        return self.dest[indptr[u] : indptr[u + 1]]
+
+    def visao(self, montar):
+        """
+        Visão somente leitura no estilo lista_adj[u] -> sequência de dicionários.
+        Os dicionários são montados sob demanda por montar(u, destino, custo, demanda, flags).
+        """
+        return VisaoListaAdj(self, montar)
+
+
+class VisaoListaAdj:
+    def __init__(self, csr, montar):
+        self.csr = csr
+        self.montar = montar
+
+    def __len__(self):
+        return len(self.csr)
+
+    def __getitem__(self, u):
+        if u < 0:
+            u += len(self.csr)
+        if not 0 <= u < len(self.csr):
+            raise IndexError(u)
+        return VisaoVertice(self.csr, u, self.montar)
+
+    def __iter__(self):
+        for u in range(len(self.csr)):
+            yield VisaoVertice(self.csr, u, self.montar)
+
+
+class VisaoVertice:
+    def __init__(self, csr, u, montar):
+        self.csr = csr
+        self.u = u
+        self.montar = montar
+        self.inicio = int(csr.indptr[u])
+        self.fim = int(csr.indptr[u + 1])
+
+    def __len__(self):
+        return self.fim - self.inicio
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._montar(self.inicio + i)
+
+    def __iter__(self):
+        for posicao in range(self.inicio, self.fim):
+            yield self._montar(posicao)
+
+    def _montar(self, posicao):
+        csr = self.csr
+        return self.montar(
+            self.u,
+            csr.dest[posicao].item(),
+            csr.custo[posicao].item(),
+            csr.demanda[posicao].item(),
+            int(csr.flags[posicao]),
+        )
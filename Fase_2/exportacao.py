@@ -0,0 +1,290 @@
+"""
+Exporta o grafo de uma instância para arquivos, sem montar um grafo do
+networkx: as conexões são lidas direto dos vetores da lista CSR e escritas uma
+a uma. Formatos:
+
+    dot       Graphviz (pode ser renderizado com dot/sfdp)
+    graphml   GraphML, para Gephi, yEd, networkx.read_graphml...
+    geojson   FeatureCollection com um Feature por nó e por ligação; as
+              instâncias não têm coordenadas, então geometry é null
+    csv       lista de ligações
+
+Nós requeridos, arestas/arcos requeridos e o depósito são destacados, e as
+rotas de um arquivo sol-*.dat podem ser sobrepostas (cada serviço recebe o
+número da rota que o atende). Exemplo:
+
+    python exportacao.py ../Testes/BHW1.dat -o bhw1.dot -s G0/sol-BHW1.dat --renderizar bhw1.svg
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+from xml.sax.saxutils import escape, quoteattr
+
+from csr import DIRIGIDA, REQUERIDA
+
+FORMATOS = ("dot", "graphml", "geojson", "csv")
+
+# Cores das rotas sobrepostas (repetidas de forma cíclica)
+PALETA = (
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+)
+COR_REQUERIDA = "#d62728"
+COR_DEPOSITO = "#ffd700"
+COR_NO_REQUERIDO = "#add8e6"
+
+
+def rotas_da_solucao(arq_solucao):
+    """
+    _Lê um sol-*.dat e diz qual rota atende cada serviço._
+    Returns:
+        dict: (tipo, u, v) -> número da rota, com tipo "N" para nós e "L" para
+        ligações; arestas aparecem nos dois sentidos.
+    """
+    from validador import ler_solucao
+
+    rotas = {}
+    for rota in ler_solucao(arq_solucao).rotas:
+        for visita in rota.visitas:
+            if visita.tipo != "S":
+                continue
+            if visita.origem == visita.destino:
+                rotas[("N", visita.origem, visita.origem)] = rota.numero
+            else:
+                rotas[("L", visita.origem, visita.destino)] = rota.numero
+                rotas.setdefault(("L", visita.destino, visita.origem), rota.numero)
+    return rotas
+
+
+def _nos(grafo, rotas):
+    """
+    (nó, requerido, depósito, demanda, rota) para cada nó de 1 a numero_de_nos.
+    """
+    demandas = {noh: demanda for noh, demanda, _ in grafo.nos_requeridos}
+    for noh in range(1, grafo.numero_de_nos + 1):
+        yield (
+            noh,
+            noh in demandas,
+            noh == grafo.deposito,
+            demandas.get(noh, 0),
+            rotas.get(("N", noh, noh)),
+        )
+
+
+def _ligacoes(grafo, rotas):
+    """
+    (u, v, custo, demanda, requerida, dirigida, rota) para cada aresta/arco, na
+    ordem de inserção e com cada aresta uma única vez.
+    """
+    origem, destino, custo, demanda, flags = grafo.adjacencia.conexoes_originais()
+    for u, v, c, d, f in zip(
+        origem.tolist(), destino.tolist(), custo.tolist(), demanda.tolist(), flags.tolist()
+    ):
+        requerida = bool(f & REQUERIDA)
+        rota = rotas.get(("L", u, v)) if requerida else None
+        yield u, v, c, d, requerida, bool(f & DIRIGIDA), rota
+
+
+def escrever_dot(grafo, f, rotas, nome="G"):
+    f.write(f"digraph {json.dumps(nome)} {{\n")
+    f.write("  graph [overlap=false, outputorder=edgesfirst];\n")
+    f.write('  node [shape=circle, style=filled, fillcolor="white", fontsize=10];\n')
+    for noh, requerido, deposito, demanda, rota in _nos(grafo, rotas):
+        atributos = []
+        if deposito:
+            atributos += ["shape=doublecircle", f'fillcolor="{COR_DEPOSITO}"']
+        elif requerido:
+            atributos.append(f'fillcolor="{COR_NO_REQUERIDO}"')
+        if rota is not None:
+            atributos += [f'color="{PALETA[(rota - 1) % len(PALETA)]}"', "penwidth=3"]
+        f.write(f"  {noh}" + (f" [{', '.join(atributos)}]" if atributos else "") + ";\n")
+    for u, v, custo, demanda, requerida, dirigida, rota in _ligacoes(grafo, rotas):
+        atributos = [f'label="{custo}"']
+        if not dirigida:
+            atributos.append("dir=none")
+        if rota is not None:
+            atributos += [f'color="{PALETA[(rota - 1) % len(PALETA)]}"', "penwidth=3", f'xlabel="r{rota}"']
+        elif requerida:
+            atributos += [f'color="{COR_REQUERIDA}"', "penwidth=2"]
+        f.write(f"  {u} -> {v} [{', '.join(atributos)}];\n")
+    f.write("}\n")
+
+
+def escrever_graphml(grafo, f, rotas, nome="G"):
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    for chave, dominio, tipo in (
+        ("requerido", "node", "boolean"),
+        ("deposito", "node", "boolean"),
+        ("demanda", "all", "long"),
+        ("rota", "all", "int"),
+        ("custo", "edge", "double"),
+        ("requerida", "edge", "boolean"),
+        ("dirigida", "edge", "boolean"),
+    ):
+        f.write(f'  <key id="{chave}" for="{dominio}" attr.name="{chave}" attr.type="{tipo}"/>\n')
+    # Grafo misto: tudo fica dirigido e a chave dirigida diz quais ligações são
+    # arestas (o atributo directed por ligação não é aceito por várias ferramentas)
+    f.write(f'  <graph id={quoteattr(nome)} edgedefault="directed">\n')
+
+    def dados(valores):
+        return "".join(
+            f'<data key="{chave}">{escape(str(valor).lower() if isinstance(valor, bool) else str(valor))}</data>'
+            for chave, valor in valores
+            if valor is not None
+        )
+
+    for noh, requerido, deposito, demanda, rota in _nos(grafo, rotas):
+        valores = (("requerido", requerido), ("deposito", deposito), ("demanda", demanda), ("rota", rota))
+        f.write(f'    <node id="{noh}">{dados(valores)}</node>\n')
+    for i, (u, v, custo, demanda, requerida, dirigida, rota) in enumerate(_ligacoes(grafo, rotas)):
+        valores = (("custo", custo), ("demanda", demanda), ("requerida", requerida), ("dirigida", dirigida), ("rota", rota))
+        f.write(f'    <edge id="e{i}" source="{u}" target="{v}">{dados(valores)}</edge>\n')
+    f.write("  </graph>\n</graphml>\n")
+
+
+def escrever_geojson(grafo, f, rotas, nome="G"):
+    f.write('{"type": "FeatureCollection", "name": ' + json.dumps(nome) + ', "features": [\n')
+    primeiro = True
+
+    def feature(propriedades):
+        nonlocal primeiro
+        f.write(("" if primeiro else ",\n") + json.dumps({"type": "Feature", "geometry": None, "properties": propriedades}))
+        primeiro = False
+
+    for noh, requerido, deposito, demanda, rota in _nos(grafo, rotas):
+        feature({"tipo": "no", "id": noh, "requerido": requerido, "deposito": deposito, "demanda": demanda, "rota": rota})
+    for u, v, custo, demanda, requerida, dirigida, rota in _ligacoes(grafo, rotas):
+        feature({
+            "tipo": "arco" if dirigida else "aresta",
+            "origem": u,
+            "destino": v,
+            "custo": custo,
+            "demanda": demanda,
+            "requerida": requerida,
+            "rota": rota,
+        })
+    f.write("\n]}\n")
+
+
+def escrever_csv(grafo, f, rotas, nome="G"):
+    f.write("origem,destino,custo,demanda,requerida,dirigida,rota\n")
+    for u, v, custo, demanda, requerida, dirigida, rota in _ligacoes(grafo, rotas):
+        f.write(f"{u},{v},{custo},{demanda},{int(requerida)},{int(dirigida)},{'' if rota is None else rota}\n")
+
+
+ESCRITORES = {
+    "dot": escrever_dot,
+    "graphml": escrever_graphml,
+    "geojson": escrever_geojson,
+    "csv": escrever_csv,
+}
+
+
+def exportar(grafo, arq, formato=None, solucao=None, nome=None):
+    """
+    _Grava o grafo em arq._
+    Args:
+        grafo (Grafo): Grafo da Fase 2.
+        arq (str): Arquivo de saída.
+        formato (str, optional): Um de FORMATOS; se omitido, vem da extensão de arq.
+        solucao (str, optional): Arquivo sol-*.dat cujas rotas são sobrepostas.
+        nome (str, optional): Nome do grafo no arquivo.
+    """
+    formato = formato or os.path.splitext(arq)[1].lstrip(".").lower()
+    if formato == "gv":
+        formato = "dot"
+    if formato not in ESCRITORES:
+        raise ValueError(f"formato desconhecido: {formato} (use um de {', '.join(FORMATOS)})")
+    rotas = rotas_da_solucao(solucao) if solucao else {}
+    with open(arq, "w", encoding="utf-8") as f:
+        ESCRITORES[formato](grafo, f, rotas, nome or os.path.splitext(os.path.basename(arq))[0])
+
+
+def _renderizar_matplotlib(arq_dot, saida):
+    """
+    Renderização de reserva, sem Graphviz: lê os nós e ligações do .dot escrito
+    por escrever_dot e desenha com o backend Agg (sem janela) do matplotlib.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    grafo = nx.MultiDiGraph()
+    with open(arq_dot, encoding="utf-8") as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) >= 3 and partes[1] == "->":
+                grafo.add_edge(partes[0], partes[2])
+            elif partes and partes[0].rstrip(";").isdigit():
+                grafo.add_node(partes[0].rstrip(";"))
+    posicoes = nx.spring_layout(grafo, seed=0)
+    tamanho = max(8, len(grafo) ** 0.5)
+    plt.figure(figsize=(tamanho, tamanho))
+    nx.draw(grafo, posicoes, node_size=60, width=0.5, arrowsize=5, with_labels=len(grafo) <= 200, font_size=6)
+    plt.savefig(saida, dpi=150)
+    plt.close()
+
+
+def renderizar(arq_dot, saida, programa=None):
+    """
+    _Renderiza um .dot para imagem (svg, png, pdf...) em segundo plano, sem janela._
+    Usa o Graphviz se estiver instalado (sfdp para grafos grandes, dot para os
+    pequenos); senão usa matplotlib + networkx em outro interpretador Python.
+    Returns:
+        subprocess.Popen: O processo iniciado; chame wait() para esperar a imagem.
+    """
+    formato = os.path.splitext(saida)[1].lstrip(".") or "svg"
+    if programa is None:
+        with open(arq_dot, encoding="utf-8") as f:
+            ligacoes = sum(1 for linha in f if "->" in linha)
+        programa = "sfdp" if ligacoes > 500 and shutil.which("sfdp") else "dot"
+    executavel = shutil.which(programa)
+    if executavel:
+        return subprocess.Popen(
+            [executavel, f"-T{formato}", "-o", saida, arq_dot],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    # O processo de reserva importa este módulo pela pasta dele
+    codigo = (
+        "import sys; sys.path.insert(0, sys.argv[1]); "
+        "from exportacao import _renderizar_matplotlib; _renderizar_matplotlib(sys.argv[2], sys.argv[3])"
+    )
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.Popen([sys.executable, "-c", codigo, pasta, arq_dot, saida])
+
+
+def main(argv=None):
+    from Grafo import ler_arquivo
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("instancia", help="Arquivo .dat da instância")
+    parser.add_argument("-o", "--saida", required=True, help="Arquivo de saída (.dot, .graphml, .geojson ou .csv)")
+    parser.add_argument("-f", "--formato", choices=FORMATOS, help="Formato (padrão: extensão da saída)")
+    parser.add_argument("-s", "--solucao", help="Arquivo sol-*.dat com as rotas a sobrepor")
+    parser.add_argument("--renderizar", metavar="IMAGEM", help="Também gera uma imagem (svg, png...) a partir do .dot")
+    args = parser.parse_args(argv)
+
+    grafo = ler_arquivo(args.instancia)
+    nome = os.path.splitext(os.path.basename(args.instancia))[0]
+    exportar(grafo, args.saida, args.formato, args.solucao, nome)
+
+    if args.renderizar:
+        arq_dot = args.saida
+        if (args.formato or os.path.splitext(args.saida)[1].lstrip(".")) not in ("dot", "gv"):
+            arq_dot = os.path.splitext(args.renderizar)[0] + ".dot"
+            exportar(grafo, arq_dot, "dot", args.solucao, nome)
+        processo = renderizar(arq_dot, args.renderizar)
+        # O comando espera a imagem; quem importa o módulo pode seguir trabalhando
+        processo.wait()
+
+
+if __name__ == "__main__":
+    main()
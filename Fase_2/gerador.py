@@ -0,0 +1,246 @@
+"""
+Gerador de instâncias sintéticas parecidas com malhas viárias, no mesmo
+formato .dat das instâncias de Testes/ (cabeçalho e seções ReN., ReE., EDGE,
+ReA. e ARC), para medir como o código escala de mil a cem mil nós.
+
+Os nós formam uma grade (quarteirões) com o depósito no centro. Uma árvore
+geradora aleatória da grade garante a conexidade e as demais ligações da grade
+entram com probabilidade `densidade`. Cada ligação é uma rua de mão dupla: uma
+aresta ou, com probabilidade `frac_arcos`, um par de arcos opostos (os dois
+sentidos com o mesmo custo), então o grafo é sempre fortemente conexo.
+
+O custo de serviço (S. COST) é sorteado independentemente da demanda: em uma
+ligação requerida é o custo de travessia mais um custo de atendimento sorteado,
+como nas instâncias de Testes/, e em um nó é só o custo de atendimento.
+
+Distribuições de demanda e de custo de atendimento:
+    constante:K         todas as demandas iguais a K
+    uniforme:A:B        inteiros uniformes em [A, B]
+    poisson:L           1 + Poisson(L - 1), média L
+    geometrica:P        geométrica com parâmetro P (muitas pequenas, poucas grandes)
+
+Exemplo:
+    python gerador.py 10000 -o ../Testes/sinteticas --semente 1 --demanda uniforme:1:10
+"""
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+
+def sortear_demandas(rng, distribuicao, quantidade):
+    """
+    _Sorteia demandas inteiras positivas._
+    Args:
+        distribuicao (str): Uma das distribuições do cabeçalho do módulo.
+    """
+    nome, *parametros = distribuicao.split(":")
+    try:
+        parametros = [float(p) for p in parametros]
+        if nome == "constante":
+            (k,) = parametros
+            demandas = np.full(quantidade, int(k))
+        elif nome == "uniforme":
+            a, b = parametros
+            demandas = rng.integers(int(a), int(b), size=quantidade, endpoint=True)
+        elif nome == "poisson":
+            (media,) = parametros
+            demandas = 1 + rng.poisson(max(media - 1, 0), size=quantidade)
+        elif nome == "geometrica":
+            (p,) = parametros
+            demandas = rng.geometric(p, size=quantidade)
+        else:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"distribuição de demanda inválida: {distribuicao}") from None
+    if quantidade and demandas.min() < 1:
+        raise ValueError(f"a distribuição {distribuicao} gera demandas menores que 1")
+    return demandas.astype(np.int64)
+
+
+def _arvore_geradora(rng, num_nos, u, v):
+    """
+    Máscara das ligações (u, v) que formam uma árvore geradora aleatória
+    (Kruskal com as ligações embaralhadas).
+    """
+    pai = list(range(num_nos))
+
+    def raiz(x):
+        while pai[x] != x:
+            pai[x] = pai[pai[x]]
+            x = pai[x]
+        return x
+
+    na_arvore = np.zeros(len(u), dtype=bool)
+    for i in rng.permutation(len(u)).tolist():
+        a, b = raiz(u[i]), raiz(v[i])
+        if a != b:
+            pai[a] = b
+            na_arvore[i] = True
+    return na_arvore
+
+
+def gerar(
+    num_nos,
+    semente=0,
+    densidade=0.7,
+    frac_arcos=0.3,
+    frac_nos=0.1,
+    frac_arestas=0.3,
+    frac_arcos_req=0.3,
+    demanda="uniforme:1:10",
+    capacidade=None,
+    custos=(5, 50),
+    atendimento="uniforme:1:10",
+):
+    """
+    _Gera uma instância em memória._
+    Args:
+        num_nos (int): Número de nós (os nós são numerados a partir de 1).
+        semente (int): Semente do gerador aleatório; a mesma semente gera o mesmo arquivo.
+        densidade (float): Probabilidade de uma ligação da grade fora da árvore geradora existir.
+        frac_arcos (float): Fração das ruas representadas por pares de arcos.
+        frac_nos, frac_arestas, frac_arcos_req (float): Frações requeridas de nós, arestas e arcos.
+        demanda (str): Distribuição das demandas.
+        capacidade (int, optional): Capacidade do veículo. Se omitida, cabe em
+            média cerca de 25 serviços por rota.
+        custos (tuple[int, int]): Faixa do custo de travessia das ruas.
+        atendimento (str): Distribuição do custo de atendimento, somado ao custo
+            de travessia no S. COST das ligações requeridas.
+    Returns:
+        dict: Cabeçalho e seções, no formato esperado por escrever_instancia.
+    """
+    if num_nos < 2:
+        raise ValueError("a instância precisa de pelo menos 2 nós")
+    rng = np.random.default_rng(semente)
+
+    # Grade com `largura` colunas; a última linha pode ficar incompleta
+    largura = math.ceil(math.sqrt(num_nos))
+    indices = np.arange(num_nos)
+    coluna = indices % largura
+    horizontais = indices[(coluna + 1 < largura) & (indices + 1 < num_nos)]
+    verticais = indices[indices + largura < num_nos]
+    u = np.concatenate((horizontais, verticais))
+    v = np.concatenate((horizontais + 1, verticais + largura))
+
+    mantidas = _arvore_geradora(rng, num_nos, u.tolist(), v.tolist()) | (rng.random(len(u)) < densidade)
+    u, v = u[mantidas] + 1, v[mantidas] + 1
+    # Sentido aleatório para que as pontas das arestas não sigam a grade
+    trocar = rng.random(len(u)) < 0.5
+    u, v = np.where(trocar, v, u), np.where(trocar, u, v)
+    custo = rng.integers(custos[0], custos[1], size=len(u), endpoint=True)
+
+    eh_arco = rng.random(len(u)) < frac_arcos
+    arestas = np.column_stack((u, v, custo))[~eh_arco]
+    pares = np.column_stack((u, v, custo))[eh_arco]
+    arcos = np.concatenate((pares, pares[:, [1, 0, 2]]))
+    arcos = arcos[rng.permutation(len(arcos))]
+
+    aresta_req = rng.random(len(arestas)) < frac_arestas
+    arco_req = rng.random(len(arcos)) < frac_arcos_req
+    nos_req = np.flatnonzero(rng.random(num_nos) < frac_nos) + 1
+
+    num_servicos = len(nos_req) + int(aresta_req.sum()) + int(arco_req.sum())
+    demandas = sortear_demandas(rng, demanda, num_servicos)
+    if capacidade is None:
+        media = demandas.mean() if num_servicos else 1
+        capacidade = max(int(demandas.max(initial=1)), math.ceil(25 * media))
+    elif num_servicos and demandas.max() > capacidade:
+        raise ValueError(f"capacidade {capacidade} menor que a maior demanda sorteada ({demandas.max()})")
+
+    cortes = [len(nos_req), len(nos_req) + int(aresta_req.sum())]
+    d_nos, d_arestas, d_arcos = np.split(demandas, cortes)
+    a_nos, a_arestas, a_arcos = np.split(sortear_demandas(rng, atendimento, num_servicos), cortes)
+    deposito = (num_nos // largura // 2) * largura + largura // 2 + 1
+    deposito = min(deposito, num_nos)
+
+    return {
+        "nome": f"sintetica-n{num_nos}-s{semente}",
+        "capacidade": int(capacidade),
+        "deposito": int(deposito),
+        "num_nos": num_nos,
+        "ReN": np.column_stack((nos_req, d_nos, a_nos)),
+        "ReE": np.column_stack((arestas[aresta_req], d_arestas, arestas[aresta_req, 2] + a_arestas)),
+        "EDGE": arestas[~aresta_req],
+        "ReA": np.column_stack((arcos[arco_req], d_arcos, arcos[arco_req, 2] + a_arcos)),
+        "ARC": arcos[~arco_req],
+    }
+
+
+def escrever_instancia(arq, instancia):
+    """
+    _Grava a instância no formato .dat, com as mesmas tabulações das instâncias de Testes/._
+    """
+    secoes = (
+        ("ReN.\tDEMAND\tS. COST", "N", instancia["ReN"]),
+        ("ReE.\tFROM N.\tTO N.\tT. COST\tDEMAND\tS. COST", "E", instancia["ReE"]),
+        ("EDGE\tFROM N.\tTO N.\tT. COST", "NrE", instancia["EDGE"]),
+        ("ReA.\tFROM N.\tTO N.\tT. COST\tDEMAND\tS. COST", "A", instancia["ReA"]),
+        ("ARC\tFROM N.\tTO N.\tT. COST", "NrA", instancia["ARC"]),
+    )
+    with open(arq, "w") as f:
+        f.write(
+            f"Name:\t\t{instancia['nome']}\n"
+            "Optimal value:\t-1\n"
+            "#Vehicles:\t-1\n"
+            f"Capacity:\t{instancia['capacidade']}\n"
+            f"Depot Node:\t{instancia['deposito']}\n"
+            f"#Nodes:\t\t{instancia['num_nos']}\n"
+            f"#Edges:\t\t{len(instancia['ReE']) + len(instancia['EDGE'])}\n"
+            f"#Arcs:\t\t{len(instancia['ReA']) + len(instancia['ARC'])}\n"
+            f"#Required N:\t{len(instancia['ReN'])}\n"
+            f"#Required E:\t{len(instancia['ReE'])}\n"
+            f"#Required A:\t{len(instancia['ReA'])}\n"
+        )
+        for titulo, prefixo, linhas in secoes:
+            f.write(f"\n{titulo}\n")
+            if prefixo == "N":
+                # O identificador do nó requerido é o próprio número do nó (N4 -> 4)
+                f.writelines(f"N{no}\t{d}\t{s}\n" for no, d, s in linhas.tolist())
+                continue
+            f.writelines(
+                f"{prefixo}{i}\t" + "\t".join(map(str, valores)) + "\n"
+                for i, valores in enumerate(linhas.tolist(), start=1)
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("nos", type=int, nargs="+", help="Número de nós de cada instância")
+    parser.add_argument("-o", "--pasta", default=".", help="Pasta de saída (padrão: atual)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--densidade", type=float, default=0.7, help="Ligações da grade além da árvore geradora (padrão: 0.7)")
+    parser.add_argument("--frac-arcos", type=float, default=0.3, help="Ruas com pares de arcos em vez de aresta (padrão: 0.3)")
+    parser.add_argument("--frac-nos", type=float, default=0.1, help="Fração de nós requeridos (padrão: 0.1)")
+    parser.add_argument("--frac-arestas", type=float, default=0.3, help="Fração de arestas requeridas (padrão: 0.3)")
+    parser.add_argument("--frac-arcos-req", type=float, default=0.3, help="Fração de arcos requeridos (padrão: 0.3)")
+    parser.add_argument("--demanda", default="uniforme:1:10", help="Distribuição das demandas (padrão: uniforme:1:10)")
+    parser.add_argument("--atendimento", default="uniforme:1:10", help="Distribuição do custo de atendimento (padrão: uniforme:1:10)")
+    parser.add_argument("--capacidade", type=int, default=None, help="Capacidade (padrão: ~25 serviços por rota)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.pasta, exist_ok=True)
+    for num_nos in args.nos:
+        instancia = gerar(
+            num_nos,
+            args.semente,
+            args.densidade,
+            args.frac_arcos,
+            args.frac_nos,
+            args.frac_arestas,
+            args.frac_arcos_req,
+            args.demanda,
+            args.capacidade,
+            atendimento=args.atendimento,
+        )
+        arq = os.path.join(args.pasta, instancia["nome"] + ".dat")
+        escrever_instancia(arq, instancia)
+        print(arq, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Medição das fases do resolvedor (leitura, caminhos mínimos, construção, split,
+busca local), contadores de eventos e o registro de quando a melhor solução
+foi encontrada, que preenche as linhas 3 e 4 dos arquivos sol-*.dat.
+
+Desligada (o padrão), cada ponto de medição custa só a leitura de um atributo:
+
+    from instrumentacao import instrumentacao
+
+    instrumentacao.ligar()
+    with instrumentacao.fase("construcao"):
+        ...
+    instrumentacao.registrar_custo(custo)
+    print(instrumentacao.formatar_perfil())
+"""
+
+import functools
+import json
+import time
+
+
+class _Fase:
+    """
+    Context manager que soma o tempo gasto dentro dele ao total da fase.
+    """
+
+    __slots__ = ("instrumentacao", "nome", "inicio")
+
+    def __init__(self, instrumentacao, nome):
+        self.instrumentacao = instrumentacao
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *excecao):
+        decorrido = time.perf_counter_ns() - self.inicio
+        tempos = self.instrumentacao.tempos
+        chamadas = self.instrumentacao.chamadas
+        tempos[self.nome] = tempos.get(self.nome, 0) + decorrido
+        chamadas[self.nome] = chamadas.get(self.nome, 0) + 1
+        return False
+
+
+class _Nula:
+    """
+    Context manager que não faz nada, devolvido quando a medição está desligada.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+_NULA = _Nula()
+
+
+class Instrumentacao:
+    def __init__(self):
+        self.ativa = False
+        self.reiniciar()
+
+    def reiniciar(self):
+        """
+        Zera as medições e marca o instante inicial usado pelos clocks.
+        """
+        self.inicio = time.perf_counter_ns()
+        # Tempo acumulado (ns) e número de entradas de cada fase. Fases aninhadas
+        # contam nas duas (os tempos são inclusivos)
+        self.tempos = {}
+        self.chamadas = {}
+        self.contadores = {}
+        self.melhor_custo = None
+        self.clocks_melhor = 0
+        self.melhorias = 0
+
+    def ligar(self):
+        self.reiniciar()
+        self.ativa = True
+
+    def desligar(self):
+        self.ativa = False
+
+    def fase(self, nome):
+        """
+        _Context manager que mede o tempo de uma fase._
+        Args:
+            nome (str): Nome da fase no perfil.
+        """
+        if not self.ativa:
+            return _NULA
+        return _Fase(self, nome)
+
+    def contar(self, nome, quantidade=1):
+        if self.ativa:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def registrar_custo(self, custo):
+        """
+        _Informa o custo de uma solução encontrada._
+        Se for a melhor até agora, guarda o instante (clocks desde ligar()) e conta
+        uma melhoria.
+        Returns:
+            bool: Se a solução melhorou a melhor conhecida.
+        """
+        if not self.ativa:
+            return False
+        if self.melhor_custo is None or custo < self.melhor_custo:
+            self.melhor_custo = custo
+            self.clocks_melhor = time.perf_counter_ns() - self.inicio
+            self.melhorias += 1
+            return True
+        return False
+
+    def clocks(self):
+        """
+        Clocks (ns do perf_counter_ns) desde ligar().
+        """
+        return time.perf_counter_ns() - self.inicio
+
+    def perfil(self):
+        return {
+            "clocks_total": self.clocks(),
+            "clocks_melhor": self.clocks_melhor,
+            "melhor_custo": self.melhor_custo,
+            "melhorias": self.melhorias,
+            "fases": {
+                nome: {"clocks": self.tempos[nome], "chamadas": self.chamadas[nome]}
+                for nome in self.tempos
+            },
+            "contadores": dict(self.contadores),
+        }
+
+    def formatar_perfil(self):
+        """
+        Tabela com o tempo de cada fase e os contadores, em texto.
+        """
+        perfil = self.perfil()
+        total = max(perfil["clocks_total"], 1)
+        linhas = [f"{'fase':20s} {'chamadas':>9s} {'ms':>10s} {'%':>6s}"]
+        for nome, fase in sorted(perfil["fases"].items(), key=lambda item: -item[1]["clocks"]):
+            linhas.append(
+                f"{nome:20s} {fase['chamadas']:9d} {fase['clocks'] / 1e6:10.2f} "
+                f"{100 * fase['clocks'] / total:6.1f}"
+            )
+        linhas.append(f"{'total':20s} {'':9s} {total / 1e6:10.2f}")
+        for nome, valor in sorted(perfil["contadores"].items()):
+            linhas.append(f"{nome:20s} {valor:9d}")
+        linhas.append(
+            f"melhor custo {perfil['melhor_custo']} após {perfil['clocks_melhor'] / 1e6:.2f} ms "
+            f"({perfil['melhorias']} melhorias)"
+        )
+        return "\n".join(linhas)
+
+    def salvar_perfil(self, arq: str):
+        with open(arq, "w") as f:
+            json.dump(self.perfil(), f, indent=1)
+
+
+# Instância compartilhada por todos os módulos
+instrumentacao = Instrumentacao()
+
+
+def cronometrado(nome):
+    """
+    _Decorador que mede cada chamada da função como a fase nome._
+    """
+
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not instrumentacao.ativa:
+                return funcao(*args, **kwargs)
+            with _Fase(instrumentacao, nome):
+                return funcao(*args, **kwargs)
+
+        return envolvida
+
+    return decorador
@@ -0,0 +1,221 @@
+import hashlib
+import os
+
+import numpy as np
+
+# Primeiro token das linhas que abrem cada seção do arquivo .dat
+SECOES = {"ReN.": "ReN", "ReE.": "ReE", "EDGE": "EDGE", "ReA.": "ReA", "ARC": "ARC"}
+
+# Campos do cabeçalho que são guardados na instância
+CABECALHO = {
+    "Name": "nome",
+    "Optimal value": "valor_otimo",
+    "#Vehicles": "veiculos",
+    "Capacity": "capacidade",
+    "Depot Node": "deposito",
+    "#Nodes": "num_nos",
+}
+
+# Número de colunas numéricas de cada seção (sem contar o identificador)
+COLUNAS = {"ReN": 2, "ReE": 5, "EDGE": 3, "ReA": 5, "ARC": 3}
+
+# Versão do formato do cache binário; mudar invalida os caches antigos
+VERSAO_CACHE = 2
+# Seções guardadas no cache, na ordem do arquivo, e o número de colunas de cada uma
+SECOES_CACHE = ("nos_requeridos", "arestas_requeridas", "arestas", "arcos_requeridos", "arcos")
+LARGURAS_CACHE = (3, 5, 3, 5, 3)
+
+
+class Instancia:
+    """
+    Conteúdo de um arquivo de instância, com os números dos nós como no arquivo
+    (começando em 1) e as linhas de cada seção na ordem em que aparecem.
+
+    Atributos com as seções (matrizes int64, uma linha por elemento):
+        nos_requeridos: [nó, demanda, custo de serviço]
+        arestas_requeridas / arcos_requeridos: [de, para, custo, demanda, custo de serviço]
+        arestas / arcos: [de, para, custo]
+    """
+
+    def __init__(self, nome="", valor_otimo=-1, veiculos=-1, capacidade=0, deposito=0, num_nos=0):
+        self.nome = nome
+        self.valor_otimo = valor_otimo
+        self.veiculos = veiculos
+        self.capacidade = capacidade
+        self.deposito = deposito
+        self.num_nos = num_nos
+        # Hash do conteúdo do arquivo (identifica a instância nos caches)
+        self.hash = None
+        self.nos_requeridos = np.empty((0, 3), dtype=np.int64)
+        self.arestas_requeridas = np.empty((0, 5), dtype=np.int64)
+        self.arestas = np.empty((0, 3), dtype=np.int64)
+        self.arcos_requeridos = np.empty((0, 5), dtype=np.int64)
+        self.arcos = np.empty((0, 3), dtype=np.int64)
+
+
+def hash_arquivo(conteudo: bytes):
+    return hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+
+def interpretar(linhas):
+    """
+    _Lê as linhas de um arquivo .dat em uma única passada._
+    Cada linha é quebrada em tokens uma vez; o primeiro token decide se a linha
+    abre uma seção, e dentro das seções só as linhas com a quantidade esperada
+    de números são aproveitadas (linhas de título, comentários ou em branco são
+    ignoradas, independente do espaçamento).
+    Args:
+        linhas (iterable): Linhas do arquivo (str).
+    """
+    instancia = Instancia()
+    secao = None
+    valores = {nome: [] for nome in COLUNAS}
+
+    for linha in linhas:
+        partes = linha.split()
+        if not partes:
+            continue
+
+        if partes[0] in SECOES:
+            secao = SECOES[partes[0]]
+            continue
+
+        if secao is None:
+            # Cabeçalho no formato "Chave: valor"
+            chave, _, valor = linha.partition(":")
+            atributo = CABECALHO.get(chave.strip())
+            if atributo is not None:
+                valor = valor.strip()
+                setattr(instancia, atributo, valor if atributo == "nome" else int(valor))
+            continue
+
+        numeros = partes[1 : COLUNAS[secao] + 1]
+        if len(numeros) < COLUNAS[secao]:
+            continue
+        try:
+            numeros = [int(x) for x in numeros]
+            if secao == "ReN":
+                # O identificador do nó requerido é o próprio número do nó (N4 -> 4)
+                numeros.insert(0, int(partes[0][1:]))
+        except ValueError:
+            continue
+        valores[secao].append(numeros)
+
+    for secao, atributo in (
+        ("ReN", "nos_requeridos"),
+        ("ReE", "arestas_requeridas"),
+        ("EDGE", "arestas"),
+        ("ReA", "arcos_requeridos"),
+        ("ARC", "arcos"),
+    ):
+        if valores[secao]:
+            setattr(instancia, atributo, np.array(valores[secao], dtype=np.int64))
+
+    return instancia
+
+
+def numero_de_nos(arq: str):
+    """
+    Lê só o cabeçalho para descobrir o número de nós da instância (usado para
+    ordenar lotes de instâncias pelo tamanho).
+    """
+    with open(arq, "r") as f:
+        for linha in f:
+            if linha.startswith("#Nodes"):
+                return int(linha.split(":")[1])
+            partes = linha.split()
+            if partes and partes[0] in SECOES:
+                break
+    return 0
+
+
+def caminho_cache(arq: str):
+    return arq + ".npy"
+
+
+def salvar_cache(arq: str, instancia: Instancia, hash_origem: str):
+    """
+    Grava a instância em um único vetor int64 (.npy) ao lado do arquivo original,
+    que pode ser aberto com memory-map. Layout:
+    [versão, hash (2 palavras), valor ótimo, veículos, capacidade, depósito, nós,
+    tamanho do nome, linhas de cada seção (5), nome (bytes), seções...].
+    Falhas de escrita (pasta somente leitura, por exemplo) são ignoradas.
+    """
+    nome = instancia.nome.encode()
+    nome_palavras = np.frombuffer(nome.ljust(-(-len(nome) // 8) * 8, b"\0"), dtype=np.int64)
+    cabecalho = [
+        VERSAO_CACHE,
+        *np.frombuffer(bytes.fromhex(hash_origem), dtype=np.int64).tolist(),
+        instancia.valor_otimo,
+        instancia.veiculos,
+        instancia.capacidade,
+        instancia.deposito,
+        instancia.num_nos,
+        len(nome),
+        *(len(getattr(instancia, secao)) for secao in SECOES_CACHE),
+    ]
+    vetor = np.concatenate(
+        [np.array(cabecalho, dtype=np.int64), nome_palavras]
+        + [getattr(instancia, secao).ravel() for secao in SECOES_CACHE]
+    )
+
+    destino = caminho_cache(arq)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, "wb") as f:
+            np.save(f, vetor)
+        os.replace(temporario, destino)
+    except OSError:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def abrir_cache(arq: str, hash_origem: str):
+    """
+    Retorna a instância do cache binário se ele existir e corresponder ao
+    conteúdo atual do arquivo; senão retorna None.
+    """
+    try:
+        vetor = np.load(caminho_cache(arq), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    if len(vetor) < 14 or vetor[0] != VERSAO_CACHE:
+        return None
+    if np.asarray(vetor[1:3]).tobytes().hex() != hash_origem:
+        return None
+
+    valor_otimo, veiculos, capacidade, deposito, num_nos, tamanho_nome = vetor[3:9].tolist()
+    linhas = vetor[9:14].tolist()
+    posicao = 14 + -(-tamanho_nome // 8)
+    nome = np.asarray(vetor[14:posicao]).tobytes()[:tamanho_nome].decode()
+
+    instancia = Instancia(nome, valor_otimo, veiculos, capacidade, deposito, num_nos)
+    for secao, largura, quantidade in zip(SECOES_CACHE, LARGURAS_CACHE, linhas):
+        fim = posicao + quantidade * largura
+        setattr(instancia, secao, np.array(vetor[posicao:fim]).reshape(quantidade, largura))
+        posicao = fim
+    return instancia
+
+
+def carregar_instancia(arq: str, usar_cache: bool = True):
+    """
+    _Carrega um arquivo de instância .dat._
+    Com usar_cache=True, procura um cache binário ao lado do arquivo com o mesmo
+    hash de conteúdo; se não houver, interpreta o texto e grava o cache para as
+    próximas execuções.
+    Args:
+        arq (str): caminho do arquivo de teste
+        usar_cache (bool, optional): Se o cache binário deve ser usado. Defaults to True.
+    """
+    with open(arq, "rb") as f:
+        conteudo = f.read()
+
+    hash_origem = hash_arquivo(conteudo)
+    instancia = abrir_cache(arq, hash_origem) if usar_cache else None
+    if instancia is None:
+        instancia = interpretar(conteudo.decode().splitlines())
+        if usar_cache:
+            salvar_cache(arq, instancia, hash_origem)
+    instancia.hash = hash_origem
+    return instancia
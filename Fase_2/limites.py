@@ -0,0 +1,393 @@
+"""
+Limites inferiores para o problema misto capacitado (nós, arestas e arcos
+requeridos), usados para calcular o gap das soluções e para encerrar a busca
+quando uma solução atinge o limite.
+
+O custo de uma solução é o custo de percorrer as ligações requeridas (fixo)
+mais o deslocamento (deadheading). O limite é esse custo fixo mais o maior
+entre quatro limites do deslocamento:
+
+    paridade   ignorando sentidos, as rotas são passeios fechados, então os
+               deslocamentos formam um T-join nos vértices com grau ímpar nas
+               ligações requeridas; o T-join mínimo custa o emparelhamento
+               perfeito mínimo desses vértices, limitado por baixo pela metade
+               da atribuição mínima entre eles (a relaxação linear do
+               emparelhamento)
+    balanço    em um vértice sem arestas requeridas, a diferença entre arcos
+               requeridos que entram e que saem precisa ser compensada por
+               deslocamentos; o menor custo é um problema de transporte das
+               sobras para as faltas (ou para vértices com aresta requerida,
+               que podem absorvê-las), resolvido como atribuição
+    conexidade todas as rotas passam pelo depósito, então o depósito, os nós
+               requeridos e as componentes das ligações requeridas ficam
+               ligados por deslocamentos que, com as componentes contraídas,
+               formam um passeio fechado por todas elas; ele custa pelo menos
+               a árvore geradora mínima das componentes e pelo menos a soma,
+               em cada componente, da distância à componente mais próxima
+    veículos   cada uma das ceil(demanda / capacidade) rotas sai do depósito até
+               o início de um serviço e volta do fim de um serviço
+
+Tudo é feito com Dijkstras (de múltiplas fontes, ou um por vértice ímpar ou
+desbalanceado), sem a matriz de caminhos mínimos. Com mais de MAX_EXATO
+vértices ímpares ou unidades de desbalanço, a paridade e o balanço usam só a
+distância ao vizinho mais próximo, um limite mais fraco e bem mais barato.
+"""
+
+import argparse
+import heapq
+import math
+import sys
+from typing import NamedTuple
+
+import numpy as np
+
+from caminhos_minimos import adjacencia_minima
+
+# Tamanho máximo das atribuições (O(n³)) da paridade e do balanço: até aqui o
+# limite inteiro leva no máximo ~15 ms nas instâncias de Testes
+MAX_EXATO = 60
+# Custo das atribuições proibidas; maior que qualquer soma de custos do grafo
+PROIBIDO = 1e18
+
+
+class LimiteInferior(NamedTuple):
+    valor: int
+    servicos: int
+    paridade: int
+    balanco: int
+    conexidade: int
+    veiculos: int
+    rotas: int
+
+
+def _mais_proximas(adjacencia, fontes, alvos=None):
+    """
+    Dijkstra de múltiplas fontes: distância de cada vértice à fonte mais próxima
+    (math.inf se nenhuma o alcança). Com alvos, para assim que todos eles têm a
+    distância definitiva (as dos demais vértices podem ficar incompletas).
+    """
+    dist = [math.inf] * len(adjacencia)
+    heap = [(0, s) for s in fontes]
+    for s in fontes:
+        dist[s] = 0
+    pendentes = set(alvos) if alvos is not None else None
+    extrair, inserir = heapq.heappop, heapq.heappush
+    while heap:
+        d, u = extrair(heap)
+        if d > dist[u]:
+            continue
+        if pendentes is not None:
+            pendentes.discard(u)
+            if not pendentes:
+                break
+        for v, c in adjacencia[u]:
+            if d + c < dist[v]:
+                dist[v] = d + c
+                inserir(heap, (d + c, v))
+    return dist
+
+
+def _duas_mais_proximas(adjacencia, fontes):
+    """
+    Dijkstra de múltiplas fontes que guarda, em cada vértice, as duas fontes
+    distintas mais próximas: rotulos[v] = [(dist, fonte), ...] com até dois itens.
+    """
+    rotulos = [[] for _ in adjacencia]
+    heap = [(0, s, s) for s in fontes]
+    heapq.heapify(heap)
+    extrair, inserir = heapq.heappop, heapq.heappush
+    while heap:
+        d, u, s = extrair(heap)
+        rotulo = rotulos[u]
+        if len(rotulo) == 2 or (rotulo and rotulo[0][1] == s):
+            continue
+        rotulo.append((d, s))
+        for v, c in adjacencia[u]:
+            vizinho = rotulos[v]
+            if len(vizinho) < 2 and not (vizinho and vizinho[0][1] == s):
+                inserir(heap, (d + c, v, s))
+    return rotulos
+
+
+def _atribuicao(custos):
+    """
+    Custo da atribuição mínima (algoritmo húngaro em O(n³)) de uma matriz
+    quadrada de custos; PROIBIDO marca os pares que não podem ser atribuídos.
+    """
+    n = len(custos)
+    if n == 0:
+        return 0.0
+    # Potenciais iniciais viáveis (redução por linhas e depois por colunas)
+    # encurtam os caminhos aumentantes
+    u = np.zeros(n + 1)
+    v = np.zeros(n + 1)
+    u[1:] = custos.min(axis=1)
+    v[1:] = (custos - u[1:, None]).min(axis=0)
+    # linha_da_coluna[j]: linha (1..n) atribuída à coluna j (1..n); 0 é livre
+    linha_da_coluna = np.zeros(n + 1, dtype=np.intp)
+    anterior = np.zeros(n + 1, dtype=np.intp)
+    for i in range(1, n + 1):
+        linha_da_coluna[0] = i
+        j0 = 0
+        folga = np.full(n + 1, np.inf)
+        usada = np.zeros(n + 1, dtype=bool)
+        while True:
+            usada[j0] = True
+            i0 = linha_da_coluna[j0]
+            reduzido = custos[i0 - 1] - u[i0] - v[1:]
+            melhora = ~usada[1:] & (reduzido < folga[1:])
+            folga[1:][melhora] = reduzido[melhora]
+            anterior[1:][melhora] = j0
+            j1 = int(np.argmin(np.where(usada, np.inf, folga)))
+            delta = folga[j1]
+            u[linha_da_coluna[usada]] += delta
+            v[usada] -= delta
+            folga[~usada] -= delta
+            j0 = j1
+            if linha_da_coluna[j0] == 0:
+                break
+        while j0:
+            j1 = anterior[j0]
+            linha_da_coluna[j0] = linha_da_coluna[j1]
+            j0 = j1
+    return float(custos[linha_da_coluna[1:] - 1, np.arange(n)].sum())
+
+
+def _matriz_distancias(adjacencia, origens, destinos):
+    """
+    Distâncias de cada origem a cada destino (um Dijkstra por origem), com
+    PROIBIDO onde não há caminho.
+    """
+    matriz = np.empty((len(origens), len(destinos)))
+    alvos = set(destinos)
+    linhas = {}
+    for i, s in enumerate(origens):
+        # Origens repetidas (unidades de desbalanço do mesmo vértice) usam o mesmo Dijkstra
+        if s not in linhas:
+            dist = _mais_proximas(adjacencia, [s], alvos)
+            linhas[s] = [dist[t] for t in destinos]
+        matriz[i] = linhas[s]
+    matriz[np.isinf(matriz)] = PROIBIDO
+    return matriz
+
+
+def limite_paridade(adjacencia_simetrica, servicos):
+    grau = {}
+    for s in servicos:
+        if s.tipo != "N":
+            grau[s.origem] = grau.get(s.origem, 0) + 1
+            grau[s.destino] = grau.get(s.destino, 0) + 1
+    impares = [v for v, g in grau.items() if g % 2]
+    if not impares:
+        return 0
+    if len(impares) > MAX_EXATO:
+        rotulos = _duas_mais_proximas(adjacencia_simetrica, impares)
+        soma = sum(rotulos[v][1][0] for v in impares if len(rotulos[v]) == 2)
+    else:
+        # Cada ímpar atribuído a outro: a atribuição mínima custa no máximo o
+        # dobro do emparelhamento perfeito mínimo (cada par atribuído nos dois sentidos)
+        custos = _matriz_distancias(adjacencia_simetrica, impares, impares)
+        np.fill_diagonal(custos, PROIBIDO)
+        soma = _atribuicao(custos)
+        if soma >= PROIBIDO:
+            return 0
+    # Os custos são inteiros, então o T-join custa pelo menos o teto da metade
+    return -(-int(soma) // 2)
+
+
+def limite_balanco(adjacencia, reversa, servicos):
+    com_aresta = set()
+    saldo = {}
+    for s in servicos:
+        if s.tipo == "E":
+            com_aresta.update((s.origem, s.destino))
+        elif s.tipo == "A":
+            saldo[s.origem] = saldo.get(s.origem, 0) - 1
+            saldo[s.destino] = saldo.get(s.destino, 0) + 1
+    saldo = {v: b for v, b in saldo.items() if b and v not in com_aresta}
+    if not saldo:
+        return 0
+    # Quem recebe mais arcos do que envia precisa de deslocamentos saindo dele
+    # até um vértice com falta (ou com aresta requerida, que pode ser orientada)
+    sobras = {v: b for v, b in saldo.items() if b > 0}
+    faltas = {v: -b for v, b in saldo.items() if b < 0}
+    ate_livre = _mais_proximas(reversa, list(com_aresta))
+    desde_livre = _mais_proximas(adjacencia, list(com_aresta))
+    unidades_sobra = [v for v, b in sobras.items() for _ in range(b)]
+    unidades_falta = [v for v, b in faltas.items() for _ in range(b)]
+
+    if len(unidades_sobra) + len(unidades_falta) > MAX_EXATO:
+        ate_falta = _mais_proximas(reversa, [*faltas, *com_aresta])
+        desde_sobra = _mais_proximas(adjacencia, [*sobras, *com_aresta])
+        saindo = sum(b * ate_falta[v] for v, b in sobras.items())
+        entrando = sum(b * desde_sobra[v] for v, b in faltas.items())
+        limite = max(saindo, entrando)
+        return 0 if math.isinf(limite) else int(limite)
+
+    # Transporte como atribuição quadrada: cada sobra vai a uma falta ou a um
+    # vértice com aresta (colunas extras); cada falta não atendida por uma
+    # sobra vem de um vértice com aresta (linhas extras)
+    s, f = len(unidades_sobra), len(unidades_falta)
+    custos = np.full((s + f, f + s), PROIBIDO)
+    custos[:s, :f] = _matriz_distancias(adjacencia, unidades_sobra, unidades_falta)
+    custos[:s, f:] = np.array([ate_livre[v] for v in unidades_sobra])[:, None]
+    custos[s:, :f] = np.array([desde_livre[v] for v in unidades_falta])[None, :]
+    custos[s:, f:] = 0
+    custos[np.isinf(custos)] = PROIBIDO
+    total = _atribuicao(custos)
+    return 0 if total >= PROIBIDO else int(total)
+
+
+def limite_conexidade(adjacencia_simetrica, servicos, deposito):
+    """
+    _Limite de conexidade: o depósito, os nós requeridos e cada componente das
+    ligações requeridas precisam ser ligados por deslocamentos._
+    A árvore geradora mínima entre as componentes (com a distância entre duas
+    componentes sendo a menor entre vértices delas) sai de um único Dijkstra de
+    múltiplas fontes: cada vértice fica com a componente mais próxima e as
+    ligações entre regiões de componentes diferentes contêm uma árvore mínima
+    (Mehlhorn, 1988).
+    """
+    n = len(adjacencia_simetrica)
+    pai = list(range(n))
+
+    def raiz(x):
+        while pai[x] != x:
+            pai[x] = pai[pai[x]]
+            x = pai[x]
+        return x
+
+    terminais = {deposito}
+    for s in servicos:
+        terminais.update((s.origem, s.destino))
+        if s.tipo != "N":
+            a, b = raiz(s.origem), raiz(s.destino)
+            if a != b:
+                pai[a] = b
+    componente = {v: raiz(v) for v in terminais}
+    componentes = set(componente.values())
+    if len(componentes) < 2:
+        return 0
+
+    # Dijkstra de múltiplas fontes rotulado pela componente de origem
+    dist = [math.inf] * n
+    regiao = [-1] * n
+    heap = [(0, v, c) for v, c in componente.items()]
+    heapq.heapify(heap)
+    extrair, inserir = heapq.heappop, heapq.heappush
+    while heap:
+        d, u, c = extrair(heap)
+        if regiao[u] != -1:
+            continue
+        dist[u] = d
+        regiao[u] = c
+        for v, custo in adjacencia_simetrica[u]:
+            if regiao[v] == -1:
+                inserir(heap, (d + custo, v, c))
+
+    # mais_proxima[c]: distância da componente c à componente mais próxima
+    mais_proxima = dict.fromkeys(componentes, math.inf)
+    fronteira = []
+    for u in range(n):
+        if regiao[u] == -1:
+            continue
+        for v, custo in adjacencia_simetrica[u]:
+            if regiao[v] != -1 and regiao[v] != regiao[u]:
+                d = dist[u] + custo + dist[v]
+                fronteira.append((d, regiao[u], regiao[v]))
+                mais_proxima[regiao[u]] = min(mais_proxima[regiao[u]], d)
+    if any(math.isinf(d) for d in mais_proxima.values()):
+        return 0
+
+    pai = {c: c for c in componentes}
+
+    def raiz_componente(x):
+        while pai[x] != x:
+            pai[x] = pai[pai[x]]
+            x = pai[x]
+        return x
+
+    arvore = 0
+    for d, a, b in sorted(fronteira):
+        a, b = raiz_componente(a), raiz_componente(b)
+        if a != b:
+            pai[a] = b
+            arvore += d
+    # O passeio fechado entra e sai de cada componente, e cada trecho entre
+    # duas componentes custa pelo menos a maior das duas distâncias mínimas
+    return max(arvore, sum(mais_proxima.values()))
+
+
+def limite_veiculos(adjacencia, reversa, servicos, deposito, capacidade):
+    demanda = sum(s.demanda for s in servicos)
+    rotas = -(-demanda // capacidade) if capacidade > 0 else 0
+    if rotas == 0:
+        return 0, 0
+    inicios = {s.origem for s in servicos} | {s.destino for s in servicos if s.tipo == "E"}
+    fins = {s.destino for s in servicos} | {s.origem for s in servicos if s.tipo == "E"}
+    ida = _mais_proximas(reversa, list(inicios))[deposito]
+    volta = _mais_proximas(adjacencia, list(fins))[deposito]
+    if math.isinf(ida) or math.isinf(volta):
+        return 0, rotas
+    return rotas * int(ida + volta), rotas
+
+
+def calcular_limite(grafo):
+    """
+    _Limite inferior do custo de qualquer solução do grafo._
+    Args:
+        grafo (Grafo): Grafo da Fase 2.
+    Returns:
+        LimiteInferior: O limite (valor) e as parcelas que o compõem.
+    """
+    n, origens, destinos, custos = grafo.conexoes()
+    origens, destinos, custos = (np.asarray(x) for x in (origens, destinos, custos))
+    adjacencia = adjacencia_minima(n, origens, destinos, custos)
+    reversa = adjacencia_minima(n, destinos, origens, custos)
+    simetrica = adjacencia_minima(
+        n,
+        np.concatenate((origens, destinos)),
+        np.concatenate((destinos, origens)),
+        np.concatenate((custos, custos)),
+    )
+
+    servicos = grafo.servicos
+    fixo = int(sum(s.custo for s in servicos))
+    paridade = limite_paridade(simetrica, servicos)
+    balanco = limite_balanco(adjacencia, reversa, servicos)
+    conexidade = limite_conexidade(simetrica, servicos, grafo.deposito)
+    veiculos, rotas = limite_veiculos(adjacencia, reversa, servicos, grafo.deposito, grafo.capacidade)
+    return LimiteInferior(
+        fixo + max(paridade, balanco, conexidade, veiculos), fixo, paridade, balanco, conexidade, veiculos, rotas
+    )
+
+
+def gap(custo, limite):
+    """
+    Gap percentual de uma solução em relação ao limite inferior.
+    """
+    if limite <= 0:
+        return math.inf if custo > 0 else 0.0
+    return 100.0 * (custo - limite) / limite
+
+
+def main(argv=None):
+    from Grafo import ler_arquivo
+
+    parser = argparse.ArgumentParser(description="Calcula limites inferiores das instâncias.")
+    parser.add_argument("instancias", nargs="+", help="Arquivos .dat")
+    args = parser.parse_args(argv)
+
+    print(f"{'instância':30s} {'limite':>8s} {'serviços':>9s} {'paridade':>9s} {'balanço':>8s} {'conexidade':>11s} {'veículos':>9s} {'rotas':>6s}")
+    for arq in args.instancias:
+        limite = calcular_limite(ler_arquivo(arq))
+        nome = arq.rsplit("/", 1)[-1]
+        print(
+            f"{nome:30s} {limite.valor:8d} {limite.servicos:9d} {limite.paridade:9d} "
+            f"{limite.balanco:8d} {limite.conexidade:11d} {limite.veiculos:9d} {limite.rotas:6d}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
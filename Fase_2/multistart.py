@@ -0,0 +1,264 @@
+"""
+Multi-start com limite de tempo: vários processos repetem construção aleatória
++ busca local até o prazo acabar, compartilhando o custo da melhor solução
+(incumbente) por memória compartilhada. Uma construção muito pior que a
+incumbente, ou igual a uma partida já feita pelo processo, é descartada antes
+da busca local, que é a parte cara. O custo e a carga das rotas ficam em um
+cache por processo (avaliacao.py), pois as mesmas rotas se repetem muito
+entre as partidas.
+
+Exemplo:
+    python multistart.py ../Testes/DI-NEARP-n442-Q2k.dat -t 30 -p 4 -s sol-n442.dat
+
+Os tempos (clocks) são contados em ns do perf_counter_ns, a partir do início
+da execução; o relógio é o mesmo em todos os processos. A busca termina antes
+do prazo se uma solução atingir o limite inferior (limites.py), pois então ela
+é ótima.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from busca_local import BuscaLocal
+from construtivo import REGRAS, construir, path_scanning
+from Grafo import ler_arquivo
+from instrumentacao import instrumentacao
+from limites import calcular_limite, gap
+from servicos import TabelaServicos
+from solucao import Solucao, escrever_solucao, formatar_solucao
+from split import decodificar, tour_aleatorio
+
+# Uma construção não passa pela busca local se, mesmo com a maior melhora
+# relativa que a busca já deu no processo, ficaria acima de PODA × incumbente
+PODA = 1.02
+# Partidas otimizadas por processo antes de começar a podar
+AQUECIMENTO = 10
+SEM_SOLUCAO = np.iinfo(np.int64).max
+# Memória padrão do cache de rotas de cada processo
+CACHE_ROTAS = 32 * 2**20
+# Partidas lembradas por processo para descartar as repetidas
+MAX_PARTIDAS_VISTAS = 2**16
+
+# Estado de cada processo, montado uma vez por _inicializar
+_estado = {}
+
+
+def _inicializar(arq, incumbente, inicio_ns, k, limite, cache_rotas, poda=PODA):
+    """
+    Lê a instância no processo e abre a tabela de serviços do disco (a mesma
+    gravada pelo processo principal, sem cópia).
+    """
+    grafo = ler_arquivo(arq)
+    tabela = TabelaServicos.em_disco(grafo)
+    if cache_rotas:
+        tabela.usar_cache_rotas(grafo.capacidade, cache_rotas)
+    _estado.update(
+        grafo=grafo,
+        tabela=tabela,
+        busca=BuscaLocal(tabela, grafo.capacidade, k),
+        incumbente=incumbente,
+        inicio=inicio_ns,
+        limite=limite,
+        poda=poda,
+    )
+
+
+def _publicar(incumbente, custo):
+    """
+    Atualiza a incumbente compartilhada se custo for melhor.
+    """
+    if custo < incumbente.value:
+        with incumbente.get_lock():
+            if custo < incumbente.value:
+                incumbente.value = custo
+
+
+def construcao_aleatoria(tabela, capacidade, rng, iteracao):
+    """
+    Alterna entre path-scanning com regra e desempates sorteados e uma rota
+    gigante aleatória cortada pelo split.
+    """
+    if iteracao % 2 == 0:
+        regra = REGRAS[rng.integers(len(REGRAS))]
+        return path_scanning(tabela, capacidade, regra, rng)
+    return decodificar(tabela, tour_aleatorio(tabela, rng), capacidade)
+
+
+def _trabalhar(semente, prazo_ns):
+    """
+    Repete construção + busca local até prazo_ns (perf_counter_ns absoluto).
+    Returns:
+        dict: Melhor solução do processo (rotas, custo, clocks até ela) e contadores.
+    """
+    tabela = _estado["tabela"]
+    capacidade = _estado["grafo"].capacidade
+    busca = _estado["busca"]
+    incumbente = _estado["incumbente"]
+    inicio = _estado["inicio"]
+    limite = _estado["limite"]
+    poda = _estado["poda"]
+    avaliacoes = tabela.avaliacoes
+    rng = np.random.default_rng(semente)
+
+    melhor = None
+    vistas = set()
+    resultado = {"iteracoes": 0, "exploradas": 0, "podas": 0, "repetidas": 0, "melhorias": 0, "clocks_melhor": 0}
+    iteracao = 0
+    # Menor razão custo depois da busca local / custo da construção já vista
+    melhor_razao = 1.0
+    while time.perf_counter_ns() < prazo_ns and incumbente.value > limite:
+        if iteracao == 0 and semente == 0:
+            # Um dos processos começa pela melhor construção determinística
+            solucao = construir(tabela, capacidade)
+        else:
+            solucao = construcao_aleatoria(tabela, capacidade, rng, iteracao)
+        iteracao += 1
+
+        if avaliacoes is not None:
+            h = avaliacoes.hash_solucao(solucao.rotas)
+            if h in vistas:
+                resultado["repetidas"] += 1
+                continue
+            if len(vistas) >= MAX_PARTIDAS_VISTAS:
+                vistas.clear()
+            vistas.add(h)
+
+        custo_construcao = solucao.custo
+        if (
+            poda
+            and resultado["exploradas"] >= AQUECIMENTO
+            and incumbente.value != SEM_SOLUCAO
+            and custo_construcao * melhor_razao > poda * incumbente.value
+        ):
+            resultado["podas"] += 1
+            continue
+
+        solucao = busca.otimizar(solucao, rng=rng)
+        resultado["exploradas"] += 1
+        custo = solucao.custo
+        if custo_construcao > 0:
+            melhor_razao = min(melhor_razao, custo / custo_construcao)
+        if melhor is None or custo < melhor.custo:
+            melhor = solucao
+            resultado["melhorias"] += 1
+            resultado["clocks_melhor"] = time.perf_counter_ns() - inicio
+            _publicar(incumbente, custo)
+
+    resultado["iteracoes"] = iteracao
+    if avaliacoes is not None:
+        resultado["acertos_rotas"] = avaliacoes.acertos
+        resultado["falhas_rotas"] = avaliacoes.falhas
+    if melhor is not None:
+        resultado["custo"] = melhor.custo
+        resultado["rotas"] = melhor.rotas
+    return resultado
+
+
+def resolver_com_tempo(
+    arq, tempo, processos=None, semente=0, k=10, limite_inferior=None, cache_rotas=CACHE_ROTAS, poda=PODA
+):
+    """
+    _Multi-start com limite de tempo._
+    Args:
+        arq (str): Arquivo .dat da instância.
+        tempo (float): Tempo total em segundos (incluindo a leitura).
+        processos (int, optional): Número de processos (padrão: núcleos da
+            máquina). Com 1, roda no próprio processo.
+        semente (int, optional): Semente base; cada processo usa semente + i.
+        k (int, optional): Tamanho das listas granulares da busca local.
+        limite_inferior (int, optional): Os processos param quando a incumbente
+            chega a este custo. Se omitido, é calculado com calcular_limite; use
+            0 para sempre ir até o prazo.
+        cache_rotas (int, optional): Memória (bytes) do cache de rotas de cada
+            processo; 0 desliga o cache e o descarte de partidas repetidas.
+        poda (float, optional): Tolerância da poda de construções em relação à
+            incumbente (ver PODA); 0 desliga a poda.
+    Returns:
+        tuple[Solucao, int, dict]: Melhor solução, clocks até encontrá-la e os
+        contadores somados dos processos (mais o limite inferior usado).
+    """
+    inicio = time.perf_counter_ns()
+    prazo = inicio + int(tempo * 1e9)
+    processos = processos or os.cpu_count() or 1
+    incumbente = multiprocessing.Value("q", SEM_SOLUCAO)
+
+    # Grava a tabela no disco antes de criar os processos, para que todos a abram pronta
+    grafo = ler_arquivo(arq)
+    tabela = TabelaServicos.em_disco(grafo)
+    if limite_inferior is None:
+        limite_inferior = calcular_limite(grafo).valor
+
+    if processos <= 1:
+        _inicializar(arq, incumbente, inicio, k, limite_inferior, cache_rotas, poda)
+        resultados = [_trabalhar(semente, prazo)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processos,
+            initializer=_inicializar,
+            initargs=(arq, incumbente, inicio, k, limite_inferior, cache_rotas, poda),
+        ) as executor:
+            futuros = [executor.submit(_trabalhar, semente + i, prazo) for i in range(processos)]
+            resultados = [futuro.result() for futuro in futuros]
+
+    validos = [r for r in resultados if "custo" in r]
+    if not validos:
+        raise RuntimeError("o tempo acabou antes da primeira solução")
+    melhor = min(validos, key=lambda r: (r["custo"], r["clocks_melhor"]))
+
+    contadores = {
+        chave: sum(r.get(chave, 0) for r in resultados)
+        for chave in ("iteracoes", "exploradas", "podas", "repetidas", "melhorias", "acertos_rotas", "falhas_rotas")
+    }
+    contadores["processos"] = processos
+    for chave, valor in contadores.items():
+        instrumentacao.contar(chave, valor)
+    contadores["limite"] = limite_inferior
+    return Solucao(tabela, melhor["rotas"]), melhor["clocks_melhor"], contadores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("instancia", help="Arquivo .dat da instância")
+    parser.add_argument("-t", "--tempo", type=float, default=10.0, help="Tempo total em segundos (padrão: 10)")
+    parser.add_argument("-p", "--processos", type=int, default=None, help="Número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("-s", "--saida", default=None, help="Arquivo sol-*.dat (padrão: saída padrão)")
+    parser.add_argument("--poda", type=float, default=PODA, help=f"Tolerância da poda de construções (padrão: {PODA}; 0 desliga)")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_ROTAS / 2**20, help="Memória do cache de rotas por processo, em MiB (0 desliga)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter_ns()
+    solucao, clocks_melhor, contadores = resolver_com_tempo(
+        args.instancia,
+        args.tempo,
+        args.processos,
+        args.semente,
+        cache_rotas=int(args.cache_mb * 2**20),
+        poda=args.poda,
+    )
+    clocks = time.perf_counter_ns() - inicio
+
+    if args.saida:
+        escrever_solucao(args.saida, solucao, clocks, clocks_melhor)
+    else:
+        print(formatar_solucao(solucao, clocks, clocks_melhor), end="")
+    print(
+        f"custo {solucao.custo} (limite {contadores['limite']}, gap {gap(solucao.custo, contadores['limite']):.1f}%); "
+        f"{contadores['iteracoes']} partidas ({contadores['exploradas']} exploradas, "
+        f"{contadores['podas']} podadas, {contadores['repetidas']} repetidas) "
+        f"em {contadores['processos']} processos",
+        file=sys.stderr,
+    )
+    consultas = contadores["acertos_rotas"] + contadores["falhas_rotas"]
+    if consultas:
+        print(f"cache de rotas: {contadores['acertos_rotas'] / consultas:.1%} de acertos em {consultas} avaliações", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+
+from caminhos_minimos import OraculoSobDemanda
+
+# Versão do layout das tabelas gravadas em disco; mudar invalida as antigas
+VERSAO_TABELA = 1
+# Pasta padrão das tabelas em disco (pode ser trocada pela variável de ambiente)
+PASTA_TABELAS = os.environ.get(
+    "GRAFOS_TABELAS", os.path.join(tempfile.gettempdir(), "grafos-tabelas")
+)
+
+
+class Servico(NamedTuple):
+    """
+    Um nó, aresta ou arco requerido.
+    id: número do serviço no arquivo de solução (nós, depois arestas, depois arcos, a partir de 1)
+    tipo: "N", "E" ou "A"
+    custo: custo somado à rota ao atender o serviço (percorrer a ligação; zero para nós)
+    custo_servico: coluna S. COST do arquivo
+    """
+
+    id: int
+    tipo: str
+    origem: int
+    destino: int
+    demanda: int
+    custo: int
+    custo_servico: int
+
+
+class TabelaServicos:
+    """
+    Distâncias de deslocamento (deadheading) entre o fim de um serviço e o
+    início de outro, pré-calculadas a partir da matriz de caminhos mínimos.
+
+    Cada posição da tabela é uma "tarefa": o serviço em uma orientação. A tarefa
+    0 é o depósito; nós e arcos têm uma tarefa e arestas requeridas têm duas
+    (u -> v e v -> u), ligadas por `inverso`. Assim o tamanho da tabela é
+    (2|ER| + |AR| + |VR| + 1)².
+    """
+
+    DEPOSITO = 0
+
+    def __init__(self, servicos, deposito, dist=None, distancias=None):
+        """
+        Args:
+            servicos (list[Servico]): Serviços do grafo, na ordem dos ids.
+            deposito (int): Nó do depósito.
+            dist (np.ndarray | OraculoSobDemanda): Matriz de distâncias entre nós,
+                ou um oráculo sob demanda (só as linhas das pontas dos serviços e do
+                depósito são calculadas).
+            distancias (np.ndarray, optional): Tabela entre tarefas já calculada
+                (por exemplo, aberta do disco); dispensa dist.
+        """
+        self.servicos = servicos
+        self.deposito = deposito
+
+        inicio = [deposito]
+        fim = [deposito]
+        servico = [0]
+        inverso = [0]
+        for s in servicos:
+            t = len(inicio)
+            inicio.append(s.origem)
+            fim.append(s.destino)
+            servico.append(s.id)
+            if s.tipo == "E":
+                inicio.append(s.destino)
+                fim.append(s.origem)
+                servico.append(s.id)
+                inverso.extend((t + 1, t))
+            else:
+                inverso.append(t)
+
+        self.inicio = np.array(inicio, dtype=np.int64)
+        self.fim = np.array(fim, dtype=np.int64)
+        self.servico = np.array(servico, dtype=np.int64)
+        self.inverso = np.array(inverso, dtype=np.int64)
+
+        por_id = np.zeros((len(servicos) + 1, 2), dtype=np.int64)
+        for s in servicos:
+            por_id[s.id] = (s.demanda, s.custo)
+        self.demanda = por_id[self.servico, 0]
+        self.custo = por_id[self.servico, 1]
+        self.demanda[0] = 0
+        self.custo[0] = 0
+
+        # Cache de avaliação de rotas (CacheRotas), ligado por usar_cache_rotas
+        self.avaliacoes = None
+
+        # distancias[a, b] = caminho mínimo do fim da tarefa a ao início da tarefa b
+        if distancias is not None:
+            if distancias.shape != (len(inicio), len(inicio)):
+                raise ValueError("tabela de distâncias com tamanho diferente do número de tarefas")
+            self.distancias = distancias
+        elif isinstance(dist, OraculoSobDemanda):
+            self.distancias = dist.submatriz(self.fim, self.inicio)
+        else:
+            self.distancias = np.ascontiguousarray(dist[np.ix_(self.fim, self.inicio)])
+
+    @classmethod
+    def do_grafo(cls, grafo, sob_demanda=False):
+        """
+        Tabela do grafo. Com sob_demanda=True, as distâncias vêm do
+        oraculo_sob_demanda do grafo em vez da matriz completa.
+        """
+        if sob_demanda:
+            return cls(grafo.servicos, grafo.deposito, grafo.oraculo_sob_demanda)
+        dist, _ = grafo.oraculo.matrizes()
+        return cls(grafo.servicos, grafo.deposito, dist)
+
+    @classmethod
+    def em_disco(cls, grafo, pasta=None):
+        """
+        _Tabela do grafo guardada em um arquivo .npy mapeado em memória._
+        O arquivo é identificado pelo hash da instância, então execuções seguidas
+        e processos paralelos abrem a mesma tabela sem recalculá-la nem copiá-la
+        (as páginas do arquivo são compartilhadas pelo sistema operacional).
+        Grafos sem hash (alterados depois da leitura) calculam a tabela em memória.
+        Args:
+            grafo (Grafo): Grafo lido com ler_arquivo.
+            pasta (str, optional): Pasta das tabelas. Defaults to PASTA_TABELAS.
+        """
+        if grafo.hash_instancia is None:
+            return cls.do_grafo(grafo)
+
+        arq = caminho_tabela(grafo.hash_instancia, pasta)
+        tamanho = len(grafo.servicos) + sum(s.tipo == "E" for s in grafo.servicos) + 1
+        try:
+            distancias = np.load(arq, mmap_mode="r")
+            if distancias.shape == (tamanho, tamanho):
+                return cls(grafo.servicos, grafo.deposito, distancias=distancias)
+        except (OSError, ValueError):
+            pass
+
+        tabela = cls.do_grafo(grafo)
+        if not salvar_tabela(arq, tabela.distancias):
+            return tabela
+        return cls(grafo.servicos, grafo.deposito, distancias=np.load(arq, mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.inicio)
+
+    @property
+    def num_servicos(self):
+        return len(self.servicos)
+
+    def tarefas_do_servico(self, id_servico):
+        """
+        Tarefas (orientações) do serviço com o id informado.
+        """
+        return np.flatnonzero(self.servico == id_servico)
+
+    def usar_cache_rotas(self, capacidade, max_bytes=32 * 2**20):
+        """
+        _Passa a guardar o custo e a carga das rotas avaliadas (ver avaliacao.py)._
+        Returns:
+            CacheRotas: O cache, com os contadores de acertos.
+        """
+        from avaliacao import CacheRotas
+
+        self.avaliacoes = CacheRotas(self, capacidade, max_bytes)
+        return self.avaliacoes
+
+    def custo_rota(self, rota):
+        """
+        Custo de uma rota (lista de tarefas), saindo e voltando ao depósito.
+        """
+        if self.avaliacoes is not None and rota:
+            return self.avaliacoes.avaliar(rota).custo
+        return self.calcular_custo(rota)
+
+    def carga_rota(self, rota):
+        if self.avaliacoes is not None and rota:
+            return self.avaliacoes.avaliar(rota).carga
+        return self.calcular_carga(rota)
+
+    def calcular_custo(self, rota):
+        if not rota:
+            return 0
+        anteriores = [self.DEPOSITO, *rota]
+        proximos = [*rota, self.DEPOSITO]
+        return int(self.distancias[anteriores, proximos].sum() + self.custo[rota].sum())
+
+    def calcular_carga(self, rota):
+        return int(self.demanda[rota].sum()) if rota else 0
+
+
+def caminho_tabela(hash_instancia, pasta=None):
+    return os.path.join(pasta or PASTA_TABELAS, f"{hash_instancia}-v{VERSAO_TABELA}.npy")
+
+
+def salvar_tabela(arq, distancias):
+    """
+    Grava a tabela (int32 quando os valores cabem) de forma atômica, para que
+    processos concorrentes nunca abram um arquivo pela metade.
+    Returns:
+        bool: Se a tabela foi gravada.
+    """
+    if np.issubdtype(distancias.dtype, np.integer) and distancias.max(initial=0) <= np.iinfo(np.int32).max:
+        distancias = distancias.astype(np.int32)
+    temporario = f"{arq}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(arq), exist_ok=True)
+        with open(temporario, "wb") as f:
+            np.save(f, distancias)
+        os.replace(temporario, arq)
+        return True
+    except OSError:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        return False
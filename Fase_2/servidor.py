@@ -0,0 +1,376 @@
+"""
+Serviço local de resolução: um processo de longa duração que mantém as
+instâncias já lidas (Grafo + tabela de distâncias entre serviços) em um cache
+LRU e despacha cada resolução para um pool de processos. Pedidos repetidos
+sobre a mesma rede, mesmo com outra capacidade ou outras demandas, não relêem
+o .dat nem recalculam caminhos mínimos.
+
+Protocolo: JSON, um objeto por linha, por um socket Unix (padrão) ou TCP em
+localhost. Pedido:
+
+    {"instancia": "Testes/BHW1.dat"}              ou {"conteudo": "<texto do .dat>"}
+    opcionais: "capacidade": 10, "demandas": {"3": 2, ...} (id do serviço -> demanda),
+               "busca_local": true
+
+Resposta: {"ok": true, "custo": ..., "solucao": "<texto sol-*.dat>", "cache": true, ...}
+ou {"ok": false, "erro": "..."}. O pedido {"comando": "estatisticas"} devolve os
+contadores do cache.
+
+Exemplos:
+    python servidor.py iniciar -p 4
+    python servidor.py enviar ../Testes/BHW1.dat --capacidade 8 -s sol-BHW1.dat
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from construtivo import resolver_tabela
+from Grafo import grafo_da_instancia
+from instrumentacao import instrumentacao
+from leitura import carregar_instancia, hash_arquivo, interpretar
+from servicos import TabelaServicos
+from solucao import formatar_solucao
+
+SOCKET_PADRAO = os.path.join(tempfile.gettempdir(), "grafos-servidor.sock")
+# Tabelas de distâncias abertas em cada processo do pool (mapeadas do disco)
+MAX_TABELAS_PROCESSO = 8
+# Arquivos cujo hash fica memorizado pelo servidor
+MAX_ASSINATURAS = 4096
+
+# Tabelas abertas no processo do pool: arquivo -> matriz mapeada
+_tabelas = OrderedDict()
+
+
+def _abrir_tabela(arq):
+    distancias = _tabelas.get(arq)
+    if distancias is None:
+        distancias = np.load(arq, mmap_mode="r")
+        _tabelas[arq] = distancias
+        if len(_tabelas) > MAX_TABELAS_PROCESSO:
+            _tabelas.popitem(last=False)
+    else:
+        _tabelas.move_to_end(arq)
+    return distancias
+
+
+def _resolver(distancias, servicos, deposito, capacidade, melhorar):
+    """
+    Executada no pool. distancias é o caminho da tabela em disco ou a própria
+    matriz (quando a tabela não pôde ser gravada).
+    Returns:
+        tuple[int, int, str]: Custo, número de rotas e texto sol-*.dat.
+    """
+    if isinstance(distancias, str):
+        distancias = _abrir_tabela(distancias)
+    tabela = TabelaServicos(servicos, deposito, distancias=distancias)
+    instrumentacao.ligar()
+    solucao = resolver_tabela(tabela, capacidade, melhorar)
+    texto = formatar_solucao(solucao, instrumentacao.clocks(), instrumentacao.clocks_melhor)
+    instrumentacao.desligar()
+    return solucao.custo, len(solucao.rotas), texto
+
+
+class Rede:
+    """
+    Grafo de uma instância com a sua tabela de serviços.
+    """
+
+    def __init__(self, instancia):
+        self.nome = instancia.nome
+        self.grafo = grafo_da_instancia(instancia)
+        self.tabela = TabelaServicos.em_disco(self.grafo)
+        if isinstance(self.tabela.distancias, np.memmap):
+            self.distancias = self.tabela.distancias.filename
+        else:
+            self.distancias = self.tabela.distancias
+
+    @property
+    def bytes(self):
+        """
+        Memória aproximada: matrizes de caminhos mínimos do grafo e a tabela
+        quando ela não está mapeada do disco.
+        """
+        total = 0
+        for matriz in (self.grafo.oraculo.dist, self.grafo.oraculo.pred, self.distancias):
+            if isinstance(matriz, np.ndarray):
+                total += matriz.nbytes
+        return total
+
+
+class CacheRedes:
+    """
+    Cache LRU de Rede por hash da instância, limitado em quantidade e em bytes.
+    """
+
+    def __init__(self, max_redes=16, max_bytes=1024 * 2**20):
+        self.max_redes = max_redes
+        self.max_bytes = max_bytes
+        self._redes = OrderedDict()
+        self._bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave):
+        rede = self._redes.get(chave)
+        if rede is None:
+            self.falhas += 1
+            return None
+        self._redes.move_to_end(chave)
+        self.acertos += 1
+        return rede
+
+    def guardar(self, chave, rede):
+        if chave in self._redes:
+            return
+        self._redes[chave] = rede
+        self._bytes += rede.bytes
+        # A rede recém-guardada fica mesmo que sozinha passe do limite
+        while len(self._redes) > 1 and (len(self._redes) > self.max_redes or self._bytes > self.max_bytes):
+            _, antiga = self._redes.popitem(last=False)
+            self._bytes -= antiga.bytes
+            self.descartes += 1
+
+    def estatisticas(self):
+        return {
+            "redes": len(self._redes),
+            "bytes": self._bytes,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "descartes": self.descartes,
+        }
+
+
+class Servidor:
+    def __init__(self, processos=None, max_redes=16, max_bytes=1024 * 2**20):
+        # spawn: o processo principal tem threads (asyncio.to_thread), e fork com
+        # threads pode herdar locks presos
+        self.executor = ProcessPoolExecutor(
+            max_workers=processos or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.cache = CacheRedes(max_redes, max_bytes)
+        # Redes sendo montadas: hash -> tarefa, para que pedidos simultâneos da
+        # mesma instância esperem a mesma leitura
+        self._montando = {}
+        # (caminho, mtime, tamanho) -> hash, para não reler arquivos já vistos
+        self._hashes = {}
+
+    def _identificar(self, pedido):
+        """
+        Hash da instância do pedido e a função que a interpreta.
+        """
+        if "conteudo" in pedido:
+            conteudo = pedido["conteudo"]
+            chave = hash_arquivo(conteudo.encode())
+
+            def carregar():
+                instancia = interpretar(conteudo.splitlines())
+                instancia.hash = chave
+                return instancia
+
+            return chave, carregar
+
+        if "instancia" not in pedido:
+            raise ValueError('o pedido precisa de "instancia" ou "conteudo"')
+        arq = os.path.abspath(pedido["instancia"])
+        estado = os.stat(arq)
+        assinatura = (arq, estado.st_mtime_ns, estado.st_size)
+        chave = self._hashes.get(assinatura)
+        if chave is None:
+            with open(arq, "rb") as f:
+                chave = hash_arquivo(f.read())
+            if len(self._hashes) >= MAX_ASSINATURAS:
+                self._hashes.clear()
+            self._hashes[assinatura] = chave
+        return chave, lambda: carregar_instancia(arq)
+
+    async def _rede(self, pedido):
+        chave, carregar = await asyncio.to_thread(self._identificar, pedido)
+        rede = self.cache.obter(chave)
+        if rede is not None:
+            return rede, True
+
+        tarefa = self._montando.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(asyncio.to_thread(lambda: Rede(carregar())))
+            self._montando[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._montando.pop(chave, None))
+        rede = await asyncio.shield(tarefa)
+        self.cache.guardar(chave, rede)
+        return rede, False
+
+    async def atender(self, pedido):
+        """
+        _Processa um pedido já decodificado._
+        Returns:
+            dict: Resposta a ser enviada ao cliente.
+        """
+        if not isinstance(pedido, dict):
+            raise ValueError("o pedido deve ser um objeto JSON")
+        if pedido.get("comando") == "estatisticas":
+            return {"ok": True, **self.cache.estatisticas()}
+
+        inicio = time.perf_counter_ns()
+        rede, em_cache = await self._rede(pedido)
+        preparo = time.perf_counter_ns() - inicio
+
+        grafo = rede.grafo
+        capacidade = pedido.get("capacidade", grafo.capacidade)
+        if not isinstance(capacidade, int) or isinstance(capacidade, bool):
+            raise ValueError(f"capacidade deve ser um inteiro: {capacidade!r}")
+        servicos = grafo.servicos
+        if "demandas" in pedido:
+            if not isinstance(pedido["demandas"], dict):
+                raise ValueError("demandas deve ser um objeto {id do serviço: demanda}")
+            demandas = {int(id_servico): int(demanda) for id_servico, demanda in pedido["demandas"].items()}
+            invalidos = [id_servico for id_servico in demandas if not 1 <= id_servico <= len(servicos)]
+            if invalidos:
+                raise ValueError(f"serviços inexistentes: {invalidos}")
+            nao_positivas = [id_servico for id_servico, demanda in demandas.items() if demanda < 1]
+            if nao_positivas:
+                raise ValueError(f"demandas menores que 1 nos serviços: {nao_positivas}")
+            servicos = [
+                s._replace(demanda=demandas[s.id]) if s.id in demandas else s for s in servicos
+            ]
+        excedentes = [s.id for s in servicos if s.demanda > capacidade]
+        if capacidade <= 0 or excedentes:
+            raise ValueError(f"capacidade {capacidade} menor que a demanda dos serviços {excedentes}")
+
+        laco = asyncio.get_running_loop()
+        custo, num_rotas, texto = await laco.run_in_executor(
+            self.executor,
+            _resolver,
+            rede.distancias,
+            servicos,
+            grafo.deposito,
+            capacidade,
+            bool(pedido.get("busca_local", True)),
+        )
+        return {
+            "ok": True,
+            "nome": rede.nome,
+            "custo": custo,
+            "rotas": num_rotas,
+            "cache": em_cache,
+            "ms_preparo": preparo / 1e6,
+            "ms_total": (time.perf_counter_ns() - inicio) / 1e6,
+            "solucao": texto,
+        }
+
+    async def _conexao(self, leitor, escritor):
+        try:
+            while linha := await leitor.readline():
+                try:
+                    resposta = await self.atender(json.loads(linha))
+                except Exception as erro:
+                    # Qualquer pedido inválido vira uma resposta de erro, sem derrubar a conexão
+                    resposta = {"ok": False, "erro": f"{type(erro).__name__}: {erro}"}
+                escritor.write(json.dumps(resposta).encode() + b"\n")
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, caminho=None, porta=None):
+        """
+        _Atende conexões até o processo ser interrompido._
+        Args:
+            caminho (str, optional): Socket Unix. Defaults to SOCKET_PADRAO.
+            porta (int, optional): Se informada, escuta em 127.0.0.1:porta em vez do socket Unix.
+        """
+        if porta is not None:
+            servidor = await asyncio.start_server(self._conexao, "127.0.0.1", porta, limit=2**26)
+        else:
+            caminho = caminho or SOCKET_PADRAO
+            if os.path.exists(caminho):
+                os.unlink(caminho)
+            servidor = await asyncio.start_unix_server(self._conexao, caminho, limit=2**26)
+        print(f"escutando em {porta if porta is not None else caminho}", file=sys.stderr, flush=True)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+            if porta is None and os.path.exists(caminho):
+                os.unlink(caminho)
+
+
+def consultar(pedido, caminho=None, porta=None):
+    """
+    _Cliente síncrono: envia um pedido ao servidor e devolve a resposta._
+    """
+    if porta is not None:
+        conexao = socket.create_connection(("127.0.0.1", porta))
+    else:
+        conexao = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexao.connect(caminho or SOCKET_PADRAO)
+    with conexao, conexao.makefile("rwb") as arquivo:
+        arquivo.write(json.dumps(pedido).encode() + b"\n")
+        arquivo.flush()
+        return json.loads(arquivo.readline())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=None, help=f"Socket Unix (padrão: {SOCKET_PADRAO})")
+    parser.add_argument("--porta", type=int, default=None, help="Usa TCP em 127.0.0.1 nesta porta")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    iniciar = comandos.add_parser("iniciar", help="Inicia o servidor")
+    iniciar.add_argument("-p", "--processos", type=int, default=None, help="Processos do pool (padrão: núcleos da máquina)")
+    iniciar.add_argument("--max-redes", type=int, default=16, help="Instâncias mantidas no cache (padrão: 16)")
+    iniciar.add_argument("--max-mb", type=float, default=1024, help="Memória do cache em MiB (padrão: 1024)")
+
+    enviar = comandos.add_parser("enviar", help="Envia uma instância para o servidor resolver")
+    enviar.add_argument("instancia", help="Arquivo .dat da instância")
+    enviar.add_argument("--capacidade", type=int, default=None)
+    enviar.add_argument("--sem-busca-local", action="store_true")
+    enviar.add_argument("-s", "--saida", default=None, help="Arquivo sol-*.dat (padrão: saída padrão)")
+
+    comandos.add_parser("estatisticas", help="Mostra os contadores do cache do servidor")
+    args = parser.parse_args(argv)
+
+    if args.comando == "iniciar":
+        servidor = Servidor(args.processos, args.max_redes, int(args.max_mb * 2**20))
+        try:
+            asyncio.run(servidor.servir(args.socket, args.porta))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.comando == "estatisticas":
+        print(json.dumps(consultar({"comando": "estatisticas"}, args.socket, args.porta)))
+        return 0
+
+    pedido = {"instancia": os.path.abspath(args.instancia), "busca_local": not args.sem_busca_local}
+    if args.capacidade is not None:
+        pedido["capacidade"] = args.capacidade
+    resposta = consultar(pedido, args.socket, args.porta)
+    if not resposta["ok"]:
+        print(resposta["erro"], file=sys.stderr)
+        return 1
+    if args.saida:
+        with open(args.saida, "w") as f:
+            f.write(resposta["solucao"])
+    else:
+        print(resposta["solucao"], end="")
+    origem = "em cache" if resposta["cache"] else f"preparo {resposta['ms_preparo']:.1f} ms"
+    print(f"custo {resposta['custo']} em {resposta['ms_total']:.1f} ms ({origem})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
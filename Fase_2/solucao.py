@@ -0,0 +1,58 @@
+class Solucao:
+    """
+    Conjunto de rotas, cada uma uma lista de tarefas de uma TabelaServicos
+    (sem o depósito, que fica implícito no início e no fim).
+    """
+
+    def __init__(self, tabela, rotas):
+        self.tabela = tabela
+        self.rotas = [list(rota) for rota in rotas if rota]
+
+    @property
+    def custo(self):
+        return sum(self.tabela.custo_rota(rota) for rota in self.rotas)
+
+    def cargas(self):
+        return [self.tabela.carga_rota(rota) for rota in self.rotas]
+
+    def copiar(self):
+        return Solucao(self.tabela, self.rotas)
+
+
+def formatar_solucao(solucao, clocks_total=0, clocks_melhor=0):
+    """
+    _Monta o texto no formato dos arquivos sol-*.dat._
+    Cabeçalho: custo total, número de rotas, clocks totais e clocks até a melhor
+    solução. Depois uma linha por rota:
+    " 0 1 <rota> <carga> <custo>  <visitas> (D 0,dep,dep) (S id,u,v) ... (D 0,dep,dep)"
+    Args:
+        solucao (Solucao): Solução a ser escrita.
+        clocks_total (int, optional): Clocks gastos na execução. Defaults to 0.
+        clocks_melhor (int, optional): Clocks até encontrar a melhor solução. Defaults to 0.
+    """
+    tabela = solucao.tabela
+    deposito = f"(D 0,{tabela.deposito},{tabela.deposito})"
+
+    linhas = [
+        str(solucao.custo),
+        str(len(solucao.rotas)),
+        str(clocks_total),
+        str(clocks_melhor),
+    ]
+    for numero, rota in enumerate(solucao.rotas, start=1):
+        visitas = [deposito]
+        for tarefa in rota:
+            visitas.append(
+                f"(S {tabela.servico[tarefa]},{tabela.inicio[tarefa]},{tabela.fim[tarefa]})"
+            )
+        visitas.append(deposito)
+        linhas.append(
+            f" 0 1 {numero} {tabela.carga_rota(rota)} {tabela.custo_rota(rota)}  "
+            f"{len(visitas)} " + " ".join(visitas)
+        )
+    return "\n".join(linhas) + "\n"
+
+
+def escrever_solucao(arq: str, solucao, clocks_total=0, clocks_melhor=0):
+    with open(arq, "w") as f:
+        f.write(formatar_solucao(solucao, clocks_total, clocks_melhor))
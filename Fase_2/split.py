@@ -0,0 +1,254 @@
+"""
+Split ótimo (Prins, 2004) de uma rota gigante em viagens que respeitam a capacidade.
+
+A rota gigante é uma ordem de todas as tarefas sem o depósito. O split encontra
+os pontos de corte que minimizam o custo total, onde cada viagem sai do
+depósito, atende um trecho contíguo da ordem e volta ao depósito.
+
+split() usa a versão linear com deque de Vidal (2016); split_quadratico() é a
+versão clássica, mantida como referência e para o benchmark:
+
+    python split.py ../Testes/DI-NEARP-n442-Q2k.dat
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from Grafo import ler_arquivo
+from instrumentacao import cronometrado
+from servicos import TabelaServicos
+from solucao import Solucao
+
+DEPOSITO = TabelaServicos.DEPOSITO
+
+
+def _prefixos(tabela, tour):
+    """
+    Vetores usados pelas duas versões do split, com índice 1..n para as tarefas:
+    carga[k]: demanda acumulada até a tarefa k
+    interno[k]: custos de serviço + deslocamentos entre tarefas consecutivas até k
+    ida[k] / volta[k]: distância do depósito até a tarefa k / da tarefa k até o depósito
+    """
+    tour = np.asarray(tour, dtype=np.int64)
+    n = len(tour)
+    distancias = tabela.distancias
+
+    carga = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(tabela.demanda[tour], out=carga[1:])
+
+    interno = np.zeros(n + 1, dtype=np.int64)
+    passos = tabela.custo[tour].astype(np.int64)
+    passos[1:] += distancias[tour[:-1], tour[1:]]
+    np.cumsum(passos, out=interno[1:])
+
+    ida = np.zeros(n + 1, dtype=np.int64)
+    volta = np.zeros(n + 1, dtype=np.int64)
+    ida[1:] = distancias[DEPOSITO, tour]
+    volta[1:] = distancias[tour, DEPOSITO]
+    return carga.tolist(), interno.tolist(), ida.tolist(), volta.tolist()
+
+
+def _cortar(tour, anterior):
+    """
+    Reconstrói as viagens a partir do vetor de cortes (anterior[j] = início - 1
+    da viagem que termina em j).
+    """
+    viagens = []
+    j = len(tour)
+    while j > 0:
+        i = anterior[j]
+        viagens.append(list(tour[i:j]))
+        j = i
+    viagens.reverse()
+    return viagens
+
+
+@cronometrado("split")
+def split(tabela, tour, capacidade):
+    """
+    _Split linear: O(n) por chamada._
+    O custo da viagem que atende as tarefas i+1..j é
+        ida[i+1] + (interno[j] - interno[i+1] + custo[i+1]) + volta[j]
+    que se separa em uma parte que só depende de i e outra que só depende de j.
+    Como o início viável da viagem que termina em j só avança com j, o melhor i
+    é o mínimo de uma janela deslizante, mantido em uma deque monotônica.
+    Args:
+        tabela (TabelaServicos): Tarefas e distâncias.
+        tour (list[int]): Rota gigante (tarefas, sem o depósito).
+        capacidade (int): Capacidade do veículo.
+    Returns:
+        tuple[int, list[list[int]]]: Custo total e as viagens.
+    """
+    n = len(tour)
+    if n == 0:
+        return 0, []
+    carga, interno, ida, volta = _prefixos(tabela, tour)
+    custo_tarefa = tabela.custo[np.asarray(tour)].tolist()
+
+    def parte_inicio(i):
+        # Parte do custo que depende apenas do ponto de corte i
+        return potencial[i] + ida[i + 1] - interno[i + 1] + custo_tarefa[i]
+
+    infinito = float("inf")
+    potencial = [0] + [infinito] * n
+    anterior = [0] * (n + 1)
+    janela = deque([0])
+
+    for j in range(1, n + 1):
+        # Remove do início os cortes que deixariam a viagem acima da capacidade
+        while janela and carga[j] - carga[janela[0]] > capacidade:
+            janela.popleft()
+        if not janela:
+            raise ValueError("há serviço com demanda maior que a capacidade do veículo")
+
+        i = janela[0]
+        potencial[j] = parte_inicio(i) + interno[j] + volta[j]
+        anterior[j] = i
+
+        if j < n:
+            # Mantém a deque crescente em parte_inicio
+            valor = parte_inicio(j)
+            while janela and parte_inicio(janela[-1]) >= valor:
+                janela.pop()
+            janela.append(j)
+
+    return int(potencial[n]), _cortar(tour, anterior)
+
+
+def split_quadratico(tabela, tour, capacidade):
+    """
+    _Split clássico de Prins: para cada início i estende a viagem enquanto couber._
+    Mesma entrada e saída de split().
+    """
+    n = len(tour)
+    if n == 0:
+        return 0, []
+    carga, interno, ida, volta = _prefixos(tabela, tour)
+    custo_tarefa = tabela.custo[np.asarray(tour)].tolist()
+
+    infinito = float("inf")
+    potencial = [0] + [infinito] * n
+    anterior = [0] * (n + 1)
+    for i in range(n):
+        if potencial[i] == infinito:
+            continue
+        base = potencial[i] + ida[i + 1] - interno[i + 1] + custo_tarefa[i]
+        j = i + 1
+        while j <= n and carga[j] - carga[i] <= capacidade:
+            custo = base + interno[j] + volta[j]
+            if custo < potencial[j]:
+                potencial[j] = custo
+                anterior[j] = i
+            j += 1
+
+    if potencial[n] == infinito:
+        raise ValueError("há serviço com demanda maior que a capacidade do veículo")
+    return int(potencial[n]), _cortar(tour, anterior)
+
+
+def orientar(tabela, tarefas, com_deposito=True):
+    """
+    _Escolhe a orientação de cada aresta requerida minimizando o custo da sequência._
+    Programação dinâmica com dois estados por posição (a tarefa ou a sua inversa),
+    em tempo linear. Com com_deposito=True, a sequência sai e volta ao depósito.
+    Args:
+        tabela (TabelaServicos): Tarefas e distâncias.
+        tarefas (list[int]): Sequência de tarefas (qualquer orientação).
+    Returns:
+        list[int]: A mesma sequência de serviços com as melhores orientações.
+    """
+    if not tarefas:
+        return []
+    distancias = tabela.distancias
+    custo = tabela.custo
+    inverso = tabela.inverso
+
+    opcoes = []
+    for t in tarefas:
+        t = int(t)
+        opcoes.append((t,) if inverso[t] == t else (t, int(inverso[t])))
+
+    acumulado = {
+        t: (distancias[DEPOSITO, t] if com_deposito else 0) + custo[t] for t in opcoes[0]
+    }
+    escolhas = []
+    for posicao in range(1, len(opcoes)):
+        novo = {}
+        escolha = {}
+        for t in opcoes[posicao]:
+            melhor = min(acumulado, key=lambda a: acumulado[a] + distancias[a, t])
+            novo[t] = acumulado[melhor] + distancias[melhor, t] + custo[t]
+            escolha[t] = melhor
+        escolhas.append(escolha)
+        acumulado = novo
+
+    if com_deposito:
+        ultima = min(acumulado, key=lambda a: acumulado[a] + distancias[a, DEPOSITO])
+    else:
+        ultima = min(acumulado, key=acumulado.get)
+
+    resultado = [ultima]
+    for escolha in reversed(escolhas):
+        resultado.append(escolha[resultado[-1]])
+    resultado.reverse()
+    return resultado
+
+
+def decodificar(tabela, tour, capacidade):
+    """
+    Transforma uma rota gigante em Solucao: orienta a sequência inteira, faz o
+    split e reorienta cada viagem, já que as pontas passam a ser o depósito.
+    """
+    _, viagens = split(tabela, orientar(tabela, tour, com_deposito=False), capacidade)
+    return Solucao(tabela, [orientar(tabela, viagem) for viagem in viagens])
+
+
+def tour_aleatorio(tabela, rng):
+    """
+    Uma ordem aleatória dos serviços, cada um em uma orientação sorteada.
+    """
+    tarefas = {}
+    for t in rng.permutation(np.arange(1, len(tabela))):
+        tarefas.setdefault(int(tabela.servico[t]), int(t))
+    tour = list(tarefas.values())
+    rng.shuffle(tour)
+    return tour
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara o split linear com o quadrático.")
+    parser.add_argument("instancias", nargs="+", help="Arquivos .dat")
+    parser.add_argument("-n", "--repeticoes", type=int, default=50, help="Rotas gigantes por instância")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.semente)
+    print(f"{'instância':30s} {'tarefas':>8s} {'capacidade/demanda média':>25s} {'linear (µs)':>12s} {'quadrático (µs)':>16s}")
+    for arq in args.instancias:
+        grafo = ler_arquivo(arq)
+        tabela = TabelaServicos.do_grafo(grafo)
+        tours = [tour_aleatorio(tabela, rng) for _ in range(args.repeticoes)]
+
+        tempos = {}
+        custos = {}
+        for nome, funcao in (("linear", split), ("quadratico", split_quadratico)):
+            inicio = time.perf_counter()
+            custos[nome] = [funcao(tabela, tour, grafo.capacidade)[0] for tour in tours]
+            tempos[nome] = (time.perf_counter() - inicio) / len(tours) * 1e6
+
+        if custos["linear"] != custos["quadratico"]:
+            raise AssertionError(f"{arq}: custos diferentes entre as versões do split")
+
+        demanda_media = max(tabela.demanda[1:].mean(), 1)
+        print(
+            f"{os.path.basename(arq):30s} {len(tours[0]):8d} {grafo.capacidade / demanda_media:25.1f} "
+            f"{tempos['linear']:12.1f} {tempos['quadratico']:16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
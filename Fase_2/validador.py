@@ -0,0 +1,278 @@
+"""
+Valida arquivos sol-*.dat contra as instâncias correspondentes.
+
+Para cada solução confere se todo serviço requerido (nó, aresta ou arco) é
+atendido exatamente uma vez, se nenhuma rota passa da capacidade, se toda rota
+começa e termina no depósito e se os custos e cargas informados batem com os
+recalculados (deslocamentos por caminhos mínimos + custo dos serviços).
+
+Exemplo:
+    python validador.py G0 --instancias ../Testes
+    python validador.py G0/sol-BHW1.dat G0/sol-BHW2.dat -p 4
+
+Soluções sem instância correspondente são ignoradas (listadas com -v). O código
+de saída é 1 se alguma solução for inválida.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+from Grafo import ler_arquivo
+from leitura import numero_de_nos
+from limites import calcular_limite, gap
+
+PREFIXO = "sol-"
+
+
+class Visita(NamedTuple):
+    """
+    Um item "(X id,u,v)" de uma rota: X é "D" (depósito) ou "S" (serviço).
+    """
+
+    tipo: str
+    id: int
+    origem: int
+    destino: int
+
+
+class RotaLida(NamedTuple):
+    numero: int
+    carga: int
+    custo: int
+    visitas: list
+
+
+class SolucaoLida(NamedTuple):
+    custo: int
+    num_rotas: int
+    clocks_total: int
+    clocks_melhor: int
+    rotas: list
+
+
+def ler_solucao(arq: str):
+    """
+    _Lê um arquivo no formato sol-*.dat._
+    Args:
+        arq (str): Caminho do arquivo.
+    Returns:
+        SolucaoLida: Cabeçalho e rotas como estão no arquivo.
+    """
+    with open(arq, "r") as f:
+        linhas = [linha for linha in f.read().splitlines() if linha.strip()]
+    if len(linhas) < 4:
+        raise ValueError(f"{arq}: cabeçalho incompleto")
+
+    custo, num_rotas, clocks_total, clocks_melhor = (int(linha) for linha in linhas[:4])
+    rotas = []
+    for linha in linhas[4:]:
+        inicio_visitas = linha.index("(")
+        campos = linha[:inicio_visitas].split()
+        # campos: 0 1 <rota> <carga> <custo> <visitas>
+        visitas = []
+        for item in linha[inicio_visitas:].split(")"):
+            item = item.strip().lstrip("(")
+            if not item:
+                continue
+            tipo, resto = item.split(maxsplit=1)
+            id_servico, origem, destino = (int(v) for v in resto.split(","))
+            visitas.append(Visita(tipo, id_servico, origem, destino))
+        if len(visitas) != int(campos[5]):
+            raise ValueError(f"{arq}: rota {campos[2]} informa {campos[5]} visitas e tem {len(visitas)}")
+        rotas.append(RotaLida(int(campos[2]), int(campos[3]), int(campos[4]), visitas))
+    return SolucaoLida(custo, num_rotas, clocks_total, clocks_melhor, rotas)
+
+
+def validar(solucao, grafo, dist):
+    """
+    _Confere uma solução lida contra o grafo da instância._
+    Args:
+        solucao (SolucaoLida): Solução lida por ler_solucao().
+        grafo (Grafo): Instância.
+        dist (np.ndarray): Matriz de caminhos mínimos do grafo.
+    Returns:
+        tuple[int, list[str]]: Custo total recalculado e a lista de problemas
+        encontrados (vazia se a solução for válida).
+    """
+    problemas = []
+    servicos = {s.id: s for s in grafo.servicos}
+    atendimentos = dict.fromkeys(servicos, 0)
+    deposito = grafo.deposito
+
+    if solucao.num_rotas != len(solucao.rotas):
+        problemas.append(f"cabeçalho informa {solucao.num_rotas} rotas, arquivo tem {len(solucao.rotas)}")
+
+    custo_total = 0
+    for rota in solucao.rotas:
+        nome = f"rota {rota.numero}"
+        visitas = rota.visitas
+        if len(visitas) < 2 or any(
+            v.tipo != "D" or v.origem != deposito or v.destino != deposito for v in (visitas[0], visitas[-1])
+        ):
+            problemas.append(f"{nome}: não começa e termina no depósito {deposito}")
+
+        # Pontos de partida e chegada de cada trecho de deslocamento
+        saidas = [deposito]
+        chegadas = []
+        carga = 0
+        custo_servicos = 0
+        for v in visitas:
+            if v.tipo == "D":
+                continue
+            s = servicos.get(v.id)
+            if v.tipo != "S" or s is None:
+                problemas.append(f"{nome}: visita desconhecida ({v.tipo} {v.id},{v.origem},{v.destino})")
+                continue
+            sentidos = {(s.origem, s.destino)}
+            if s.tipo == "E":
+                sentidos.add((s.destino, s.origem))
+            if (v.origem, v.destino) not in sentidos:
+                problemas.append(f"{nome}: serviço {v.id} atendido como {v.origem},{v.destino}")
+            atendimentos[v.id] += 1
+            chegadas.append(v.origem)
+            saidas.append(v.destino)
+            carga += s.demanda
+            custo_servicos += s.custo
+        chegadas.append(deposito)
+
+        deslocamento = int(dist[saidas, chegadas].sum())
+        custo = deslocamento + custo_servicos
+        custo_total += custo
+
+        if carga > grafo.capacidade:
+            problemas.append(f"{nome}: carga {carga} acima da capacidade {grafo.capacidade}")
+        if carga != rota.carga:
+            problemas.append(f"{nome}: carga informada {rota.carga}, recalculada {carga}")
+        if custo != rota.custo:
+            problemas.append(f"{nome}: custo informado {rota.custo}, recalculado {custo}")
+
+    for id_servico, vezes in atendimentos.items():
+        if vezes != 1:
+            problemas.append(f"serviço {id_servico} atendido {vezes} vezes")
+    if custo_total != solucao.custo:
+        problemas.append(f"custo total informado {solucao.custo}, recalculado {custo_total}")
+    return custo_total, problemas
+
+
+def instancia_da_solucao(arq_solucao, pasta_instancias):
+    """
+    Caminho da instância de um sol-<nome>.dat, ou None se ela não existir.
+    """
+    nome = os.path.basename(arq_solucao)
+    if nome.startswith(PREFIXO):
+        nome = nome[len(PREFIXO):]
+    caminho = os.path.join(pasta_instancias, nome)
+    return caminho if os.path.exists(caminho) else None
+
+
+def validar_instancia(arq_instancia, arqs_solucao):
+    """
+    Valida todas as soluções de uma instância, lendo o grafo e calculando a
+    matriz de distâncias uma única vez.
+    Returns:
+        tuple[list, float, int]: (arquivo, custo, problemas) de cada solução, o
+        tempo gasto e o limite inferior da instância (None se ela não pôde ser lida).
+    """
+    inicio = time.perf_counter()
+    resultados = []
+    try:
+        grafo = ler_arquivo(arq_instancia)
+        dist, _ = grafo.oraculo.matrizes()
+        limite = calcular_limite(grafo).valor
+    except Exception as erro:
+        problema = f"erro ao ler a instância: {type(erro).__name__}: {erro}"
+        return [(arq, None, [problema]) for arq in arqs_solucao], time.perf_counter() - inicio, None
+
+    for arq in arqs_solucao:
+        try:
+            custo, problemas = validar(ler_solucao(arq), grafo, dist)
+        except Exception as erro:
+            custo, problemas = None, [f"{type(erro).__name__}: {erro}"]
+        resultados.append((arq, custo, problemas))
+    return resultados, time.perf_counter() - inicio, limite
+
+
+def listar_solucoes(entradas):
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(glob.glob(os.path.join(entrada, f"{PREFIXO}*.dat")))
+        elif glob.has_magic(entrada):
+            arquivos.extend(glob.glob(entrada))
+        else:
+            arquivos.append(entrada)
+    return sorted(dict.fromkeys(os.path.normpath(a) for a in arquivos))
+
+
+def executar(arqs_solucao, pasta_instancias, processos=None, verboso=False, saida=sys.stdout):
+    """
+    _Valida as soluções em paralelo, um processo por instância._
+    Returns:
+        tuple[int, int, int]: Quantidade de soluções válidas, inválidas e ignoradas.
+    """
+    por_instancia = {}
+    ignoradas = []
+    for arq in arqs_solucao:
+        instancia = instancia_da_solucao(arq, pasta_instancias)
+        if instancia is None:
+            ignoradas.append(arq)
+        else:
+            por_instancia.setdefault(instancia, []).append(arq)
+
+    validas = invalidas = 0
+    # As maiores instâncias primeiro, para os processos terminarem juntos
+    ordem = sorted(por_instancia, key=numero_de_nos, reverse=True)
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = [executor.submit(validar_instancia, inst, por_instancia[inst]) for inst in ordem]
+        for futuro in as_completed(futuros):
+            resultados, tempo, limite = futuro.result()
+            for arq, custo, problemas in resultados:
+                nome = os.path.basename(arq)
+                if problemas:
+                    invalidas += 1
+                    print(f"ERRO {nome}", file=saida)
+                    for problema in problemas:
+                        print(f"     {problema}", file=saida)
+                else:
+                    validas += 1
+                    if verboso:
+                        print(
+                            f"OK   {nome} custo={custo} limite={limite} gap={gap(custo, limite):.1f}% ({tempo:.3f}s)",
+                            file=saida,
+                        )
+
+    if verboso:
+        for arq in ignoradas:
+            print(f"--   {os.path.basename(arq)}: sem instância em {pasta_instancias}", file=saida)
+    return validas, invalidas, len(ignoradas)
+
+
+def main(argv=None):
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entradas", nargs="*", default=[os.path.join(pasta, "G0")], help="Pastas, arquivos sol-*.dat ou padrões glob (padrão: G0)")
+    parser.add_argument("-i", "--instancias", default=os.path.join(pasta, "..", "Testes"), help="Pasta com as instâncias .dat (padrão: ../Testes)")
+    parser.add_argument("-p", "--processos", type=int, default=None, help="Número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("-v", "--verboso", action="store_true", help="Lista também as soluções válidas e as ignoradas")
+    args = parser.parse_args(argv)
+
+    arquivos = listar_solucoes(args.entradas)
+    if not arquivos:
+        parser.error("nenhuma solução encontrada")
+
+    inicio = time.perf_counter()
+    validas, invalidas, ignoradas = executar(arquivos, args.instancias, args.processos, args.verboso)
+    print(
+        f"{validas} válidas, {invalidas} inválidas, {ignoradas} sem instância "
+        f"({time.perf_counter() - inicio:.2f}s)"
+    )
+    return 1 if invalidas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
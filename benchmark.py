@@ -0,0 +1,305 @@
+"""
+Mede tempo e pico de memória de cada etapa nas instâncias reais, agrupadas por
+família (BHW, CBMix, DI-NEARP, mggdb, mgval):
+
+    leitura_fase1 / leitura_fase2   ler_arq / ler_arquivo (sem o cache binário)
+    caminhos_minimos                calcular_matriz_caminhos_minimos
+    <estatística>                   cada uma das 13 estatísticas da Fase 1
+    tabela_servicos, construcao,    fases do resolvedor da Fase 2
+    split, busca_local
+
+Exemplos:
+    python benchmark.py -s base.json                 # grava a referência
+    python benchmark.py -c base.json --limiar 0.25   # compara com a referência
+    python benchmark.py --escala 1000 2000 5000 -e leitura_fase2 construcao
+
+Com --escala, gera instâncias sintéticas (Fase_2/gerador.py) com esses números
+de nós e mostra a curva de tempo de cada etapa. -e limita as etapas medidas; as
+que elas pressupõem rodam uma vez, sem medição.
+
+Com -c, o código de saída é 1 se alguma etapa ficar mais lenta (ou usar mais
+memória) que a referência além do limiar.
+"""
+
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, "Fase 1"))
+
+from Trabalho import ESTATISTICAS, ler_arq  # noqa: E402  (também põe Fase_2 no caminho)
+
+import construtivo  # noqa: E402
+import gerador  # noqa: E402
+import numpy as np  # noqa: E402
+from busca_local import BuscaLocal  # noqa: E402
+from Grafo import ler_arquivo  # noqa: E402
+from leitura import numero_de_nos  # noqa: E402
+from servicos import TabelaServicos  # noqa: E402
+from split import decodificar  # noqa: E402
+
+FAMILIAS = ("BHW", "CBMix", "DI-NEARP", "mggdb", "mgval", "sintetica")
+VERSAO = 1
+# Etapas da Fase 1; as demais são da Fase 2
+ETAPAS_FASE1 = ("leitura_fase1", "caminhos_minimos", *(nome for nome, _ in ESTATISTICAS))
+NOMES_ESTATISTICAS = {nome for nome, _ in ESTATISTICAS}
+PASTA_SINTETICAS = os.path.join(tempfile.gettempdir(), "grafos-sinteticas")
+
+
+def familia(arq):
+    nome = os.path.basename(arq)
+    for prefixo in FAMILIAS:
+        if nome.startswith(prefixo):
+            return prefixo
+    return "outras"
+
+
+def etapas(arq):
+    """
+    Gera (nome, função) para cada etapa de uma instância, na ordem em que
+    dependem umas das outras. Cada função pode ser chamada várias vezes.
+    """
+    estado = {}
+
+    def leitura_fase1():
+        estado["grafo1"] = ler_arq(arq, usar_cache=False)
+
+    def caminhos_minimos():
+        estado["grafo1"].oraculo.invalidar()
+        estado["grafo1"].calcular_matriz_caminhos_minimos()
+
+    yield "leitura_fase1", leitura_fase1
+    yield "caminhos_minimos", caminhos_minimos
+    for nome, estatistica in ESTATISTICAS:
+        yield nome, lambda estatistica=estatistica: estatistica(estado["grafo1"])
+
+    def leitura_fase2():
+        estado["grafo2"] = ler_arquivo(arq, usar_cache=False)
+
+    def tabela_servicos():
+        estado["grafo2"].oraculo.invalidar()
+        estado["tabela"] = TabelaServicos.do_grafo(estado["grafo2"])
+
+    def construcao():
+        estado["inicial"] = construtivo.construir(estado["tabela"], estado["grafo2"].capacidade)
+
+    def split():
+        # Rota gigante formada pelas rotas da solução construtiva
+        tour = [t for rota in estado["inicial"].rotas for t in rota]
+        decodificar(estado["tabela"], tour, estado["grafo2"].capacidade)
+
+    def busca_local():
+        BuscaLocal(estado["tabela"], estado["grafo2"].capacidade).otimizar(estado["inicial"])
+
+    yield "leitura_fase2", leitura_fase2
+    yield "tabela_servicos", tabela_servicos
+    yield "construcao", construcao
+    yield "split", split
+    yield "busca_local", busca_local
+
+
+def medir(funcao, repeticoes, memoria):
+    """
+    Menor tempo (s) entre as repetições e, se memoria=True, o pico de memória
+    alocada (bytes) em uma execução extra com o tracemalloc ligado (o tracemalloc
+    deixa o código mais lento, então não participa da medição de tempo).
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            funcao()
+            pico = tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+    return min(tempos), pico
+
+
+def _preparacao(etapa, seguintes, selecao):
+    """
+    Se uma etapa fora da seleção precisa rodar (sem medição) porque uma etapa
+    selecionada da mesma fase vem depois dela. Estatísticas não preparam nada.
+    """
+    if etapa in NOMES_ESTATISTICAS:
+        return False
+    fase1 = etapa in ETAPAS_FASE1
+    return any(e in selecao and (e in ETAPAS_FASE1) == fase1 for e in seguintes)
+
+
+def executar(arquivos, repeticoes=3, memoria=True, saida=sys.stdout, selecao=None):
+    instancias = {}
+    for arq in arquivos:
+        nome = os.path.splitext(os.path.basename(arq))[0]
+        resultado = {}
+        lista = list(etapas(arq))
+        for i, (etapa, funcao) in enumerate(lista):
+            if selecao is None or etapa in selecao:
+                tempo, pico = medir(funcao, repeticoes, memoria)
+                resultado[etapa] = {"tempo": tempo, "memoria": pico}
+            elif _preparacao(etapa, [e for e, _ in lista[i + 1 :]], selecao):
+                funcao()
+        instancias[nome] = {"familia": familia(arq), "nos": numero_de_nos(arq), "etapas": resultado}
+        total = sum(e["tempo"] for e in resultado.values())
+        print(f"{nome:30s} {total:8.3f}s", file=saida, flush=True)
+    return {
+        "versao": VERSAO,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "repeticoes": repeticoes,
+        "instancias": instancias,
+    }
+
+
+def resumo(resultado, saida=sys.stdout):
+    """
+    Tabela com o tempo total e o maior pico de memória de cada etapa por família.
+    """
+    por_familia = {}
+    for dados in resultado["instancias"].values():
+        grupo = por_familia.setdefault(dados["familia"], {})
+        for etapa, medida in dados["etapas"].items():
+            tempo, pico = grupo.get(etapa, (0.0, 0))
+            grupo[etapa] = (tempo + medida["tempo"], max(pico, medida["memoria"] or 0))
+
+    for nome in sorted(por_familia):
+        print(f"\n{nome}", file=saida)
+        print(f"  {'etapa':25s} {'tempo (ms)':>12s} {'pico (KiB)':>12s}", file=saida)
+        for etapa, (tempo, pico) in por_familia[nome].items():
+            print(f"  {etapa:25s} {tempo * 1000:12.2f} {pico / 1024:12.1f}", file=saida)
+
+
+def curva(resultado, saida=sys.stdout):
+    """
+    Tempo (ms) de cada etapa das instâncias sintéticas, em ordem de número de nós.
+    """
+    sinteticas = sorted(
+        (dados for dados in resultado["instancias"].values() if dados["familia"] == "sintetica"),
+        key=lambda dados: dados["nos"],
+    )
+    if not sinteticas:
+        return
+    nomes = list(sinteticas[0]["etapas"])
+    print("\ncurva de escala (ms)", file=saida)
+    print(f"  {'nós':>8s} " + " ".join(f"{nome:>16s}" for nome in nomes), file=saida)
+    for dados in sinteticas:
+        tempos = (dados["etapas"][nome]["tempo"] * 1000 for nome in nomes)
+        print(f"  {dados['nos']:8d} " + " ".join(f"{tempo:16.2f}" for tempo in tempos), file=saida)
+
+
+def comparar(base, atual, limiar, minimo_tempo, minimo_memoria):
+    """
+    _Lista as etapas que pioraram em relação à referência._
+    Uma etapa regride quando o valor atual passa do valor de referência vezes
+    (1 + limiar) e a diferença absoluta passa do mínimo (para que ruído em
+    etapas de microssegundos não seja acusado).
+    Returns:
+        list[str]: Descrição de cada regressão.
+    """
+    regressoes = []
+    for nome, dados in atual["instancias"].items():
+        referencia = base["instancias"].get(nome)
+        if referencia is None:
+            continue
+        for etapa, medida in dados["etapas"].items():
+            anterior = referencia["etapas"].get(etapa)
+            if anterior is None:
+                continue
+            for chave, minimo, unidade, escala in (
+                ("tempo", minimo_tempo, "ms", 1000),
+                ("memoria", minimo_memoria, "KiB", 1 / 1024),
+            ):
+                novo, velho = medida[chave], anterior[chave]
+                if novo is None or velho is None:
+                    continue
+                if novo > velho * (1 + limiar) and novo - velho > minimo:
+                    regressoes.append(
+                        f"{nome} {etapa} {chave}: {velho * escala:.2f} -> {novo * escala:.2f} {unidade} "
+                        f"(+{(novo / max(velho, 1e-12) - 1) * 100:.0f}%)"
+                    )
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entradas", nargs="*", default=None, help="Pastas, arquivos .dat ou padrões glob (padrão: Testes, se não houver --escala)")
+    parser.add_argument("-f", "--familias", nargs="+", choices=FAMILIAS, help="Só as famílias indicadas")
+    parser.add_argument("-e", "--etapas", nargs="+", help="Só mede as etapas indicadas")
+    parser.add_argument("--escala", type=int, nargs="+", metavar="NOS", help="Gera e mede instâncias sintéticas com esses números de nós")
+    parser.add_argument("--semente", type=int, default=0, help="Semente das instâncias sintéticas")
+    parser.add_argument("-r", "--repeticoes", type=int, default=3, help="Repetições de cada etapa (vale o menor tempo; padrão: 3)")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede o pico de memória")
+    parser.add_argument("-s", "--salvar", help="Grava os resultados neste arquivo JSON")
+    parser.add_argument("-c", "--comparar", help="Arquivo JSON de referência")
+    parser.add_argument("--limiar", type=float, default=0.2, help="Piora relativa tolerada (padrão: 0.2 = 20%%)")
+    parser.add_argument("--minimo-ms", type=float, default=2.0, help="Diferença mínima de tempo acusada, em ms")
+    parser.add_argument("--minimo-kib", type=float, default=256.0, help="Diferença mínima de memória acusada, em KiB")
+    args = parser.parse_args(argv)
+    if args.etapas:
+        # etapas() só monta as funções, então os nomes saem sem ler nenhum arquivo
+        desconhecidas = set(args.etapas) - {nome for nome, _ in etapas(None)}
+        if desconhecidas:
+            parser.error(f"etapas desconhecidas: {', '.join(sorted(desconhecidas))}")
+
+    entradas = args.entradas or ([] if args.escala else [os.path.join(RAIZ, "Testes")])
+    arquivos = []
+    for num_nos in args.escala or ():
+        # Regravada sempre: um arquivo antigo com o mesmo nome pode ter vindo de
+        # outra versão do gerador
+        instancia = gerador.gerar(num_nos, args.semente)
+        arq = os.path.join(PASTA_SINTETICAS, instancia["nome"] + ".dat")
+        os.makedirs(PASTA_SINTETICAS, exist_ok=True)
+        gerador.escrever_instancia(arq, instancia)
+        arquivos.append(arq)
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(glob.glob(os.path.join(entrada, "*.dat")))
+        elif glob.has_magic(entrada):
+            arquivos.extend(glob.glob(entrada))
+        else:
+            arquivos.append(entrada)
+    arquivos = sorted(dict.fromkeys(arquivos))
+    if args.familias:
+        arquivos = [arq for arq in arquivos if familia(arq) in args.familias]
+    if not arquivos:
+        parser.error("nenhuma instância encontrada")
+
+    resultado = executar(arquivos, args.repeticoes, not args.sem_memoria, selecao=args.etapas)
+    resumo(resultado)
+    curva(resultado)
+
+    if args.salvar:
+        with open(args.salvar, "w") as f:
+            json.dump(resultado, f, indent=1)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+        regressoes = comparar(base, resultado, args.limiar, args.minimo_ms / 1000, args.minimo_kib * 1024)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressões acima de {args.limiar:.0%}:")
+            for regressao in regressoes:
+                print(f"  {regressao}")
+            return 1
+        print("\nnenhuma regressão")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())